@@ -0,0 +1,172 @@
+"""Bộ nhớ đệm phân tích lưu trên đĩa (SQLite), dùng chung giữa các lần chạy và giữa các tiến trình.
+
+Mỗi thế cờ (khóa zobrist.position_key, gồm bên đi, trộn với cấu hình tìm kiếm) lưu nước đi tốt nhất (mã của
+moves.encode_move), điểm và độ sâu.
+Cơ sở dữ liệu dùng chế độ WAL nên nhiều tiến trình trên cùng máy đọc/ghi an toàn; mỗi tiến trình mở kết nối riêng.
+Số mục bị giới hạn bởi `max_entries`: khi vượt quá, các mục lâu không được dùng nhất bị xóa (kiểu LRU).
+Các thế cờ vừa tra được giữ thêm trong bộ nhớ của tiến trình nên tra lại chỉ mất vài micro giây.
+
+Các tùy chọn tìm kiếm (`config`, xem SearchContext.cache_config: tìm kiếm tĩnh, tìm kiếm chọn lọc, bảng tàn cuộc)
+là một phần của khóa, nên mỗi cấu hình chỉ đọc kết quả của chính nó. Hàm đánh giá thì không: khi thay đổi nó,
+hãy dùng tệp mới hoặc gọi `clear()`.
+"""
+import functools
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from moves import decode_move, encode_move
+from zobrist import position_key
+
+CACHE_PATH = "analysis_cache.sqlite"
+DEFAULT_MAX_ENTRIES = 1_000_000
+MEMORY_ENTRIES = 4096  # Số mục giữ trong bộ nhớ của tiến trình
+EVICT_FRACTION = 0.1  # Khi vượt giới hạn, xóa thêm chừng này phần để không phải dọn sau mỗi lần ghi
+EVICT_CHECK_INTERVAL = 256  # Số lần ghi giữa hai lần kiểm tra kích thước
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key INTEGER PRIMARY KEY,
+    move INTEGER NOT NULL,
+    score REAL,
+    depth INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_last_used ON positions (last_used);
+"""
+
+
+def _signed(key):
+    # SQLite lưu số nguyên có dấu 64 bit; khóa Zobrist là số không dấu 64 bit
+    return key - (1 << 64) if key >= 1 << 63 else key
+
+
+@functools.lru_cache(maxsize=None)
+def _config_key(config):
+    # Số 64 bit cố định của một cấu hình tìm kiếm (giống nhau giữa các tiến trình, khác với hash() của chuỗi)
+    return int.from_bytes(hashlib.blake2b(repr(config).encode(), digest_size=8).digest(), "big")
+
+
+def _key(board, color, config):
+    return _signed(position_key(board, color) ^ _config_key(config))
+
+
+class AnalysisCache:
+    """Tra và lưu kết quả tìm kiếm theo thế cờ; gắn vào SearchContext(cache=...).
+
+    Dùng được từ nhiều luồng (ví dụ luồng tìm kiếm của Engine); lỗi khi cơ sở dữ liệu đang bị khóa quá lâu
+    được bỏ qua vì bộ nhớ đệm chỉ để tăng tốc.
+    """
+
+    def __init__(self, path=CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, timeout=5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.memory = OrderedDict()  # Khóa -> (mã nước đi, điểm, độ sâu)
+        self.touched = {}  # Khóa -> thời điểm dùng, ghi xuống đĩa theo lô cùng lần ghi tiếp theo
+        self.writes = 0
+        self.hits = self.misses = 0
+
+    def probe(self, board, color, depth=0, config=()):
+        """Trả về (nước đi, điểm, độ sâu) nếu cấu hình `config` đã lưu kết quả có độ sâu >= `depth`, ngược lại None."""
+        key = _key(board, color, config)
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+            else:
+                try:
+                    entry = self.connection.execute("SELECT move, score, depth FROM positions WHERE key = ?",
+                                                    (key,)).fetchone()
+                except sqlite3.OperationalError:
+                    entry = None
+                if entry is not None:
+                    self._remember(key, entry)
+            if entry is None or entry[2] < depth:
+                self.misses += 1
+                return None
+        move = decode_move(entry[0])
+        if not board.is_legal(move, color):
+            return None  # Trùng khóa băm với thế cờ khác
+        with self.lock:
+            self.touched[key] = time.time()
+            self.hits += 1
+        return move, entry[1], entry[2]
+
+    def store(self, board, color, move, score, depth, config=()):
+        """Lưu kết quả tìm kiếm của cấu hình `config`; chỉ ghi đè mục đã có nếu kết quả mới sâu hơn hoặc bằng."""
+        key = _key(board, color, config)
+        code = encode_move(move)
+        now = time.time()
+        with self.lock:
+            old = self.memory.get(key)
+            if old is None or old[2] <= depth:
+                self._remember(key, (code, score, depth))
+            touched, self.touched = self.touched, {}
+            try:
+                with self.connection:
+                    self.connection.execute("BEGIN IMMEDIATE")
+                    self.connection.execute(
+                        "INSERT INTO positions (key, move, score, depth, last_used) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (key) DO UPDATE SET move = excluded.move, score = excluded.score, "
+                        "depth = excluded.depth, last_used = excluded.last_used WHERE excluded.depth >= depth",
+                        (key, code, score, depth, now))
+                    self.connection.executemany("UPDATE positions SET last_used = ? WHERE key = ?",
+                                                [(used, touched_key) for touched_key, used in touched.items()])
+                self.writes += 1
+                if self.writes % EVICT_CHECK_INTERVAL == 0:
+                    self._evict()
+            except sqlite3.OperationalError:
+                pass
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        if len(self.memory) > MEMORY_ENTRIES:
+            self.memory.popitem(last=False)
+
+    def _evict(self):
+        # Xóa các mục lâu không dùng nhất khi số mục vượt max_entries
+        count = self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        excess = count - self.max_entries + int(self.max_entries * EVICT_FRACTION)
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            self.connection.execute("DELETE FROM positions WHERE key IN "
+                                    "(SELECT key FROM positions ORDER BY last_used LIMIT ?)", (excess,))
+        self.memory.clear()  # Mục trong bộ nhớ có thể vừa bị xóa trên đĩa
+
+    def __len__(self):
+        with self.lock:
+            return self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def clear(self):
+        with self.lock:
+            self.connection.execute("DELETE FROM positions")
+            self.memory.clear()
+            self.touched = {}
+
+    def close(self):
+        with self.lock:
+            if self.touched:
+                try:
+                    with self.connection:
+                        self.connection.executemany("UPDATE positions SET last_used = ? WHERE key = ?",
+                                                    [(used, key) for key, used in self.touched.items()])
+                except sqlite3.OperationalError:
+                    pass
+                self.touched = {}
+            self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,155 @@
+"""Phân tích hàng loạt các thế cờ trong tệp EPD/FEN (mỗi dòng một thế cờ) bằng nhiều tiến trình.
+
+Chạy: python batch_analysis.py positions.epd results.jsonl [--depth N] [--time GIÂY] [--workers N] [--window N]
+                              [--cache analysis_cache.sqlite]
+
+Tệp đầu vào được đọc dần từng dòng và chỉ có tối đa `--window` thế cờ đang chờ kết quả, nên bộ nhớ không tăng theo
+kích thước tệp. Kết quả được ghi theo đúng thứ tự dòng đầu vào, mỗi thế cờ một dòng JSON:
+{"line", "fen", "id", "bestmove", "score", "mate", "depth", "nodes", "time"} (hoặc {"line", "fen", "error"}).
+Điểm theo quan điểm bên trắng như minimax.
+Chạy lại với cùng tệp kết quả thì tiếp tục sau dòng đã ghi cuối cùng.
+"""
+import argparse
+import json
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from analysis_cache import AnalysisCache
+from board import create_board
+from minimax import MAX_SEARCH_DEPTH, SearchContext, search
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+DEFAULT_DEPTH = 4
+EPD_ID = re.compile(r'\bid\s+"([^"]*)"')
+
+_worker_tt = None  # Bảng chuyển vị của từng tiến trình con, cấp phát một lần
+_worker_cache = None  # AnalysisCache của từng tiến trình con (mỗi tiến trình một kết nối), nếu có --cache
+
+
+def _init_worker(cache_path=None):
+    global _worker_tt, _worker_cache
+    _worker_tt = TranspositionTable()
+    _worker_cache = AnalysisCache(cache_path) if cache_path else None
+
+
+def uci_move(move):
+    (start_row, start_col), (end_row, end_col) = move
+    return f"{chr(start_col + ord('a'))}{8 - start_row}{chr(end_col + ord('a'))}{8 - end_row}"
+
+
+def parse_epd(line):
+    """Tách một dòng EPD hoặc FEN thành (FEN của thế cờ, id hoặc None).
+
+    EPD có 4 trường vị trí rồi tới các phép toán ("bm Nf3; id \\"WAC.001\\";"); FEN có thêm 2 trường đếm nước.
+    """
+    fields = line.split()
+    if len(fields) < 2:
+        raise ValueError(f"Thiếu trường: {line.strip()}")
+    match = EPD_ID.search(line)
+    return " ".join(fields[:2]), match.group(1) if match else None
+
+
+def analyse(line_number, text, depth, time_limit, backend):
+    """Chạy trong tiến trình con: phân tích một dòng của tệp đầu vào, trả về dict kết quả."""
+    try:
+        fen, position_id = parse_epd(text)
+        board = create_board(backend)
+        color = board.set_fen(fen)
+        # Mỗi thế cờ bắt đầu với bảng chuyển vị và điểm lịch sử rỗng để kết quả không phụ thuộc thứ tự xử lý
+        _worker_tt.clear()
+        context = SearchContext(_worker_tt, MoveOrderer(), cache=_worker_cache)
+        result = search(board, color, depth, time_limit, context=context)
+    except ValueError as error:
+        return {"line": line_number, "fen": text.strip(), "error": str(error)}
+    except Exception as error:
+        # Lỗi bất ngờ ở một thế cờ chỉ tạo bản ghi lỗi, không được dừng cả lượt chạy (và lượt chạy tiếp theo)
+        return {"line": line_number, "fen": text.strip(), "error": f"{type(error).__name__}: {error}"}
+    # Chiếu hết (điểm vô cực) không biểu diễn được trong JSON chuẩn: ghi "mate" = 1 (trắng thắng) hoặc -1
+    score, mate = result["score"], None
+    if score is not None and math.isinf(score):
+        score, mate = None, 1 if score > 0 else -1
+    return {"line": line_number, "fen": fen, "id": position_id,
+            "bestmove": uci_move(result["move"]) if result["move"] is not None else None,
+            "score": score, "mate": mate, "depth": result["depth"], "nodes": result["nodes"] + result["qnodes"],
+            "time": round(result["time"], 4)}
+
+
+def read_positions(path, skip_through=0):
+    # Sinh (số dòng, nội dung) của các dòng có thế cờ, bỏ dòng trống, dòng chú thích và các dòng <= skip_through
+    with open(path, encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            if line_number <= skip_through or not line.strip() or line.lstrip().startswith("#"):
+                continue
+            yield line_number, line
+
+
+def resume_point(path):
+    """Số dòng đầu vào cuối cùng đã có kết quả trong tệp `path`; dòng kết quả ghi dở ở cuối tệp bị cắt bỏ."""
+    if not os.path.exists(path):
+        return 0
+    last_line, valid_size = 0, 0
+    with open(path, "rb") as file:
+        for raw in file:
+            try:
+                last_line = json.loads(raw)["line"]
+            except (ValueError, KeyError):
+                break  # Dòng ghi dở khi bị dừng giữa chừng
+            valid_size += len(raw)
+            if not raw.endswith(b"\n"):
+                break
+    with open(path, "r+b") as file:
+        file.truncate(valid_size)
+    return last_line
+
+
+def run(input_path, output_path, depth=None, time_limit=None, workers=None, window=None, backend="mailbox",
+        cache_path=None):
+    """Phân tích mọi thế cờ của `input_path`, ghi thêm vào `output_path`; trả về số thế cờ đã phân tích.
+
+    Không truyền `depth` thì tìm tới DEFAULT_DEPTH, hoặc sâu dần không giới hạn nếu có `time_limit`.
+    Với `cache_path`, các tiến trình dùng chung bộ nhớ đệm phân tích trên đĩa (analysis_cache.AnalysisCache).
+    """
+    depth = depth or (MAX_SEARCH_DEPTH if time_limit is not None else DEFAULT_DEPTH)
+    workers = workers or os.cpu_count() or 1
+    window = window or workers * 4
+    skip_through = resume_point(output_path)
+    count = 0
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(cache_path,)) as executor, \
+            open(output_path, "a", encoding="utf-8") as output:
+        pending = deque()
+        for line_number, text in read_positions(input_path, skip_through):
+            pending.append(executor.submit(analyse, line_number, text, depth, time_limit, backend))
+            if len(pending) >= window:
+                # Chờ kết quả cũ nhất để ghi theo thứ tự và giới hạn số thế cờ đang xử lý
+                output.write(json.dumps(pending.popleft().result()) + "\n")
+                output.flush()
+                count += 1
+        while pending:
+            output.write(json.dumps(pending.popleft().result()) + "\n")
+            output.flush()
+            count += 1
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Phân tích hàng loạt các thế cờ trong tệp EPD/FEN")
+    parser.add_argument("input")
+    parser.add_argument("output")
+    parser.add_argument("--depth", type=int, help=f"độ sâu tối đa (mặc định {DEFAULT_DEPTH} nếu không có --time)")
+    parser.add_argument("--time", type=float, help="thời gian tối đa cho mỗi thế cờ (giây)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--window", type=int, help="số thế cờ tối đa đang chờ kết quả (mặc định 4 x workers)")
+    parser.add_argument("--backend", choices=("list", "mailbox", "bitboard"), default="mailbox")
+    parser.add_argument("--cache", help="tệp SQLite của bộ nhớ đệm phân tích dùng chung (analysis_cache.py)")
+    args = parser.parse_args()
+    count = run(args.input, args.output, args.depth, args.time, args.workers, args.window, args.backend,
+                args.cache)
+    print(f"Đã phân tích {count} thế cờ")
+
+
+if __name__ == "__main__":
+    main()
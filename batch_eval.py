@@ -0,0 +1,95 @@
+"""Đánh giá hàng loạt thế cờ bằng NumPy (cần cài numpy; engine chính không phụ thuộc numpy).
+
+Thế cờ được đóng gói thành mảng int8 kích thước (N, 64) chứa mã quân của từng ô (0 là ô trống, 1-12 theo PIECES),
+hoặc (N, 12, 64) dạng one-hot theo từng loại quân. Điểm bằng đúng minimax.evaluate_board: vật chất, điểm hàng tốt,
+tốt ở trung tâm và vua đều nằm trong bảng điểm theo ô của evaluation.py, nên điểm của một thế cờ là
+POSITIONAL_BASE cộng tổng bảng điểm theo (quân, ô) - tính bằng tra bảng và cộng theo trục trên cả lô.
+Mọi giá trị là bội của 0.5 nên phép cộng dấu phẩy động cho kết quả chính xác, không phụ thuộc thứ tự cộng.
+"""
+try:
+    import numpy as np
+except ImportError:  # numpy là phụ thuộc tùy chọn, chỉ cần cho module này
+    np = None
+
+from evaluation import PIECE_SQUARE_TABLES, PIECE_VALUES, POSITIONAL_BASE
+
+PIECES = "PNBRQKpnbrqk"  # Mã quân = vị trí trong chuỗi + 1
+CHUNK_SIZE = 65536  # Số thế cờ mỗi lần tra bảng, để mảng tạm (chunk, 64) float64 không quá lớn
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("batch_eval cần numpy: pip install numpy")
+
+
+def _square_scores():
+    # Bảng (13, 64): điểm vật chất + điểm vị trí của quân có mã `code` ở ô `square`; hàng 0 là ô trống
+    table = np.zeros((len(PIECES) + 1, 64), dtype=np.float64)
+    for code, piece in enumerate(PIECES, 1):
+        table[code] = [PIECE_VALUES[piece] + score for score in PIECE_SQUARE_TABLES[piece]]
+    return table
+
+
+def _byte_codes():
+    # Bảng 256 phần tử: byte ASCII của ký tự quân -> mã quân
+    codes = np.zeros(256, dtype=np.int8)
+    for code, piece in enumerate(PIECES, 1):
+        codes[ord(piece)] = code
+    return codes
+
+
+def pack_boards(boards):
+    """Đóng gói các thế cờ thành mảng int8 (N, 64).
+
+    Mỗi phần tử là một Board, 8 hàng quân (như Board.board) hoặc chuỗi 64 ký tự của Board.serialize().
+    """
+    _require_numpy()
+    states = []
+    for board in boards:
+        if isinstance(board, str):
+            states.append(board)
+        elif hasattr(board, "serialize"):
+            states.append(board.serialize())
+        else:
+            states.append("".join("".join(row) for row in board))
+    if any(len(state) != 64 for state in states):
+        raise ValueError("Mỗi thế cờ phải có đúng 64 ô")
+    raw = np.frombuffer("".join(states).encode("ascii"), dtype=np.uint8).reshape(len(states), 64)
+    return _byte_codes()[raw]
+
+
+def to_planes(codes):
+    """Chuyển mảng mã quân (N, 64) thành mảng one-hot int8 (N, 12, 64)."""
+    _require_numpy()
+    codes = np.asarray(codes)
+    return (codes[:, None, :] == np.arange(1, len(PIECES) + 1, dtype=codes.dtype)[None, :, None]).astype(np.int8)
+
+
+def evaluate_batch(codes):
+    """Điểm của từng thế cờ (mảng float64 độ dài N) từ mảng mã quân (N, 64); trùng với evaluate_board."""
+    _require_numpy()
+    codes = np.asarray(codes)
+    table = _square_scores()
+    squares = np.arange(64)
+    scores = np.empty(len(codes), dtype=np.float64)
+    for start in range(0, len(codes), CHUNK_SIZE):
+        chunk = codes[start:start + CHUNK_SIZE]
+        scores[start:start + CHUNK_SIZE] = table[chunk, squares].sum(axis=1) + POSITIONAL_BASE
+    return scores
+
+
+def evaluate_planes(planes):
+    """Như evaluate_batch nhưng nhận mảng one-hot (N, 12, 64)."""
+    _require_numpy()
+    planes = np.asarray(planes)
+    table = _square_scores()[1:]
+    scores = np.empty(len(planes), dtype=np.float64)
+    for start in range(0, len(planes), CHUNK_SIZE):
+        chunk = planes[start:start + CHUNK_SIZE]
+        scores[start:start + CHUNK_SIZE] = np.einsum("npk,pk->n", chunk, table) + POSITIONAL_BASE
+    return scores
+
+
+def evaluate_boards(boards):
+    """Đóng gói rồi đánh giá danh sách thế cờ (Board, 8 hàng quân hoặc chuỗi 64 ký tự)."""
+    return evaluate_batch(pack_boards(boards))
@@ -0,0 +1,463 @@
+"""Các phép đo hiệu năng cho bộ sinh nước đi và thuật toán tìm kiếm.
+
+Chạy: python benchmark.py [tên phép đo] [--depth N]
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+from board import Board, create_board
+from evaluation import PIECE_SQUARE_TABLES, PIECE_VALUES
+from minimax import SearchContext, evaluate_board, find_best_move, iterative_deepening_search, search
+from parallel import ParallelSearcher
+from perft import perft
+from search_stats import SearchStats
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+from utils import parse_placement
+from zobrist import PIECE_KEYS
+
+
+def _apply_move(board, start, end):
+    # Đi một nước và cập nhật trạng thái dần (băm, điểm, vị trí vua) giống Board.move, nhưng không ghi bản ghi hoàn tác;
+    # trả về (quân di chuyển, quân bị ăn)
+    start_row, start_col = start
+    end_row, end_col = end
+    piece = board.board[start_row][start_col]
+    captured = board.board[end_row][end_col]
+    board.board[end_row][end_col] = piece
+    board.board[start_row][start_col] = "."
+
+    end_index = end_row * 8 + end_col
+    start_index = start_row * 8 + start_col
+    board.hash ^= PIECE_KEYS[piece][start_index] ^ PIECE_KEYS[piece][end_index] ^ PIECE_KEYS[captured][end_index]
+    table = PIECE_SQUARE_TABLES[piece]
+    board.material -= PIECE_VALUES[captured]
+    board.positional += table[end_index] - table[start_index] - PIECE_SQUARE_TABLES[captured][end_index]
+    if piece == 'K' or piece == 'k':
+        board.king_squares[piece] = end
+    if captured == 'K' or captured == 'k':
+        board.king_squares[captured] = None
+    if captured != '.':
+        board.piece_count -= 1
+    board.ply += 1
+    return piece, captured
+
+
+class SnapshotBoard(Board):
+    """Bàn cờ dùng cách cũ: sao chép toàn bộ trạng thái trước mỗi nước đi, không có bản ghi hoàn tác (để so sánh).
+
+    Cập nhật trạng thái dần giống Board.move để tìm kiếm chạy như nhau; chỉ khác cách lưu lịch sử:
+    `snapshots` chứa bản sao của bàn cờ và trạng thái thay vì bản ghi hoàn tác.
+    """
+
+    def set_position(self, rows):
+        super().set_position(rows)
+        self.snapshots = []
+
+    def move(self, start, end):
+        self.snapshots.append(([row[:] for row in self.board], self.hash, self.material, self.positional,
+                               dict(self.king_squares), self.piece_count))
+        _apply_move(self, start, end)
+
+    def undo_move(self):
+        if self.snapshots:
+            (self.board, self.hash, self.material, self.positional, self.king_squares,
+             self.piece_count) = self.snapshots.pop()
+            self.ply -= 1
+
+
+class TupleHistoryBoard(Board):
+    """Bàn cờ dùng bản ghi hoàn tác kiểu cũ: mỗi nước đi thêm một tuple (ô đi, ô đến, quân, quân bị ăn) mới vào
+    danh sách `tuple_history`, thay vì ghi đè UndoRecord cấp sẵn (để so sánh)."""
+
+    def set_position(self, rows):
+        super().set_position(rows)
+        self.tuple_history = []
+
+    def move(self, start, end):
+        piece, captured = _apply_move(self, start, end)
+        self.tuple_history.append((start, end, piece, captured))
+
+    def undo_move(self):
+        if self.tuple_history:
+            (start_row, start_col), (end_row, end_col), piece, captured = self.tuple_history.pop()
+            self.board[start_row][start_col] = piece
+            self.board[end_row][end_col] = captured
+            start_index, end_index = start_row * 8 + start_col, end_row * 8 + end_col
+            self.hash ^= PIECE_KEYS[piece][start_index] ^ PIECE_KEYS[piece][end_index] ^ PIECE_KEYS[captured][end_index]
+            table = PIECE_SQUARE_TABLES[piece]
+            self.material += PIECE_VALUES[captured]
+            self.positional -= table[end_index] - table[start_index] - PIECE_SQUARE_TABLES[captured][end_index]
+            if piece == 'K' or piece == 'k':
+                self.king_squares[piece] = (start_row, start_col)
+            if captured == 'K' or captured == 'k':
+                self.king_squares[captured] = (end_row, end_col)
+            if captured != '.':
+                self.piece_count += 1
+            self.ply -= 1
+
+
+def _count_moves(board):
+    # Bọc hàm move của đối tượng để đếm số nút (số nước đi được thực hiện)
+    counter = [0]
+    original_move = board.move
+
+    def counting_move(start, end):
+        counter[0] += 1
+        original_move(start, end)
+
+    board.move = counting_move
+    return counter
+
+
+def measure_search(board, depth, color="white"):
+    """Đo thời gian, số nút và số nút/giây của một lần tìm kiếm."""
+    counter = _count_moves(board)
+    start_time = time.perf_counter()
+    find_best_move(board, depth, color)
+    elapsed = time.perf_counter() - start_time
+    return {"nodes": counter[0], "time": elapsed, "nps": counter[0] / elapsed if elapsed else 0.0}
+
+
+def measure_make_unmake(board, repeat=2000):
+    """Đo riêng chi phí thực hiện/hoàn tác tất cả nước đi của vị trí hiện tại.
+
+    Trả về số nước đi/giây, số khối bộ nhớ được cấp phát thêm và bộ nhớ đỉnh
+    khi giữ nguyên một chuỗi nước đi trong lịch sử.
+    """
+    moves = board.get_all_moves("white")
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for start, end in moves:
+            board.move(start, end)
+            board.undo_move()
+    elapsed = time.perf_counter() - start_time
+
+    # Bộ nhớ đỉnh khi lịch sử chứa `len(moves)` nước đi chưa hoàn tác (như khi tìm kiếm sâu)
+    gc.collect()
+    tracemalloc.start()
+    blocks_before = sys.getallocatedblocks()
+    for start, end in moves:
+        board.move(start, end)
+    blocks = sys.getallocatedblocks() - blocks_before
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    for _ in moves:
+        board.undo_move()
+
+    count = repeat * len(moves)
+    return {"mps": count / elapsed if elapsed else 0.0, "blocks_per_move": blocks / len(moves),
+            "bytes_per_move": peak / len(moves)}
+
+
+def bench_make_unmake(depth):
+    """So sánh cách sao chép toàn bộ bàn cờ, bản ghi hoàn tác dạng tuple mới và UndoRecord cấp sẵn."""
+    for name, board_class in (("snapshot", SnapshotBoard), ("undo-tuple", TupleHistoryBoard),
+                              ("undo-slots", Board)):
+        raw = measure_make_unmake(board_class())
+        search = measure_search(board_class(), depth)
+        print(f"{name:12} make/unmake={raw['mps']:9.0f}/s blocks/move={raw['blocks_per_move']:5.1f} "
+              f"bytes/move={raw['bytes_per_move']:6.0f} | depth {depth}: nodes={search['nodes']} "
+              f"time={search['time']:.3f}s nps={search['nps']:.0f}")
+
+
+def measure_memory(board, depth, color="white"):
+    """Tìm kiếm tới độ sâu `depth` (có tìm kiếm tĩnh và sắp xếp nước đi), đo số lần và tổng thời gian dọn rác (GC)
+    theo từng thế hệ, rồi tìm kiếm lại dưới tracemalloc để đo bộ nhớ đỉnh."""
+    pauses = {0: [0, 0.0], 1: [0, 0.0], 2: [0, 0.0]}
+    started = {}
+
+    def on_gc(phase, info):
+        if phase == "start":
+            started["time"] = time.perf_counter()
+        else:
+            pauses[info["generation"]][0] += 1
+            pauses[info["generation"]][1] += time.perf_counter() - started["time"]
+
+    state = board.serialize()
+    gc.collect()
+    gc.callbacks.append(on_gc)
+    try:
+        start_time = time.perf_counter()
+        find_best_move(board, depth, color, orderer=MoveOrderer())
+        elapsed = time.perf_counter() - start_time
+    finally:
+        gc.callbacks.remove(on_gc)
+
+    board.deserialize(state)
+    gc.collect()
+    tracemalloc.start()
+    find_best_move(board, depth, color, orderer=MoveOrderer())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"time": elapsed, "gc": pauses, "peak": peak}
+
+
+def bench_memory(depth):
+    """Số lần dọn rác, thời gian dừng vì dọn rác và bộ nhớ đỉnh khi tìm kiếm (nên chạy với --depth 5).
+
+    "undo-tuple" là Board với bản ghi hoàn tác dạng tuple kiểu cũ (TupleHistoryBoard), để so sánh trước/sau.
+    """
+    boards = (("undo-tuple", TupleHistoryBoard()),) + tuple((backend, create_board(backend))
+                                                             for backend in ("list", "mailbox", "bitboard"))
+    for name, board in boards:
+        result = measure_memory(board, depth)
+        collections = " ".join(f"gen{generation}={count}/{pause * 1000:.1f}ms"
+                               for generation, (count, pause) in result["gc"].items())
+        print(f"{name:10} depth {depth}: time={result['time']:.3f}s gc {collections} "
+              f"peak={result['peak'] / 1024:.0f}KiB")
+
+
+def bench_backends(depth):
+    """So sánh tốc độ perft và tìm kiếm giữa các cách biểu diễn bàn cờ."""
+    for backend in ("list", "mailbox", "bitboard"):
+        board = create_board(backend)
+        start_time = time.perf_counter()
+        nodes = perft(board, depth, "white")
+        perft_time = time.perf_counter() - start_time
+        search = measure_search(create_board(backend), depth)
+        print(f"{backend:8} perft({depth})={nodes} time={perft_time:.3f}s nps={nodes / perft_time:.0f} | "
+              f"search nodes={search['nodes']} time={search['time']:.3f}s nps={search['nps']:.0f}")
+
+
+def bench_transposition(depth):
+    """Đo tác dụng của bảng chuyển vị khi tìm kiếm sâu dần và qua hai lần tìm kiếm liên tiếp."""
+    for name, size_mb, replacement in (("none", None, None), ("depth", 16, "depth"), ("always", 16, "always"),
+                                       ("small", 0.05, "depth")):
+        board = create_board("mailbox")
+        counter = _count_moves(board)
+        tt = TranspositionTable(size_mb, replacement) if size_mb else None
+        start_time = time.perf_counter()
+        for _ in range(2):
+            if tt is None:
+                for current_depth in range(1, depth + 1):
+                    find_best_move(board, current_depth, "white")
+            else:
+                iterative_deepening_search(board, depth, "white", tt)
+        elapsed = time.perf_counter() - start_time
+        line = f"{name:7} nodes={counter[0]:8d} time={elapsed:.3f}s"
+        if tt is not None:
+            stats = tt.stats()
+            line += (f" hit_rate={stats['hit_rate']:.2%} stores={stats['stores']} "
+                     f"overwrite_rate={stats['overwrite_rate']:.2%} fill={stats['fill']:.2%}")
+        print(line)
+
+
+def bench_evaluation(depth):
+    """Đối chiếu Board.evaluate (cập nhật dần) với evaluate_board (duyệt toàn bàn) và so sánh tốc độ."""
+    board = create_board("mailbox")
+    rng = random.Random(depth)
+    positions = 0
+    for _ in range(200):
+        color = "white" if board.ply % 2 == 0 else "black"
+        moves = board.get_all_moves(color)
+        if not moves or rng.random() < 0.1:
+            board.reset_game()
+            continue
+        board.move(*rng.choice(moves))
+        if board.evaluate() != evaluate_board(board):
+            raise AssertionError(f"Sai khác điểm: {board.evaluate()} != {evaluate_board(board)}")
+        positions += 1
+    repeat = 20000
+    for name, function in (("evaluate_board", evaluate_board), ("Board.evaluate", Board.evaluate)):
+        start_time = time.perf_counter()
+        for _ in range(repeat):
+            function(board)
+        elapsed = time.perf_counter() - start_time
+        print(f"{name:15} {repeat / elapsed:10.0f} lần/giây")
+    print(f"{positions} thế cờ khớp điểm")
+
+
+def random_positions(count, seed=0):
+    """`count` thế cờ (chuỗi 64 ký tự) sinh bằng các ván đi ngẫu nhiên từ thế cờ ban đầu."""
+    board = create_board("mailbox")
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        color = "white" if board.ply % 2 == 0 else "black"
+        moves = board.get_all_moves(color)
+        if not moves or board.ply > 80:
+            board.reset_game()
+            continue
+        board.move(*rng.choice(moves))
+        states.append(board.serialize())
+    return states
+
+
+def bench_batch_evaluation(depth):
+    """Đánh giá hàng loạt bằng NumPy so với evaluate_board từng thế cờ: kiểm tra điểm trùng khớp và đo tốc độ."""
+    import batch_eval  # Cần numpy
+
+    states = random_positions(20000)
+    board = create_board("list")
+    start_time = time.perf_counter()
+    expected = []
+    for state in states:
+        board.deserialize(state)
+        expected.append(evaluate_board(board))
+    serial_time = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    codes = batch_eval.pack_boards(states)
+    pack_time = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    scores = batch_eval.evaluate_batch(codes)
+    batch_time = time.perf_counter() - start_time
+    planes = batch_eval.to_planes(codes)
+    start_time = time.perf_counter()
+    plane_scores = batch_eval.evaluate_planes(planes)
+    planes_time = time.perf_counter() - start_time
+    mismatches = sum(a != b or a != c for a, b, c in zip(expected, scores.tolist(), plane_scores.tolist()))
+    if mismatches:
+        raise AssertionError(f"{mismatches} thế cờ sai khác điểm")
+
+    per_million = 1_000_000 / len(states)
+    print(f"{'evaluate_board':25} {serial_time * per_million:8.2f}s / triệu thế cờ (gồm deserialize)")
+    print(f"{'pack_boards':25} {pack_time * per_million:8.2f}s / triệu thế cờ")
+    print(f"{'evaluate_batch (N,64)':25} {batch_time * per_million:8.2f}s / triệu thế cờ")
+    print(f"{'evaluate_planes (N,12,64)':25} {planes_time * per_million:8.2f}s / triệu thế cờ")
+    print(f"{len(states)} thế cờ khớp điểm")
+
+
+def bench_ordering(depth):
+    """So sánh số nút khi có/không có sắp xếp nước đi (không dùng bảng chuyển vị để thấy rõ tác dụng)."""
+    for name, orderer in (("board order", None), ("mvv-lva", MoveOrderer(use_killers=False, use_history=False)),
+                          ("full", MoveOrderer())):
+        board = create_board("mailbox")
+        counter = _count_moves(board)
+        start_time = time.perf_counter()
+        find_best_move(board, depth, "white", orderer=orderer)
+        elapsed = time.perf_counter() - start_time
+        line = f"{name:12} nodes={counter[0]:8d} time={elapsed:.3f}s"
+        if orderer is not None:
+            stats = orderer.stats()
+            line += (f" cutoffs={stats['cutoffs']} first_move_cutoff_rate={stats['first_move_cutoff_rate']:.1%}"
+                     f" quiet_stage_rate={stats['quiet_stage_rate']:.1%}")
+        print(line)
+
+
+def bench_quiescence(depth):
+    """Số nút tìm kiếm chính và tìm kiếm tĩnh, có/không có tìm kiếm tĩnh."""
+    for quiescence in (False, True):
+        board = create_board("mailbox")
+        context = SearchContext(orderer=MoveOrderer(), quiescence=quiescence)
+        start_time = time.perf_counter()
+        move = find_best_move(board, depth, "white", context=context)
+        elapsed = time.perf_counter() - start_time
+        print(f"quiescence={quiescence!s:5} move={move} nodes={context.nodes} qnodes={context.qnodes} "
+              f"time={elapsed:.3f}s")
+
+
+# Thế cờ chiến thuật (vị trí quân theo FEN, bên đi, nước đi đúng) để kiểm tra tìm kiếm chọn lọc không làm yếu engine
+TACTICAL_POSITIONS = [
+    ("back-rank mate", "6k1/5ppp/8/8/8/8/5PPP/R5K1", "white", ((7, 0), (0, 0))),
+    ("knight fork", "r3k3/8/8/3N4/8/8/8/4K3", "white", ((3, 3), (1, 2))),
+    ("black knight fork", "4k3/8/8/8/3n4/8/8/R3K3", "black", ((4, 3), (6, 2))),
+    ("hanging queen", "4k3/8/8/3q4/8/8/3R4/4K3", "white", ((6, 3), (3, 3))),
+    ("discovered attack", "4k3/4r3/8/8/8/8/4B3/4R1K1", "white", ((6, 4), (3, 7))),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1", "white", ((5, 2), (3, 3))),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R", "white", ((3, 3), (2, 4))),
+]
+
+
+def bench_selective(depth):
+    """Bộ thế cờ chiến thuật: so sánh số nút và nước đi tìm được khi có/không có tìm kiếm chọn lọc.
+
+    Trả về danh sách (chế độ, thế cờ, nước tìm được) của các thế cờ không tìm ra nước đúng; rỗng nếu giải hết.
+    Cần --depth 3 trở lên: ở độ sâu 2 chính tìm kiếm toàn bộ cũng chưa thấy nước đúng ở middlegame và kiwipete.
+    """
+    failures = []
+    settings = (("full-width", {}),
+                ("null-move", {"null_move": True}),
+                ("lmr", {"late_move_reductions": True}),
+                ("futility", {"futility": True}),
+                ("all", {"null_move": True, "late_move_reductions": True, "futility": True}))
+    for label, flags in settings:
+        solved = total_nodes = 0
+        start_time = time.perf_counter()
+        for name, placement, color, expected in TACTICAL_POSITIONS:
+            board = create_board("mailbox")
+            board.set_position(parse_placement(placement))
+            context = SearchContext(orderer=MoveOrderer(), **flags)
+            move = find_best_move(board, depth, color, context=context)
+            solved += move == expected
+            total_nodes += context.nodes + context.qnodes
+            if move != expected:
+                failures.append((label, name, move))
+                print(f"  {label}: {name} tìm được {move}, nước đúng là {expected}")
+        elapsed = time.perf_counter() - start_time
+        print(f"{label:10} solved={solved}/{len(TACTICAL_POSITIONS)} nodes={total_nodes:9d} time={elapsed:.3f}s")
+    print("OK" if not failures else f"Sai: {failures}")
+    return failures
+
+
+def bench_stats(depth):
+    """In số liệu tìm kiếm sau mỗi lần lặp và so sánh thời gian khi bật/tắt SearchStats."""
+    timings = {}
+    for enabled in (False, True):
+        board = create_board("mailbox")
+        stats = SearchStats(callback=lambda _: print(stats.log_line())) if enabled else None
+        context = SearchContext(TranspositionTable(), MoveOrderer(), stats=stats)
+        start_time = time.perf_counter()
+        search(board, "white", max_depth=depth, context=context)
+        timings[enabled] = time.perf_counter() - start_time
+    print(f"stats off={timings[False]:.3f}s on={timings[True]:.3f}s overhead={timings[True] / timings[False] - 1:.1%}")
+
+
+def bench_parallel(depth):
+    """So sánh tìm kiếm song song ở gốc (1..N tiến trình) với tìm kiếm tuần tự có bảng chuyển vị và MoveOrderer.
+
+    Tốc độ được so với tìm kiếm tuần tự thông thường (bảng chuyển vị + MoveOrderer); nước đi song song không có bảng
+    chuyển vị được đối chiếu với find_best_move(orderer=MoveOrderer()), tìm kiếm mà nó phải cho kết quả trùng khớp.
+    Chỉ có thể nhanh hơn khi máy có nhiều nhân CPU thật.
+    """
+    board = create_board("mailbox")
+    reference_move = find_best_move(board, depth, "white", orderer=MoveOrderer())
+    start_time = time.perf_counter()
+    serial_move = find_best_move(board, depth, "white", tt=TranspositionTable(), orderer=MoveOrderer())
+    serial_time = time.perf_counter() - start_time
+    print(f"serial tt+ord  move={serial_move} time={serial_time:.3f}s (cpu={os.cpu_count()})")
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        with ParallelSearcher(workers, tt=False) as searcher:
+            move = searcher.find_best_move(board, depth, "white")
+        with ParallelSearcher(workers) as searcher:
+            searcher.find_best_move(board, 1, "white")  # Khởi động các tiến trình con trước khi đo
+            start_time = time.perf_counter()
+            searcher.find_best_move(board, depth, "white")
+            elapsed = time.perf_counter() - start_time
+        print(f"workers={workers:<3}    move={move} time={elapsed:.3f}s speedup={serial_time / elapsed:.2f}x"
+              f"{'' if move == reference_move else ' (khác tìm kiếm tuần tự!)'}")
+
+
+BENCHMARKS = {
+    "make-unmake": bench_make_unmake,
+    "backends": bench_backends,
+    "memory": bench_memory,
+    "transposition": bench_transposition,
+    "evaluation": bench_evaluation,
+    "batch-evaluation": bench_batch_evaluation,
+    "ordering": bench_ordering,
+    "quiescence": bench_quiescence,
+    "parallel": bench_parallel,
+    "selective": bench_selective,
+    "stats": bench_stats,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đo hiệu năng engine cờ vua")
+    parser.add_argument("name", nargs="?", choices=sorted(BENCHMARKS), default="make-unmake")
+    parser.add_argument("--depth", type=int, default=3)
+    args = parser.parse_args()
+    # Phép đo có kiểm tra (selective) trả về danh sách lỗi; có lỗi thì thoát với mã khác 0
+    if BENCHMARKS[args.name](args.depth):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
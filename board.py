@@ -1,7 +1,38 @@
+from evaluation import PIECE_SQUARE_TABLES, PIECE_VALUES, material_score, positional_score
+from moves import MOVES_FROM, SQUARES, UNDO_STACK_SIZE, UndoRecord
+from utils import parse_placement
+from zobrist import PIECE_KEYS, compute_hash
+
+
+def _targets(row, col, offsets):
+    return tuple(SQUARES[(row + d_row) * 8 + col + d_col] for d_row, d_col in offsets
+                 if 0 <= row + d_row < 8 and 0 <= col + d_col < 8)
+
+
+def _rays(row, col, directions):
+    rays = []
+    for d_row, d_col in directions:
+        ray = tuple(SQUARES[(row + d_row * i) * 8 + col + d_col * i] for i in range(1, 8)
+                    if 0 <= row + d_row * i < 8 and 0 <= col + d_col * i < 8)
+        if ray:
+            rays.append(ray)
+    return tuple(rays)
+
+
+# Các ô đích/tia dựng sẵn cho từng ô (chỉ số row * 8 + col), dùng khi kiểm tra ô bị tấn công
+KNIGHT_TARGETS = [_targets(i // 8, i % 8, [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+                  for i in range(64)]
+KING_TARGETS = [_targets(i // 8, i % 8, [(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)])
+                for i in range(64)]
+ROOK_RAYS = [_rays(i // 8, i % 8, [(1, 0), (-1, 0), (0, 1), (0, -1)]) for i in range(64)]
+BISHOP_RAYS = [_rays(i // 8, i % 8, [(1, 1), (1, -1), (-1, 1), (-1, -1)]) for i in range(64)]
+
+
 class Board:
     def __init__(self):
         self.board = self.create_initial_board()  # Khởi tạo bàn cờ với trạng thái ban đầu
         self.move_log = []  # Lưu trữ lịch sử các nước đi
+        self.undo_stack = [UndoRecord() for _ in range(UNDO_STACK_SIZE)]  # Bản ghi hoàn tác cấp sẵn, một bản mỗi ply
         self.reset_game()
 
     def create_initial_board(self):
@@ -18,18 +49,64 @@ class Board:
         ]
 
     def move(self, start, end):
-        # Lưu trạng thái bàn cờ trước khi thực hiện nước đi
-        self.history.append([row[:] for row in self.board])
-
+        # Không sao chép bàn cờ và không cấp phát: ghi (mã nước đi, quân di chuyển, quân bị ăn hoặc '.') vào bản ghi
+        # hoàn tác cấp sẵn của ply hiện tại. Luật hiện tại chưa có nhập thành, bắt tốt qua đường hay phong cấp;
+        # khi thêm các luật đó, trạng thái tương ứng sẽ được thêm vào UndoRecord.
         start_row, start_col = start
         end_row, end_col = end
-        self.board[end_row][end_col] = self.board[start_row][start_col]
+        piece = self.board[start_row][start_col]
+        captured = self.board[end_row][end_col]
+        end_index = end_row * 8 + end_col
+        start_index = start_row * 8 + start_col
+        ply = self.ply
+        if ply == len(self.undo_stack):
+            self.undo_stack.append(UndoRecord())
+        record = self.undo_stack[ply]
+        record.move = start_index << 6 | end_index
+        record.piece = piece
+        record.captured = captured
+        self.ply = ply + 1
+
+        self.board[end_row][end_col] = piece
         self.board[start_row][start_col] = "."
 
+        # Cập nhật giá trị băm Zobrist theo các ô thay đổi
+        self.hash ^= PIECE_KEYS[piece][start_index] ^ PIECE_KEYS[piece][end_index] ^ PIECE_KEYS[captured][end_index]
+
+        # Cập nhật điểm đánh giá và vị trí vua
+        table = PIECE_SQUARE_TABLES[piece]
+        self.material -= PIECE_VALUES[captured]
+        self.positional += table[end_index] - table[start_index] - PIECE_SQUARE_TABLES[captured][end_index]
+        if piece == 'K' or piece == 'k':
+            self.king_squares[piece] = SQUARES[end_index]
+        if captured == 'K' or captured == 'k':
+            self.king_squares[captured] = None
+        if captured != '.':
+            self.piece_count -= 1
+
     def undo_move(self):
-        if self.history:
-            self.board = self.history.pop()
+        # Khôi phục chính xác bàn cờ từ bản ghi hoàn tác của ply trước
+        if self.ply:
+            self.ply -= 1
+            record = self.undo_stack[self.ply]
+            code, piece, captured = record.move, record.piece, record.captured
+            start_index, end_index = code >> 6, code & 63
+            start_row, start_col = SQUARES[start_index]
+            end_row, end_col = SQUARES[end_index]
+            self.board[start_row][start_col] = piece
+            self.board[end_row][end_col] = captured
+
+            self.hash ^= PIECE_KEYS[piece][start_index] ^ PIECE_KEYS[piece][end_index] ^ PIECE_KEYS[captured][end_index]
 
+            table = PIECE_SQUARE_TABLES[piece]
+            self.material += PIECE_VALUES[captured]
+            self.positional -= table[end_index] - table[start_index] - PIECE_SQUARE_TABLES[captured][end_index]
+            if piece == 'K' or piece == 'k':
+                self.king_squares[piece] = SQUARES[start_index]
+            if captured == 'K' or captured == 'k':
+                self.king_squares[captured] = SQUARES[end_index]
+            if captured != '.':
+                self.piece_count += 1
 
     def get_piece_moves(self, piece, row, col):
         # Trả về tất cả các nước đi hợp lệ của một quân cờ tại vị trí `row, col`
@@ -49,21 +126,22 @@ class Board:
         direction = -1 if piece.isupper() else 1  # Hướng di chuyển của quân tốt (lên hay xuống)
         start_row = 6 if piece.isupper() else 1  # Dòng xuất phát của quân tốt
         moves = []
+        from_moves = MOVES_FROM[row * 8 + col]  # Nước đi dựng sẵn, không tạo tuple mới
 
         # Di chuyển 1 ô về phía trước
         if 0 <= row + direction < 8 and self.board[row + direction][col] == '.':
-            moves.append(((row, col), (row + direction, col)))
+            moves.append(from_moves[(row + direction) * 8 + col])
 
         # Di chuyển 2 ô nếu quân tốt chưa di chuyển
         if row == start_row and self.board[row + 2 * direction][col] == '.' and self.board[row + direction][col] == '.':
-            moves.append(((row, col), (row + 2 * direction, col)))
+            moves.append(from_moves[(row + 2 * direction) * 8 + col])
 
         # Ăn chéo quân địch
         for col_offset in [-1, 1]:
             if 0 <= col + col_offset < 8 and 0 <= row + direction < 8:
                 target = self.board[row + direction][col + col_offset]
                 if target != '.' and self._is_enemy(piece, target):
-                    moves.append(((row, col), (row + direction, col + col_offset)))
+                    moves.append(from_moves[(row + direction) * 8 + col + col_offset])
         return moves
 
     def rook_moves(self, piece, row, col):
@@ -91,15 +169,16 @@ class Board:
     def sliding_moves(self, piece, row, col, directions):
         # Hàm xử lý các quân cờ có thể di chuyển theo hướng liên tục (xe, tượng, hậu)
         moves = []
+        from_moves = MOVES_FROM[row * 8 + col]
         for d_row, d_col in directions:
             for i in range(1, 8):  # Lặp qua các ô trong cùng một hướng
                 new_row, new_col = row + d_row * i, col + d_col * i
                 if 0 <= new_row < 8 and 0 <= new_col < 8:
                     target = self.board[new_row][new_col]
                     if target == '.':
-                        moves.append(((row, col), (new_row, new_col)))
+                        moves.append(from_moves[new_row * 8 + new_col])
                     elif self._is_enemy(piece, target):
-                        moves.append(((row, col), (new_row, new_col)))
+                        moves.append(from_moves[new_row * 8 + new_col])
                         break  # Dừng nếu gặp quân địch
                     else:
                         break  # Dừng nếu gặp quân đồng minh
@@ -108,12 +187,13 @@ class Board:
     def jumping_moves(self, piece, row, col, directions):
         # Hàm xử lý các quân cờ có thể nhảy (mã, vua)
         moves = []
+        from_moves = MOVES_FROM[row * 8 + col]
         for d_row, d_col in directions:
             new_row, new_col = row + d_row, col + d_col
             if 0 <= new_row < 8 and 0 <= new_col < 8:
                 target = self.board[new_row][new_col]
                 if target == '.' or self._is_enemy(piece, target):
-                    moves.append(((row, col), (new_row, new_col)))
+                    moves.append(from_moves[new_row * 8 + new_col])
         return moves
 
     def _is_enemy(self, piece, target):
@@ -134,36 +214,70 @@ class Board:
 
     def king_position_in_check(self, king_position, piece, row, col, opponent_color):
         # Kiểm tra xem quân vua có bị đe dọa bởi quân `piece` hay không
-        return king_position in [move[1] for move in self.get_piece_moves(piece, row, col)]
+        return any(end == king_position for _, end in self.get_piece_moves(piece, row, col))
 
     def find_king(self, color):
-        # Tìm vị trí quân vua của màu `color` (trắng hoặc đen)
+        # Trả về vị trí quân vua của màu `color` (trắng hoặc đen) từ bộ nhớ đệm, None nếu không còn vua
+        return self.king_squares['K' if color == 'white' else 'k']
+
+    def _scan_king(self, king):
+        # Tìm vị trí quân vua `king` ('K' hoặc 'k') bằng cách duyệt toàn bộ bàn cờ
         for row in range(8):
             for col in range(8):
-                piece = self.board[row][col]
-                if (color == "white" and piece == 'K') or (color == "black" and piece == 'k'):
+                if self.board[row][col] == king:
                     return (row, col)
         return None
 
+    def evaluate(self):
+        # Điểm đánh giá được cập nhật dần, bằng minimax.evaluate_board nhưng chỉ tốn O(1)
+        return self.material + self.positional
+
     def is_checkmate(self, color):
         # Kiểm tra xem có phải tình huống chiếu hết không
-        return self.is_in_check(color) and not any(
-            self._try_move(start, end, color) for start, end in self.get_all_moves(color)
-        )
+        return self.is_in_check(color) and not self.get_legal_moves(color)
 
     def is_stalemate(self, color):
         # Kiểm tra xem có phải tình huống hòa không
-        return not self.is_in_check(color) and not self.get_all_moves(color)
+        return not self.is_in_check(color) and not self.get_legal_moves(color)
+
+    def is_square_attacked(self, square, by_color):
+        # Kiểm tra ô `square` có bị quân màu `by_color` tấn công không, nhìn từ ô đó ra ngoài:
+        # tốt theo đường chéo, mã, vua, rồi các tia dừng ở quân chắn đầu tiên
+        row, col = square
+        board = self.board
+        if by_color == 'white':
+            pawn, knight, bishop, rook, queen, king = 'P', 'N', 'B', 'R', 'Q', 'K'
+            pawn_row = row + 1
+        else:
+            pawn, knight, bishop, rook, queen, king = 'p', 'n', 'b', 'r', 'q', 'k'
+            pawn_row = row - 1
+        if 0 <= pawn_row < 8 and ((col > 0 and board[pawn_row][col - 1] == pawn) or
+                                  (col < 7 and board[pawn_row][col + 1] == pawn)):
+            return True
+        index = row * 8 + col
+        for target_row, target_col in KNIGHT_TARGETS[index]:
+            if board[target_row][target_col] == knight:
+                return True
+        for target_row, target_col in KING_TARGETS[index]:
+            if board[target_row][target_col] == king:
+                return True
+        for rays, slider in ((ROOK_RAYS[index], rook), (BISHOP_RAYS[index], bishop)):
+            for ray in rays:
+                for target_row, target_col in ray:
+                    target = board[target_row][target_col]
+                    if target != '.':
+                        if target == slider or target == queen:
+                            return True
+                        break
+        return False
 
     def is_in_check(self, color):
-        # Kiểm tra xem quân vua của màu `color` có bị chiếu không
+        # Kiểm tra xem quân vua của màu `color` có bị chiếu không (dùng vị trí vua đã lưu)
         king_position = self.find_king(color)
-        opponent_color = 'black' if color == 'white' else 'white'
-        return any(
-            self.king_position_in_check(king_position, piece, row, col, opponent_color)
-            for row in range(8) for col in range(8)
-            if (piece := self.board[row][col]) != '.' and self._is_piece_color(piece, opponent_color)
-        )
+        if king_position is None:
+            return False
+        return self.is_square_attacked(king_position, 'black' if color == 'white' else 'white')
+
     def get_all_moves(self, color):
         # Trả về tất cả nước đi hợp lệ cho quân màu `color` (trắng hoặc đen)
         return [
@@ -174,15 +288,334 @@ class Board:
             for move in self.get_piece_moves(piece, row, col)
         ]
 
+    def get_legal_moves(self, color):
+        # Trả về các nước đi hợp lệ (không để vua mình bị chiếu), giữ nguyên thứ tự của get_all_moves.
+        return self._legal_filter(color)(self.get_all_moves(color))
+
+    def _legal_filter(self, color):
+        # Trả về hàm lọc giữ lại các nước đi hợp lệ trong một danh sách nước đi giả hợp lệ.
+        # Quân bị ghim và quân đang chiếu được tính một lần cho thế cờ, không cần thử từng nước đi.
+        king = self.find_king(color)
+        if king is None:
+            return list
+        checkers, check_mask, pins = self._checks_and_pins(king, color)
+        enemy = 'black' if color == 'white' else 'white'
+        king_row, king_col = king
+
+        def legal_moves(moves):
+            legal = []
+            # Nhấc vua ra khỏi bàn để các tia của quân địch đi xuyên qua ô vua đang đứng.
+            # Gọi thẳng Board.is_square_attacked vì self.board luôn được cập nhật ở mọi cách biểu diễn.
+            king_piece = self.board[king_row][king_col]
+            self.board[king_row][king_col] = '.'
+            for move in moves:
+                start, end = move
+                if start == king:
+                    if not Board.is_square_attacked(self, end, enemy):
+                        legal.append(move)
+                elif checkers > 1:
+                    continue  # Bị chiếu đôi: chỉ vua được đi
+                elif check_mask is not None and end not in check_mask:
+                    continue  # Bị chiếu: phải ăn quân chiếu hoặc chặn đường chiếu
+                elif start in pins and end not in pins[start]:
+                    continue  # Quân bị ghim chỉ được đi trên đường ghim
+                else:
+                    legal.append(move)
+            self.board[king_row][king_col] = king_piece
+            return legal
+
+        return legal_moves
+
+    def get_legal_captures(self, color):
+        # Trả về các nước ăn quân hợp lệ (dùng cho tìm kiếm tĩnh)
+        return self._legal_filter(color)(self.get_captures(color))
+
+    def static_exchange(self, move):
+        """Đánh giá trao đổi tĩnh (SEE): lợi vật chất của bên đi nước ăn quân `move` khi hai bên
+        lần lượt ăn lại trên ô đích bằng quân rẻ nhất (có tính cả quân đứng sau theo tia)."""
+        (start_row, start_col), (end_row, end_col) = move
+        board = self.board
+        piece = board[start_row][start_col]
+        gains = [abs(PIECE_VALUES[board[end_row][end_col]])]
+        removed = [(start_row, start_col, piece)]
+        board[start_row][start_col] = '.'
+        occupant = piece  # Quân đang đứng trên ô đích sau mỗi lần ăn
+        side = 'black' if piece.isupper() else 'white'
+        while True:
+            attacker = self._least_valuable_attacker((end_row, end_col), side)
+            if attacker is None:
+                break
+            attacker_row, attacker_col = attacker
+            gains.append(abs(PIECE_VALUES[occupant]) - gains[-1])
+            occupant = board[attacker_row][attacker_col]
+            removed.append((attacker_row, attacker_col, occupant))
+            board[attacker_row][attacker_col] = '.'
+            side = 'black' if side == 'white' else 'white'
+        for row, col, removed_piece in removed:
+            board[row][col] = removed_piece
+        # Mỗi bên có thể dừng ăn lại nếu việc ăn tiếp làm mình thiệt
+        for i in range(len(gains) - 1, 0, -1):
+            gains[i - 1] = -max(-gains[i - 1], gains[i])
+        return gains[0]
+
+    def _least_valuable_attacker(self, square, by_color):
+        # Trả về vị trí quân rẻ nhất của màu `by_color` đang tấn công ô `square`, None nếu không có
+        row, col = square
+        board = self.board
+        if by_color == 'white':
+            pawn, knight, bishop, rook, queen, king = 'P', 'N', 'B', 'R', 'Q', 'K'
+            pawn_row = row + 1
+        else:
+            pawn, knight, bishop, rook, queen, king = 'p', 'n', 'b', 'r', 'q', 'k'
+            pawn_row = row - 1
+        if 0 <= pawn_row < 8:
+            for pawn_col in (col - 1, col + 1):
+                if 0 <= pawn_col < 8 and board[pawn_row][pawn_col] == pawn:
+                    return (pawn_row, pawn_col)
+        index = row * 8 + col
+        for target in KNIGHT_TARGETS[index]:
+            if board[target[0]][target[1]] == knight:
+                return target
+        sliders = {}
+        for rays, slider in ((BISHOP_RAYS[index], bishop), (ROOK_RAYS[index], rook)):
+            for ray in rays:
+                for target in ray:
+                    target_piece = board[target[0]][target[1]]
+                    if target_piece != '.':
+                        if target_piece == slider or target_piece == queen:
+                            sliders.setdefault(target_piece, target)
+                        break
+        for slider in (bishop, rook, queen):
+            if slider in sliders:
+                return sliders[slider]
+        for target in KING_TARGETS[index]:
+            if board[target[0]][target[1]] == king:
+                return target
+        return None
+
+    def get_captures(self, color):
+        # Trả về các nước ăn quân giả hợp lệ của màu `color` (không sinh nước đi yên lặng)
+        board = self.board
+        own_upper = color == 'white'
+        captures = []
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece == '.' or piece.isupper() != own_upper:
+                    continue
+                kind = piece.lower()
+                index = row * 8 + col
+                from_moves = MOVES_FROM[index]
+                if kind == 'p':
+                    target_row = row - 1 if own_upper else row + 1
+                    if 0 <= target_row < 8:
+                        for target_col in (col - 1, col + 1):
+                            if 0 <= target_col < 8:
+                                target = board[target_row][target_col]
+                                if target != '.' and target.isupper() != own_upper:
+                                    captures.append(from_moves[target_row * 8 + target_col])
+                elif kind == 'n' or kind == 'k':
+                    for target_row, target_col in (KNIGHT_TARGETS if kind == 'n' else KING_TARGETS)[index]:
+                        target = board[target_row][target_col]
+                        if target != '.' and target.isupper() != own_upper:
+                            captures.append(from_moves[target_row * 8 + target_col])
+                else:
+                    rays = ROOK_RAYS[index] if kind == 'r' else BISHOP_RAYS[index] if kind == 'b' else \
+                        ROOK_RAYS[index] + BISHOP_RAYS[index]
+                    for ray in rays:
+                        for target_row, target_col in ray:
+                            target = board[target_row][target_col]
+                            if target != '.':
+                                if target.isupper() != own_upper:
+                                    captures.append(from_moves[target_row * 8 + target_col])
+                                break
+        return captures
+
+    def get_quiet_moves(self, color):
+        # Trả về các nước đi giả hợp lệ không ăn quân, sinh trực tiếp theo từng loại quân (không qua get_all_moves)
+        board = self.board
+        own_upper = color == 'white'
+        quiets = []
+        for row in range(8):
+            for col in range(8):
+                piece = board[row][col]
+                if piece == '.' or piece.isupper() != own_upper:
+                    continue
+                kind = piece.lower()
+                index = row * 8 + col
+                from_moves = MOVES_FROM[index]
+                if kind == 'p':
+                    target_row = row - 1 if own_upper else row + 1
+                    if 0 <= target_row < 8 and board[target_row][col] == '.':
+                        quiets.append(from_moves[target_row * 8 + col])
+                        double_row = row - 2 if own_upper else row + 2
+                        if row == (6 if own_upper else 1) and board[double_row][col] == '.':
+                            quiets.append(from_moves[double_row * 8 + col])
+                elif kind == 'n' or kind == 'k':
+                    for target_row, target_col in (KNIGHT_TARGETS if kind == 'n' else KING_TARGETS)[index]:
+                        if board[target_row][target_col] == '.':
+                            quiets.append(from_moves[target_row * 8 + target_col])
+                else:
+                    rays = ROOK_RAYS[index] if kind == 'r' else BISHOP_RAYS[index] if kind == 'b' else \
+                        ROOK_RAYS[index] + BISHOP_RAYS[index]
+                    for ray in rays:
+                        for target_row, target_col in ray:
+                            if board[target_row][target_col] != '.':
+                                break
+                            quiets.append(from_moves[target_row * 8 + target_col])
+        return quiets
+
+    def is_pseudo_legal(self, move, color):
+        # Kiểm tra một nước đi (ví dụ nước đi lấy từ bảng chuyển vị hay killer) có đi được ở thế cờ hiện tại không
+        (start_row, start_col), _ = move
+        piece = self.board[start_row][start_col]
+        if piece == '.' or not self._is_piece_color(piece, color):
+            return False
+        return move in self.get_piece_moves(piece, start_row, start_col)
+
+    def is_legal(self, move, color):
+        # Kiểm tra một nước đi lấy từ nguồn ngoài (bộ nhớ đệm, sách khai cuộc) có hợp lệ ở thế cờ hiện tại không
+        return self.is_pseudo_legal(move, color) and bool(self._legal_filter(color)([move]))
+
+    def staged_moves(self, color, hash_move=None, killers=(), order_captures=None, order_quiets=None):
+        """Sinh nước đi hợp lệ theo từng giai đoạn: nước đi bảng băm, ăn quân, killer, rồi nước đi yên lặng.
+
+        Giai đoạn sau chỉ được tính khi bên tìm kiếm cần thêm nước đi, nên nút bị cắt tỉa sớm
+        không phải sinh nước đi yên lặng. `order_captures`/`order_quiets` nhận danh sách và trả về danh sách đã sắp xếp.
+        """
+        legal = self._legal_filter(color)
+        board = self.board
+        if hash_move is not None and self.is_pseudo_legal(hash_move, color) and legal([hash_move]):
+            yield hash_move
+
+        captures = legal(self.get_captures(color))
+        if order_captures is not None:
+            captures = order_captures(captures)
+        for move in captures:
+            if move != hash_move:
+                yield move
+
+        tried = [hash_move]
+        for killer in killers:
+            if killer is None or killer in tried:
+                continue
+            tried.append(killer)
+            end_row, end_col = killer[1]
+            if board[end_row][end_col] == '.' and self.is_pseudo_legal(killer, color) and legal([killer]):
+                yield killer
+
+        quiets = legal(self.get_quiet_moves(color))
+        if order_quiets is not None:
+            quiets = order_quiets(quiets)
+        for move in quiets:
+            if move not in tried:
+                yield move
+
+    def _checks_and_pins(self, king, color):
+        # Trả về (số quân đang chiếu, các ô chặn/ăn được quân chiếu hoặc None, {ô quân bị ghim: đường ghim})
+        row, col = king
+        index = row * 8 + col
+        board = self.board
+        own_upper = color == 'white'
+        if own_upper:
+            pawn, knight, bishop, rook, queen, enemy_king = 'p', 'n', 'b', 'r', 'q', 'k'
+            pawn_row = row - 1
+        else:
+            pawn, knight, bishop, rook, queen, enemy_king = 'P', 'N', 'B', 'R', 'Q', 'K'
+            pawn_row = row + 1
+        checkers, check_mask, pins = 0, None, {}
+
+        for rays, slider in ((ROOK_RAYS[index], rook), (BISHOP_RAYS[index], bishop)):
+            for ray in rays:
+                pinned = None
+                for i, (target_row, target_col) in enumerate(ray):
+                    target = board[target_row][target_col]
+                    if target == '.':
+                        continue
+                    if target.isupper() == own_upper:
+                        if pinned is not None:
+                            break  # Hai quân mình chắn liên tiếp: không có ghim
+                        pinned = (target_row, target_col)
+                        continue
+                    if target == slider or target == queen:
+                        if pinned is None:
+                            checkers += 1
+                            check_mask = ray[:i + 1]
+                        else:
+                            pins[pinned] = ray[:i + 1]
+                    break
+
+        attackers = [(target_row, target_col) for target_row, target_col in KNIGHT_TARGETS[index]
+                     if board[target_row][target_col] == knight]
+        attackers += [(target_row, target_col) for target_row, target_col in KING_TARGETS[index]
+                      if board[target_row][target_col] == enemy_king]
+        if 0 <= pawn_row < 8:
+            attackers += [(pawn_row, pawn_col) for pawn_col in (col - 1, col + 1)
+                          if 0 <= pawn_col < 8 and board[pawn_row][pawn_col] == pawn]
+        for attacker in attackers:
+            checkers += 1
+            check_mask = (attacker,)
+        return checkers, check_mask, pins
+
+    def set_position(self, rows):
+        # Đặt bàn cờ về một thế cờ bất kỳ (8 hàng, mỗi hàng 8 ký tự) và xóa lịch sử
+        self.board = [list(row) for row in rows]
+        self.ply = 0  # Số nửa nước đã đi từ thế cờ này (số bản ghi đang dùng trong undo_stack)
+        self.hash = compute_hash(self.board)  # Giá trị băm Zobrist, cập nhật dần trong move/undo_move
+        # Trạng thái đánh giá cập nhật dần: vật chất, điểm vị trí và vị trí hai vua
+        self.material = material_score(self.board)
+        self.positional = positional_score(self.board)
+        self.king_squares = {'K': self._scan_king('K'), 'k': self._scan_king('k')}
+        # Số quân trên bàn cờ, để biết khi nào có thể tra bảng tàn cuộc
+        self.piece_count = sum(piece != '.' for row in self.board for piece in row)
+
+    def serialize(self):
+        # Chuỗi 64 ký tự mô tả vị trí quân theo từng hàng, dùng để gửi thế cờ sang tiến trình khác
+        return ''.join(''.join(row) for row in self.board)
+
+    def deserialize(self, state):
+        # Khôi phục vị trí quân từ chuỗi do `serialize` tạo ra (lịch sử được xóa)
+        self.set_position([state[i:i + 8] for i in range(0, 64, 8)])
+
+    def set_fen(self, fen):
+        """Đặt thế cờ theo chuỗi FEN; trả về bên đi ('white' hoặc 'black').
+
+        Luật của engine không có nhập thành, bắt tốt qua đường và đếm nước, nên các trường đó được bỏ qua.
+        """
+        fields = fen.split()
+        if not fields or (len(fields) > 1 and fields[1] not in ("w", "b")):
+            raise ValueError(f"FEN không hợp lệ: {fen}")
+        self.set_position(parse_placement(fields[0]))
+        return 'black' if len(fields) > 1 and fields[1] == "b" else 'white'
+
+    def to_fen(self, color='white'):
+        # Chuỗi FEN của thế cờ với bên đi `color` (không có quyền nhập thành và ô bắt tốt qua đường)
+        rows = []
+        for row in self.board:
+            text, empty = "", 0
+            for piece in row:
+                if piece == '.':
+                    empty += 1
+                    continue
+                if empty:
+                    text += str(empty)
+                    empty = 0
+                text += piece
+            rows.append(text + (str(empty) if empty else ""))
+        return f"{'/'.join(rows)} {'w' if color == 'white' else 'b'} - - 0 1"
+
     def reset_game(self):
-        self.board = [
-            ["r", "n", "b", "q", "k", "b", "n", "r"],
-            ["p", "p", "p", "p", "p", "p", "p", "p"],
-            [".", ".", ".", ".", ".", ".", ".", "."],
-            [".", ".", ".", ".", ".", ".", ".", "."],
-            [".", ".", ".", ".", ".", ".", ".", "."],
-            [".", ".", ".", ".", ".", ".", ".", "."],
-            ["P", "P", "P", "P", "P", "P", "P", "P"],
-            ["R", "N", "B", "Q", "K", "B", "N", "R"]
-        ]
-        self.history = []  # Xóa lịch sử khi reset
+        self.set_position(self.create_initial_board())  # Xóa lịch sử khi reset
+
+
+def create_board(backend="list"):
+    """Tạo bàn cờ với cách biểu diễn `backend` ('list', 'mailbox' hoặc 'bitboard')."""
+    if backend == "list":
+        return Board()
+    if backend == "mailbox":
+        from board_mailbox import MailboxBoard
+        return MailboxBoard()
+    if backend == "bitboard":
+        from board_bitboard import BitboardBoard
+        return BitboardBoard()
+    raise ValueError(f"Không có kiểu bàn cờ '{backend}'")
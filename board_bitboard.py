@@ -0,0 +1,209 @@
+from board import Board
+from moves import MOVES_FROM, SQUARES
+
+# Ô (row, col) có chỉ số row * 8 + col; bit thứ i của một bitboard ứng với ô i.
+FULL = (1 << 64) - 1
+FILE_A = sum(1 << (row * 8) for row in range(8))
+FILE_H = FILE_A << 7
+ROW_MASKS = [0xFF << (row * 8) for row in range(8)]
+
+COORDS = SQUARES
+MOVES = MOVES_FROM  # Bảng nước đi dựng sẵn (dùng chung với các cách biểu diễn khác)
+
+
+def _jump_table(offsets):
+    table = []
+    for square in range(64):
+        row, col = COORDS[square]
+        attacks = 0
+        for d_row, d_col in offsets:
+            if 0 <= row + d_row < 8 and 0 <= col + d_col < 8:
+                attacks |= 1 << ((row + d_row) * 8 + col + d_col)
+        table.append(attacks)
+    return table
+
+
+def _ray_table(d_row, d_col):
+    table = []
+    for square in range(64):
+        row, col = COORDS[square]
+        ray = 0
+        row, col = row + d_row, col + d_col
+        while 0 <= row < 8 and 0 <= col < 8:
+            ray |= 1 << (row * 8 + col)
+            row, col = row + d_row, col + d_col
+        table.append(ray)
+    return table
+
+
+# Bảng tấn công dựng một lần khi import
+KNIGHT_ATTACKS = _jump_table([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+KING_ATTACKS = _jump_table([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)])
+PAWN_ATTACKS = {
+    'white': _jump_table([(-1, -1), (-1, 1)]),
+    'black': _jump_table([(1, -1), (1, 1)]),
+}
+
+# Tia theo từng hướng; hướng "dương" đi về phía chỉ số tăng nên quân chắn đầu tiên là bit thấp nhất
+POSITIVE_ROOK_RAYS = [_ray_table(1, 0), _ray_table(0, 1)]
+NEGATIVE_ROOK_RAYS = [_ray_table(-1, 0), _ray_table(0, -1)]
+POSITIVE_BISHOP_RAYS = [_ray_table(1, 1), _ray_table(1, -1)]
+NEGATIVE_BISHOP_RAYS = [_ray_table(-1, 1), _ray_table(-1, -1)]
+
+
+def _sliding_attacks(square, occupied, positive_rays, negative_rays):
+    # Tấn công theo tia cổ điển: cắt tia tại quân chắn đầu tiên
+    attacks = 0
+    for rays in positive_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[(blockers & -blockers).bit_length() - 1]
+        attacks |= ray
+    for rays in negative_rays:
+        ray = rays[square]
+        blockers = ray & occupied
+        if blockers:
+            ray ^= rays[blockers.bit_length() - 1]
+        attacks |= ray
+    return attacks
+
+
+def rook_attacks(square, occupied):
+    return _sliding_attacks(square, occupied, POSITIVE_ROOK_RAYS, NEGATIVE_ROOK_RAYS)
+
+
+def bishop_attacks(square, occupied):
+    return _sliding_attacks(square, occupied, POSITIVE_BISHOP_RAYS, NEGATIVE_BISHOP_RAYS)
+
+
+def _squares(bitboard):
+    # Duyệt các ô có bit bật, từ chỉ số nhỏ đến lớn
+    while bitboard:
+        low = bitboard & -bitboard
+        yield low.bit_length() - 1
+        bitboard ^= low
+
+
+class BitboardBoard(Board):
+    """Bàn cờ dùng một số nguyên 64 bit cho mỗi loại quân và màu.
+
+    `self.board` (8x8) vẫn được cập nhật song song cho phần đánh giá và giao diện.
+    Thứ tự nước đi khác Board nhưng tập nước đi giống hệt (kiểm tra bằng perft).
+    """
+
+    def set_position(self, rows):
+        super().set_position(rows)
+        self.bitboards = dict.fromkeys("PNBRQKpnbrqk", 0)
+        self.occupied = {'white': 0, 'black': 0}
+        for square, (row, col) in enumerate(COORDS):
+            piece = self.board[row][col]
+            if piece != '.':
+                self.bitboards[piece] |= 1 << square
+                self.occupied['white' if piece.isupper() else 'black'] |= 1 << square
+
+    def _toggle(self, record):
+        # Bật/tắt các bit của nước đi trong bản ghi hoàn tác `record`; gọi lại lần nữa sẽ hoàn tác nước đi đó
+        piece, captured = record.piece, record.captured
+        start_bit = 1 << (record.move >> 6)
+        end_bit = 1 << (record.move & 63)
+        self.bitboards[piece] ^= start_bit | end_bit
+        self.occupied['white' if piece.isupper() else 'black'] ^= start_bit | end_bit
+        if captured != '.':
+            self.bitboards[captured] ^= end_bit
+            self.occupied['white' if captured.isupper() else 'black'] ^= end_bit
+
+    def move(self, start, end):
+        super().move(start, end)
+        self._toggle(self.undo_stack[self.ply - 1])
+
+    def undo_move(self):
+        if self.ply:
+            self._toggle(self.undo_stack[self.ply - 1])
+            super().undo_move()
+
+    def get_all_moves(self, color):
+        # Trả về tất cả nước đi giả hợp lệ của màu `color`
+        return self._generate(color, captures=True, quiets=True)
+
+    def get_captures(self, color):
+        # Trả về các nước ăn quân giả hợp lệ của màu `color`
+        return self._generate(color, captures=True, quiets=False)
+
+    def get_quiet_moves(self, color):
+        # Trả về các nước đi giả hợp lệ không ăn quân của màu `color`
+        return self._generate(color, captures=False, quiets=True)
+
+    def _generate(self, color, captures, quiets):
+        bitboards = self.bitboards
+        if color == 'white':
+            own, enemy = self.occupied['white'], self.occupied['black']
+            pawns, knights, bishops, rooks, queens, king = (bitboards[p] for p in "PNBRQK")
+        else:
+            own, enemy = self.occupied['black'], self.occupied['white']
+            pawns, knights, bishops, rooks, queens, king = (bitboards[p] for p in "pnbrqk")
+        occupied = own | enemy
+        empty = ~occupied & FULL
+        targets = (enemy if captures else 0) | (empty if quiets else 0)
+        moves = []
+        append = moves.append
+
+        # Tốt: đẩy và ăn hàng loạt bằng phép dịch bit
+        if color == 'white':
+            single = (pawns >> 8) & empty
+            double = ((single & ROW_MASKS[5]) >> 8) & empty
+            pawn_targets = ((single, 8), (double, 16),
+                            ((pawns >> 9) & ~FILE_H & enemy, 9), ((pawns >> 7) & ~FILE_A & enemy, 7))
+        else:
+            single = (pawns << 8) & empty
+            double = ((single & ROW_MASKS[2]) << 8) & empty
+            pawn_targets = ((single, -8), (double, -16),
+                            ((pawns << 7) & ~FILE_H & enemy & FULL, -7), ((pawns << 9) & ~FILE_A & enemy & FULL, -9))
+        if not quiets:
+            pawn_targets = pawn_targets[2:]
+        elif not captures:
+            pawn_targets = pawn_targets[:2]
+        for destinations, shift in pawn_targets:
+            for end in _squares(destinations):
+                append(MOVES[end + shift][end])
+
+        for start in _squares(knights):
+            for end in _squares(KNIGHT_ATTACKS[start] & targets):
+                append(MOVES[start][end])
+        for start in _squares(bishops | queens):
+            for end in _squares(bishop_attacks(start, occupied) & targets):
+                append(MOVES[start][end])
+        for start in _squares(rooks | queens):
+            for end in _squares(rook_attacks(start, occupied) & targets):
+                append(MOVES[start][end])
+        for start in _squares(king):
+            for end in _squares(KING_ATTACKS[start] & targets):
+                append(MOVES[start][end])
+        return moves
+
+    def is_square_attacked(self, square, by_color):
+        return self._is_attacked(square[0] * 8 + square[1], by_color)
+
+    def _is_attacked(self, square, by):
+        # Kiểm tra ô có chỉ số `square` có bị quân màu `by` tấn công không
+        bitboards = self.bitboards
+        occupied = self.occupied['white'] | self.occupied['black']
+        if by == 'white':
+            pawns, knights, bishops, rooks, queens, king = (bitboards[p] for p in "PNBRQK")
+            defender = 'black'
+        else:
+            pawns, knights, bishops, rooks, queens, king = (bitboards[p] for p in "pnbrqk")
+            defender = 'white'
+        return bool(
+            (PAWN_ATTACKS[defender][square] & pawns)
+            or (KNIGHT_ATTACKS[square] & knights)
+            or (KING_ATTACKS[square] & king)
+            or (bishop_attacks(square, occupied) & (bishops | queens))
+            or (rook_attacks(square, occupied) & (rooks | queens))
+        )
+
+    def is_in_check(self, color):
+        king = self.bitboards['K' if color == 'white' else 'k']
+        if not king:
+            return False
+        return self._is_attacked(king.bit_length() - 1, 'black' if color == 'white' else 'white')
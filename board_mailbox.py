@@ -0,0 +1,156 @@
+from board import Board
+from moves import MOVES_FROM, SQUARES
+
+# Mã số nguyên của quân cờ: 3 bit thấp là loại quân, bit 8/16 là màu.
+EMPTY = 0
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = 1, 2, 3, 4, 5, 6
+WHITE, BLACK = 8, 16
+OFFBOARD = 32  # Ô đệm ngoài bàn cờ: không phải ô trống và không mang bit màu nào
+
+PIECE_CODES = {
+    '.': EMPTY,
+    'P': WHITE | PAWN, 'N': WHITE | KNIGHT, 'B': WHITE | BISHOP,
+    'R': WHITE | ROOK, 'Q': WHITE | QUEEN, 'K': WHITE | KING,
+    'p': BLACK | PAWN, 'n': BLACK | KNIGHT, 'b': BLACK | BISHOP,
+    'r': BLACK | ROOK, 'q': BLACK | QUEEN, 'k': BLACK | KING,
+}
+
+# Bàn cờ 10x12: 2 hàng đệm trên/dưới, 1 cột đệm trái/phải, ô (row, col) có chỉ số (row + 2) * 10 + col + 1.
+BOARD_INDICES = [(row + 2) * 10 + col + 1 for row in range(8) for col in range(8)]
+COORDS = [None] * 120
+for _index in BOARD_INDICES:
+    COORDS[_index] = SQUARES[(_index // 10 - 2) * 8 + _index % 10 - 1]
+# MAILBOX_MOVES[chỉ số ô đi][chỉ số ô đến]: nước đi dựng sẵn của moves.MOVES_FROM, đánh chỉ số theo bàn 10x12
+_SQUARE_OF = {index: square for square, index in enumerate(BOARD_INDICES)}
+MAILBOX_MOVES = [[MOVES_FROM[_SQUARE_OF[start]][_SQUARE_OF[end]] if end in _SQUARE_OF else None for end in range(120)]
+                 if start in _SQUARE_OF else None for start in range(120)]
+
+# Hướng đi được giữ cùng thứ tự với Board để hai cách biểu diễn sinh ra cùng một danh sách nước đi
+ROOK_OFFSETS = (10, -10, 1, -1)
+BISHOP_OFFSETS = (11, 9, -9, -11)
+KNIGHT_OFFSETS = (21, 19, -19, -21, 12, 8, -8, -12)
+KING_OFFSETS = (10, -10, 1, -1, 11, 9, -9, -11)
+SLIDING_OFFSETS = {BISHOP: BISHOP_OFFSETS, ROOK: ROOK_OFFSETS, QUEEN: ROOK_OFFSETS + BISHOP_OFFSETS}
+JUMPING_OFFSETS = {KNIGHT: KNIGHT_OFFSETS, KING: KING_OFFSETS}
+
+
+def _index(position):
+    row, col = position
+    return (row + 2) * 10 + col + 1
+
+
+class MailboxBoard(Board):
+    """Bàn cờ dùng mảng phẳng 10x12 với chỉ số ô và mã quân là số nguyên.
+
+    `self.board` (8x8) vẫn được cập nhật song song để phần đánh giá và giao diện
+    dùng chung; sinh nước đi và kiểm tra chiếu chỉ đọc `self.squares`.
+    """
+
+    def set_position(self, rows):
+        super().set_position(rows)
+        self.squares = [OFFBOARD] * 120
+        for index in BOARD_INDICES:
+            row, col = COORDS[index]
+            self.squares[index] = PIECE_CODES[self.board[row][col]]
+
+    def move(self, start, end):
+        super().move(start, end)
+        start_index, end_index = _index(start), _index(end)
+        self.squares[end_index] = self.squares[start_index]
+        self.squares[start_index] = EMPTY
+
+    def undo_move(self):
+        if self.ply:
+            record = self.undo_stack[self.ply - 1]
+            code, piece, captured = record.move, record.piece, record.captured
+            super().undo_move()
+            self.squares[BOARD_INDICES[code >> 6]] = PIECE_CODES[piece]
+            self.squares[BOARD_INDICES[code & 63]] = PIECE_CODES[captured]
+
+    def get_all_moves(self, color):
+        # Trả về tất cả nước đi giả hợp lệ (cùng thứ tự với Board.get_all_moves)
+        return self._generate(color, captures=True, quiets=True)
+
+    def get_captures(self, color):
+        # Trả về các nước ăn quân giả hợp lệ
+        return self._generate(color, captures=True, quiets=False)
+
+    def get_quiet_moves(self, color):
+        # Trả về các nước đi giả hợp lệ không ăn quân
+        return self._generate(color, captures=False, quiets=True)
+
+    def _generate(self, color, captures, quiets):
+        own, enemy = (WHITE, BLACK) if color == 'white' else (BLACK, WHITE)
+        squares = self.squares
+        moves = []
+        for index in BOARD_INDICES:
+            piece = squares[index]
+            if not piece & own:
+                continue
+            kind = piece & 7
+            start = COORDS[index]
+            from_moves = MAILBOX_MOVES[index]
+            if kind == PAWN:
+                self._pawn_moves(index, start, own, enemy, moves, captures, quiets)
+            elif kind in SLIDING_OFFSETS:
+                for offset in SLIDING_OFFSETS[kind]:
+                    target_index = index + offset
+                    target = squares[target_index]
+                    while target == EMPTY:
+                        if quiets:
+                            moves.append(from_moves[target_index])
+                        target_index += offset
+                        target = squares[target_index]
+                    if captures and target & enemy:
+                        moves.append(from_moves[target_index])
+            else:
+                for offset in JUMPING_OFFSETS[kind]:
+                    target = squares[index + offset]
+                    if (captures and target & enemy) or (quiets and target == EMPTY):
+                        moves.append(from_moves[index + offset])
+        return moves
+
+    def _pawn_moves(self, index, start, own, enemy, moves, captures=True, quiets=True):
+        squares = self.squares
+        direction = -10 if own == WHITE else 10
+        start_row = 6 if own == WHITE else 1
+        forward = index + direction
+        from_moves = MAILBOX_MOVES[index]
+        if quiets and squares[forward] == EMPTY:
+            moves.append(from_moves[forward])
+            if start[0] == start_row and squares[forward + direction] == EMPTY:
+                moves.append(from_moves[forward + direction])
+        if captures:
+            for target_index in (forward - 1, forward + 1):
+                if squares[target_index] & enemy:
+                    moves.append(from_moves[target_index])
+
+    def is_square_attacked(self, square, by_color):
+        return self._is_attacked(_index(square), WHITE if by_color == 'white' else BLACK)
+
+    def _is_attacked(self, index, by):
+        # Kiểm tra ô `index` có bị quân màu `by` (WHITE/BLACK) tấn công không, nhìn từ ô đó ra ngoài
+        squares = self.squares
+        pawn_sources = (index + 9, index + 11) if by == WHITE else (index - 9, index - 11)
+        if any(squares[source] == by | PAWN for source in pawn_sources):
+            return True
+        if any(squares[index + offset] == by | KNIGHT for offset in KNIGHT_OFFSETS):
+            return True
+        if any(squares[index + offset] == by | KING for offset in KING_OFFSETS):
+            return True
+        for offsets, slider in ((ROOK_OFFSETS, by | ROOK), (BISHOP_OFFSETS, by | BISHOP)):
+            for offset in offsets:
+                target_index = index + offset
+                target = squares[target_index]
+                while target == EMPTY:
+                    target_index += offset
+                    target = squares[target_index]
+                if target == slider or target == by | QUEEN:
+                    return True
+        return False
+
+    def is_in_check(self, color):
+        king_position = self.find_king(color)
+        if king_position is None:
+            return False
+        return self._is_attacked(_index(king_position), BLACK if color == 'white' else WHITE)
@@ -0,0 +1,199 @@
+"""Sách khai cuộc nhị phân, đọc qua mmap và tra bằng tìm kiếm nhị phân.
+
+Mỗi mục 16 byte theo bố cục của Polyglot (big-endian): khóa 8 byte, nước đi 2 byte, trọng số 2 byte, 4 byte dự phòng.
+Khóa là zobrist.position_key của engine (không phải khóa Polyglot chuẩn), nên sách phải được tạo bằng công cụ này:
+
+    python book.py build openings.txt book.bin [--max-ply N]
+    python book.py probe book.bin
+
+Tệp nguồn là PGN (đuôi .pgn, nước đi dạng SAN) hoặc danh sách nước đi: mỗi dòng một ván, nước đi dạng "e2e4".
+"""
+import argparse
+import mmap
+import os
+import random
+import re
+import struct
+from collections import Counter
+
+from board import Board
+from zobrist import position_key
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+MAX_WEIGHT = 0xFFFF
+DEFAULT_MAX_PLY = 20
+
+RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+COORDINATE_MOVE = re.compile(r"^[a-h][1-8][a-h][1-8]$")
+
+
+def encode_move(move):
+    # Như Polyglot: cột đích ở bit 0-2, hàng đích ở bit 3-5, cột đi ở bit 6-8, hàng đi ở bit 9-11 (hàng 0 là hàng 1)
+    (start_row, start_col), (end_row, end_col) = move
+    return end_col | (7 - end_row) << 3 | start_col << 6 | (7 - start_row) << 9
+
+
+def decode_move(code):
+    return (7 - (code >> 9 & 7), code >> 6 & 7), (7 - (code >> 3 & 7), code & 7)
+
+
+class OpeningBook:
+    """Sách khai cuộc chỉ đọc, ánh xạ tệp vào bộ nhớ (mmap) nên mở tức thì và các tiến trình dùng chung trang nhớ."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as file:
+            # mmap không ánh xạ được tệp rỗng
+            empty = os.fstat(file.fileno()).st_size == 0
+            self.data = b"" if empty else mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size = len(self.data) // ENTRY.size
+
+    def _lower_bound(self, key):
+        # Chỉ số mục đầu tiên có khóa >= key (các mục được sắp xếp theo khóa)
+        low, high = 0, self.size
+        while low < high:
+            middle = (low + high) // 2
+            if KEY.unpack_from(self.data, middle * ENTRY.size)[0] < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def probe(self, board, color):
+        """Trả về danh sách (nước đi, trọng số) của thế cờ; bỏ các nước đi không hợp lệ (trùng khóa băm)."""
+        key = position_key(board, color)
+        entries = []
+        index = self._lower_bound(key)
+        while index < self.size:
+            entry_key, code, weight, _ = ENTRY.unpack_from(self.data, index * ENTRY.size)
+            if entry_key != key:
+                break
+            entries.append((decode_move(code), weight))
+            index += 1
+        if not entries:
+            return []
+        legal = set(board.get_legal_moves(color))
+        return [(move, weight) for move, weight in entries if move in legal]
+
+    def choose(self, board, color, rng=random):
+        """Chọn ngẫu nhiên một nước đi trong sách theo trọng số; None nếu thế cờ không có trong sách."""
+        entries = [(move, weight) for move, weight in self.probe(board, color) if weight > 0]
+        if not entries:
+            return None
+        moves, weights = zip(*entries)
+        return rng.choices(moves, weights)[0]
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_book_move(board, color, token):
+    """Chuyển một nước đi dạng "e2e4" hoặc SAN ("Nf3", "exd5", "R1a3+") thành ((hàng, cột), (hàng, cột)).
+
+    Trả về None nếu nước đi không hợp lệ hoặc cần luật engine chưa hỗ trợ (nhập thành, phong cấp).
+    """
+    legal = board.get_legal_moves(color)
+    if COORDINATE_MOVE.match(token):
+        move = ((8 - int(token[1]), ord(token[0]) - ord('a')), (8 - int(token[3]), ord(token[2]) - ord('a')))
+        return move if move in legal else None
+    san = token.rstrip("+#!?")
+    if san.startswith("O-O") or "=" in san or len(san) < 2:
+        return None
+    piece = san[0] if san[0] in "NBRQK" else "P"
+    body = (san[1:] if piece != "P" else san).replace("x", "")
+    destination, hint = body[-2:], body[:-2]
+    if not re.match(r"^[a-h][1-8]$", destination):
+        return None
+    end = (8 - int(destination[1]), ord(destination[0]) - ord('a'))
+    letter = piece if color == 'white' else piece.lower()
+    candidates = []
+    for start, move_end in legal:
+        if move_end != end or board.board[start[0]][start[1]] != letter:
+            continue
+        if any((char.isdigit() and start[0] != 8 - int(char)) or (char.isalpha() and start[1] != ord(char) - ord('a'))
+               for char in hint):
+            continue
+        candidates.append((start, move_end))
+    return candidates[0] if len(candidates) == 1 else None
+
+
+def read_games(path):
+    """Đọc các ván từ tệp PGN (đuôi .pgn) hoặc danh sách nước đi (mỗi dòng một ván); trả về danh sách token nước đi."""
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    if not path.lower().endswith(".pgn"):
+        return [line.split() for line in text.splitlines() if line.strip() and not line.lstrip().startswith("#")]
+    text = re.sub(r"^\[.*\]\s*$", "", text, flags=re.MULTILINE)  # Phần đầu ván
+    text = re.sub(r"\{[^}]*\}|;[^\n]*", " ", text)  # Chú thích
+    while re.search(r"\([^()]*\)", text):
+        text = re.sub(r"\([^()]*\)", " ", text)  # Biến phụ (có thể lồng nhau)
+    games, current = [], []
+    for token in text.split():
+        token = re.sub(r"^\d+\.+", "", token)  # Số thứ tự nước đi ("1." hoặc "12...")
+        if not token or token.startswith("$"):
+            continue
+        if token in RESULTS:
+            games.append(current)
+            current = []
+        else:
+            current.append(token)
+    if current:
+        games.append(current)
+    return games
+
+
+def build_book(games, path, max_ply=DEFAULT_MAX_PLY):
+    """Tạo tệp sách từ các ván (danh sách token nước đi), chỉ lấy `max_ply` nửa nước đầu; trả về số mục đã ghi.
+
+    Trọng số là số lần nước đi xuất hiện ở thế cờ đó. Ván bị dừng ở nước đi không đọc được.
+    """
+    counts = Counter()
+    board = Board()
+    for tokens in games:
+        board.reset_game()
+        color = 'white'
+        for token in tokens[:max_ply]:
+            move = parse_book_move(board, color, token)
+            if move is None:
+                break
+            counts[(position_key(board, color), encode_move(move))] += 1
+            board.move(*move)
+            color = 'black' if color == 'white' else 'white'
+    # Sắp xếp theo khóa, cùng khóa thì nước đi nhiều trọng số trước
+    entries = sorted(counts.items(), key=lambda item: (item[0][0], -item[1]))
+    with open(path, "wb") as file:
+        for (key, code), count in entries:
+            file.write(ENTRY.pack(key, code, min(count, MAX_WEIGHT), 0))
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo và tra sách khai cuộc")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="tạo sách từ tệp PGN hoặc danh sách nước đi")
+    build.add_argument("source")
+    build.add_argument("output")
+    build.add_argument("--max-ply", type=int, default=DEFAULT_MAX_PLY)
+    probe = subparsers.add_parser("probe", help="in các nước đi trong sách ở thế cờ ban đầu")
+    probe.add_argument("book")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_book(read_games(args.source), args.output, args.max_ply)
+        print(f"Đã ghi {count} mục vào {args.output}")
+    else:
+        with OpeningBook(args.book) as book:
+            for move, weight in book.probe(Board(), 'white'):
+                print(move, weight)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Chạy tìm kiếm của AI trên một luồng riêng để vòng lặp sự kiện của giao diện không bị treo."""
+import threading
+import time
+
+from minimax import MAX_SEARCH_DEPTH, SearchContext, search
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+
+class Engine:
+    """Tìm nước đi trên luồng nền với bản sao bàn cờ riêng, có thể hủy giữa chừng và suy nghĩ trước.
+
+    Kết quả (dict của minimax.search) được trả về qua `on_result(search_id, result)`, được gọi từ luồng nền;
+    giao diện nên chuyển nó thành sự kiện của mình (ví dụ pygame.event.post). Mỗi lần tìm kiếm có một
+    `search_id` mới, nên kết quả của lần tìm kiếm đã bị hủy không bao giờ được gửi đi.
+
+    Suy nghĩ trước (ponder): trong lúc chờ đối thủ, engine tìm kiếm thế cờ sau nước đi mà nó đoán đối thủ sẽ đi
+    (nước thứ hai của biến chính). Nếu đối thủ đi đúng nước đó, lần tìm kiếm đang chạy chỉ cần thêm phần thời gian
+    còn thiếu; nếu không, nó bị hủy và một lần tìm kiếm mới được bắt đầu.
+    """
+
+    def __init__(self, on_result, time_limit, max_depth=MAX_SEARCH_DEPTH, **search_options):
+        self.on_result = on_result
+        self.time_limit = time_limit
+        self.max_depth = max_depth
+        self.search_options = search_options  # Các cờ tìm kiếm chọn lọc truyền cho SearchContext
+        self.tt = TranspositionTable()  # Chỉ luồng tìm kiếm dùng; mỗi lúc chỉ có một lần tìm kiếm
+        self.orderer = MoveOrderer()
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stop = None
+        self.timer = None
+        self.search_id = 0
+        self.pondering = False
+        self.ponder_move = None  # Nước đi của đối thủ mà engine đang suy nghĩ trước
+        self.ponder_result = None
+        self.started_at = None
+
+    def is_thinking(self):
+        # Đang tìm nước đi cho AI (không tính lúc suy nghĩ trước)
+        with self.lock:
+            return self.thread is not None and self.thread.is_alive() and not self.pondering
+
+    def start(self, board, color):
+        """Hủy lần tìm kiếm cũ (nếu có) và bắt đầu tìm nước đi cho `color`; trả về search_id."""
+        self.cancel()
+        return self._launch(board, color, self.time_limit)
+
+    def ponder(self, board, color, predicted_move):
+        """Suy nghĩ trước: tìm nước đi cho `color` trong thế cờ sau nước đi dự đoán của đối thủ.
+
+        `board` là thế cờ hiện tại (đến lượt đối thủ); bàn cờ của giao diện không bị thay đổi.
+        """
+        self.cancel()
+        with self.lock:
+            self.pondering = True
+            self.ponder_move = predicted_move
+            self.ponder_result = None
+        return self._launch(board, color, None, predicted_move)
+
+    def opponent_moved(self, board, move, color):
+        """Báo nước đi của đối thủ; dùng tiếp lần suy nghĩ trước nếu đoán đúng, nếu không thì tìm kiếm lại."""
+        with self.lock:
+            hit = self.pondering and move == self.ponder_move and self.thread is not None
+            result = None
+            if hit:
+                self.pondering = False
+                result = self.ponder_result
+                if result is None:
+                    # Tìm kiếm tiếp cho đủ thời gian quy định, tính từ lúc bắt đầu suy nghĩ trước
+                    remaining = max(0.0, self.time_limit - (time.perf_counter() - self.started_at))
+                    self.timer = threading.Timer(remaining, self.stop.set)
+                    self.timer.daemon = True
+                    self.timer.start()
+            search_id = self.search_id
+        if not hit:
+            return self.start(board, color)
+        if result is not None:
+            self.on_result(search_id, result)  # Lần suy nghĩ trước đã xong từ trước
+        return search_id
+
+    def cancel(self):
+        """Dừng lần tìm kiếm hiện tại (kể cả suy nghĩ trước); kết quả của nó bị bỏ qua."""
+        with self.lock:
+            self.search_id += 1
+            self.pondering = False
+            self.ponder_move = self.ponder_result = None
+            thread, stop, timer = self.thread, self.stop, self.timer
+            self.thread = self.stop = self.timer = None
+        if timer is not None:
+            timer.cancel()
+        if stop is not None:
+            stop.set()
+        if thread is not None:
+            thread.join()
+
+    def _launch(self, board, color, time_limit, first_move=None):
+        # Sao chép bàn cờ để luồng nền không dùng chung trạng thái với giao diện
+        copy = type(board)()
+        copy.deserialize(board.serialize())
+        if first_move is not None:
+            copy.move(*first_move)
+        with self.lock:
+            self.search_id += 1
+            search_id = self.search_id
+            self.stop = threading.Event()
+            self.started_at = time.perf_counter()
+            self.thread = threading.Thread(target=self._run, args=(copy, color, time_limit, self.stop, search_id),
+                                           daemon=True)
+            self.thread.start()
+        return search_id
+
+    def _run(self, board, color, time_limit, stop, search_id):
+        context = SearchContext(self.tt, self.orderer, stop=stop, **self.search_options)
+        result = search(board, color, self.max_depth, time_limit, context=context)
+        with self.lock:
+            if search_id != self.search_id:
+                return  # Đã bị hủy
+            if self.pondering:
+                self.ponder_result = result  # Giữ lại cho tới khi đối thủ đi đúng nước dự đoán
+                return
+        self.on_result(search_id, result)
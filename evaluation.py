@@ -0,0 +1,49 @@
+"""Bảng đánh giá dùng cho việc cập nhật điểm dần trong Board.move/undo_move.
+
+Điểm = vật chất + vị trí, cho kết quả trùng khớp với minimax.evaluate_board:
+- Tốt trắng ở hàng 6 và 4: +1 (evaluate_board cộng 0.5 cho ô có 'P' và trừ 0.5 cho mọi ô khác
+  của hai hàng này, tức là +1 cho mỗi 'P' và hằng số -8)
+- Tốt đen ở hàng 1 và 3: -0.5
+- Tốt ở 4 ô trung tâm: +0.5 / -0.5
+- Mỗi vua còn trên bàn: +0.5 / -0.5
+"""
+
+PIECE_VALUES = {'p': -1, 'r': -5, 'n': -3, 'b': -3, 'q': -9, 'k': -100,
+                'P': 1, 'R': 5, 'N': 3, 'B': 3, 'Q': 9, 'K': 100, '.': 0}
+
+# Hằng số của các hàng tốt trắng: -0.5 cho mỗi ô của hàng 6 và hàng 4
+POSITIONAL_BASE = -8.0
+
+CENTRAL_SQUARES = [(3, 3), (3, 4), (4, 3), (4, 4)]
+
+
+def _table(value_at):
+    return [value_at(square // 8, square % 8) for square in range(64)]
+
+
+def _white_pawn(row, col):
+    return (1.0 if row in (6, 4) else 0.0) + (0.5 if (row, col) in CENTRAL_SQUARES else 0.0)
+
+
+def _black_pawn(row, col):
+    return (-0.5 if row in (1, 3) else 0.0) - (0.5 if (row, col) in CENTRAL_SQUARES else 0.0)
+
+
+# Bảng điểm vị trí cho từng quân theo chỉ số ô row * 8 + col
+PIECE_SQUARE_TABLES = {piece: [0.0] * 64 for piece in "NBRQnbrq."}
+PIECE_SQUARE_TABLES['P'] = _table(_white_pawn)
+PIECE_SQUARE_TABLES['p'] = _table(_black_pawn)
+PIECE_SQUARE_TABLES['K'] = [0.5] * 64
+PIECE_SQUARE_TABLES['k'] = [-0.5] * 64
+
+
+def material_score(rows):
+    """Tổng giá trị vật chất, tính bằng cách duyệt toàn bộ bàn cờ."""
+    return sum(PIECE_VALUES[piece] for row in rows for piece in row)
+
+
+def positional_score(rows):
+    """Tổng điểm vị trí (gồm hằng số POSITIONAL_BASE), tính bằng cách duyệt toàn bộ bàn cờ."""
+    return POSITIONAL_BASE + sum(
+        PIECE_SQUARE_TABLES[rows[row][col]][row * 8 + col] for row in range(8) for col in range(8)
+    )
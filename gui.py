@@ -18,6 +18,15 @@ class ChessGUI:
         self.piece_images = self.load_piece_images()  # Tải hình ảnh quân cờ
         self.selected_square = None  # Ô được chọn
         self.current_turn = 'white'  # Lượt chơi hiện tại
+        self.fonts = {}  # Font theo cỡ chữ, tạo một lần
+        self.background = self.create_background()  # Lớp nền: 64 ô bàn cờ vẽ sẵn
+        self.buttons = self.create_buttons()  # Thanh nút bấm vẽ sẵn
+        # Trạng thái đã vẽ lên màn hình, dùng để chỉ vẽ lại các ô thay đổi
+        self.drawn_rows = None
+        self.drawn_selected = None
+        # Trạng thái kết thúc ván, chỉ tính lại khi thế cờ thay đổi
+        self.status = None
+        self.status_key = None
 
     def load_piece_images(self):
         piece_images = {}
@@ -37,14 +46,50 @@ class ChessGUI:
                 )
         return piece_images
 
-    def draw_board(self):
-        # Vẽ bàn cờ
+    def create_background(self):
+        # Vẽ 64 ô bàn cờ một lần lên một surface riêng
+        background = pygame.Surface((WIDTH, 8 * SQUARE_SIZE))
         for row in range(8):
             for col in range(8):
                 color = WHITE if (row + col) % 2 == 0 else BLACK
-                if self.selected_square == (row, col):
-                    color = HIGHLIGHT_COLOR
-                pygame.draw.rect(self.window, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+                pygame.draw.rect(background, color, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+        return background
+
+    def create_buttons(self):
+        # Vẽ sẵn thanh nút bấm (phần cửa sổ bên dưới bàn cờ)
+        buttons = pygame.Surface((WIDTH, HEIGHT - 8 * SQUARE_SIZE))
+        top = 8 * SQUARE_SIZE
+        for label, x in (("Undo", 40), ("Reset", 240), ("Log out", 440)):
+            pygame.draw.rect(buttons, BUTTON_COLOR, (x, 660 - top, 160, 40))
+            text_surface = self.get_font(24).render(label, True, BUTTON_TEXT_COLOR)
+            buttons.blit(text_surface, text_surface.get_rect(center=(x + 80, 680 - top)))
+        return buttons
+
+    def get_font(self, size):
+        # Font được tạo một lần cho mỗi cỡ chữ
+        if size not in self.fonts:
+            self.fonts[size] = pygame.font.Font(None, size)
+        return self.fonts[size]
+
+    def draw_square(self, row, col):
+        # Vẽ lại một ô: nền (hoặc màu đánh dấu) và quân cờ trên ô; trả về vùng cần cập nhật
+        rect = pygame.Rect(col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
+        if self.selected_square == (row, col):
+            self.window.fill(HIGHLIGHT_COLOR, rect)
+        else:
+            self.window.blit(self.background, rect, rect)
+        piece = self.board.board[row][col]
+        if piece != ".":
+            color = "black" if piece.islower() else "white"
+            self.window.blit(self.piece_images[f"{color[0]}{piece.upper()}"], rect)
+        return rect
+
+    def draw_board(self):
+        # Vẽ bàn cờ
+        self.window.blit(self.background, (0, 0))
+        if self.selected_square:
+            row, col = self.selected_square
+            self.window.fill(HIGHLIGHT_COLOR, (col * SQUARE_SIZE, row * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
 
     def draw_pieces(self):
         # Vẽ quân cờ trên bàn
@@ -57,19 +102,11 @@ class ChessGUI:
                     self.window.blit(self.piece_images[piece_key], (col * SQUARE_SIZE, row * SQUARE_SIZE))
 
     def draw_buttons(self):
-        pygame.draw.rect(self.window, BUTTON_COLOR, (40, 660, 160, 40))
-        self.draw_text("Undo", 120, 680, BUTTON_TEXT_COLOR, 24)
-
-        pygame.draw.rect(self.window, BUTTON_COLOR, (240, 660, 160, 40))
-        self.draw_text("Reset", 320, 680, BUTTON_TEXT_COLOR, 24)
-
-        pygame.draw.rect(self.window, BUTTON_COLOR, (440, 660, 160, 40))
-        self.draw_text("Log out", 520, 680, BUTTON_TEXT_COLOR, 24)
+        self.window.blit(self.buttons, (0, 8 * SQUARE_SIZE))
 
     def draw_text(self, text, x, y, color, size):
         # Vẽ thông báo lên màn hình
-        font = pygame.font.Font(None, size)
-        text_surface = font.render(text, True, color)
+        text_surface = self.get_font(size).render(text, True, color)
         text_rect = text_surface.get_rect(center=(x, y))
         self.window.blit(text_surface, text_rect)
 
@@ -81,21 +118,55 @@ class ChessGUI:
         # Xóa đánh dấu ô
         self.selected_square = None
 
-    def update(self):
-        # Cập nhật màn hình
-        self.draw_board()
-        self.draw_pieces()
-        self.draw_buttons()
+    def refresh_status(self):
+        # Tính trạng thái kết thúc ván (sinh và thử mọi nước đi) chỉ khi thế cờ hoặc lượt đi thay đổi
+        key = (self.board.hash, self.board.ply, self.current_turn)
+        if key != self.status_key:
+            self.status_key = key
+            if self.board.is_checkmate(self.current_turn):  # Kiểm tra checkmate
+                self.status = "checkmate"
+            elif self.board.is_stalemate(self.current_turn):  # Kiểm tra stalemate
+                self.status = "stalemate"
+            else:
+                self.status = None
+        return self.status
 
-        if self.board.is_checkmate(self.current_turn):  # Kiểm tra checkmate
+    def update(self):
+        # Cập nhật màn hình: chỉ vẽ lại các ô thay đổi kể từ lần vẽ trước, không làm gì nếu không có thay đổi
+        status = self.refresh_status()
+        if status == "checkmate":
             winner = "Black" if self.current_turn == "white" else "White"
             self.show_game_over_message(f"Checkmate! {winner} wins!")
             self.board.reset_game()
-        elif self.board.is_stalemate(self.current_turn):  # Kiểm tra stalemate
+        elif status == "stalemate":
             self.show_game_over_message("Stalemate! It's a draw!")
             self.board.reset_game()
 
-        pygame.display.update()
+        rows = self.board.board
+        if self.drawn_rows is not None and self.selected_square == self.drawn_selected and rows == self.drawn_rows:
+            return  # Không có gì thay đổi
+
+        if self.drawn_rows is None:
+            # Lần đầu (hoặc sau khi màn hình bị vẽ đè): vẽ toàn bộ cửa sổ
+            self.draw_board()
+            self.draw_pieces()
+            self.draw_buttons()
+            pygame.display.update()
+        else:
+            dirty = []
+            if self.selected_square != self.drawn_selected:
+                for square in (self.drawn_selected, self.selected_square):
+                    if square is not None:
+                        dirty.append(self.draw_square(*square))
+            for row in range(8):
+                if rows[row] != self.drawn_rows[row]:
+                    for col in range(8):
+                        if rows[row][col] != self.drawn_rows[row][col]:
+                            dirty.append(self.draw_square(row, col))
+            if dirty:
+                pygame.display.update(dirty)
+        self.drawn_rows = [row[:] for row in rows]
+        self.drawn_selected = self.selected_square
 
     def handle_click(self, row, col):
         # Xử lý khi click vào bàn cờ
@@ -129,10 +200,10 @@ class ChessGUI:
         self.draw_pieces()
         self.draw_buttons()
 
-        font = pygame.font.Font(None, 60)
-        text_surface = font.render(message, True, (255, 255, 255))
+        text_surface = self.get_font(60).render(message, True, (255, 255, 255))
         text_rect = text_surface.get_rect(center=(WIDTH // 2, HEIGHT // 2))
         self.window.blit(text_surface, text_rect)
 
         pygame.display.update()
         pygame.time.delay(3000)  # Hiển thị thông báo trong 3 giây
+        self.drawn_rows = None  # Thông báo đã vẽ đè lên bàn cờ: lần cập nhật sau vẽ lại toàn bộ
@@ -1,9 +1,17 @@
+import os
 import pygame
+from analysis_cache import CACHE_PATH, AnalysisCache
 from gui import ChessGUI, SQUARE_SIZE
 from board import Board
-from minimax import find_best_move
+from book import OpeningBook
+from engine import Engine
+from tablebase import TABLEBASE_DIR, Tablebases
 from utils import validate_user_move
 
+AI_TIME_LIMIT = 0.5  # Thời gian suy nghĩ của AI cho mỗi nước đi (giây)
+BOOK_PATH = "book.bin"  # Sách khai cuộc, tạo bằng: python book.py build openings.txt book.bin
+AI_MOVE_EVENT = pygame.USEREVENT + 1  # Sự kiện do luồng tìm kiếm gửi về khi AI đã chọn xong nước đi
+
 
 def main():
     pygame.init()
@@ -13,6 +21,21 @@ def main():
     gui = ChessGUI(board)  # Khởi tạo giao diện bàn cờ
     move_history = []  # Lịch sử các nước đi
 
+    def post_ai_move(search_id, result):
+        # Gọi từ luồng tìm kiếm: chuyển kết quả về vòng lặp sự kiện
+        pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, search_id=search_id, result=result))
+
+    # AI tìm kiếm trên luồng nền (bảng chuyển vị và bộ sắp xếp nước đi được giữ suốt ván)
+    book = OpeningBook(BOOK_PATH) if os.path.exists(BOOK_PATH) else None
+    # Bảng tàn cuộc, tạo bằng: python tablebase.py generate
+    tablebases = Tablebases(TABLEBASE_DIR) if os.path.isdir(TABLEBASE_DIR) else None
+    # Bộ nhớ đệm phân tích trên đĩa (tùy chọn): chỉ dùng khi tệp đã có; bật bằng cách tạo tệp rỗng
+    # (touch analysis_cache.sqlite) hoặc dùng tệp của batch_analysis.py --cache
+    cache = AnalysisCache(CACHE_PATH) if os.path.exists(CACHE_PATH) else None
+    engine = Engine(post_ai_move, AI_TIME_LIMIT, null_move=True, late_move_reductions=True, futility=True,
+                    book=book, tablebases=tablebases, cache=cache)
+    search_id = None  # Lần tìm kiếm mà giao diện đang chờ kết quả
+
     running = True
     selected_piece = None
     player_color, ai_color = "white", "black"  # Người chơi màu trắng, AI màu đen
@@ -22,13 +45,40 @@ def main():
             if event.type == pygame.QUIT:
                 running = False
 
+            if event.type == AI_MOVE_EVENT and event.search_id == search_id:
+                search_id = None
+                ai_move = event.result["move"]
+                if ai_move:
+                    board.move(ai_move[0], ai_move[1])
+                    move_history.append(ai_move)  # Ghi lại lịch sử nước đi của AI
+
+                # Kiểm tra kết thúc trò chơi với AI
+                if board.is_checkmate(ai_color):
+                    print("Chiếu hết! Trắng thắng!")
+                    board.reset_game()
+                    move_history.clear()
+                elif board.is_stalemate(ai_color):
+                    print("Hòa! Ván cờ kết thúc!")
+                    board.reset_game()
+                    move_history.clear()
+                elif len(event.result["pv"]) > 1:
+                    # Suy nghĩ trước nước đáp trả của AI cho nước đi mà người chơi nhiều khả năng sẽ đi
+                    engine.ponder(board, ai_color, event.result["pv"][1])
+
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = pygame.mouse.get_pos()
                 row, col = pos[1] // SQUARE_SIZE, pos[0] // SQUARE_SIZE
 
                 # Kiểm tra nút bấm Undo, Reset, hoặc Log out
                 if 40 <= pos[0] <= 200 and 660 <= pos[1] <= 700:  # Nút Undo
-                    if len(move_history) >= 2:
+                    engine.cancel()
+                    if search_id is not None:
+                        # AI chưa kịp đi: chỉ cần undo nước đi của người chơi
+                        search_id = None
+                        board.undo_move()
+                        move_history.pop()
+                        gui.update()
+                    elif len(move_history) >= 2:
                         # Undo nước đi của AI
                         board.undo_move()
                         move_history.pop()
@@ -38,6 +88,8 @@ def main():
                         gui.update()
                     continue
                 elif 240 <= pos[0] <= 400 and 660 <= pos[1] <= 700:  # Nút Reset
+                    engine.cancel()
+                    search_id = None
                     board.reset_game()
                     move_history.clear()
                     selected_piece = None
@@ -45,9 +97,15 @@ def main():
                     gui.update()
                     continue
                 elif 440 <= pos[0] <= 600 and 660 <= pos[1] <= 700:  # Nút Log out
+                    engine.cancel()
+                    if cache is not None:
+                        cache.close()
                     pygame.quit()
                     return
 
+                if search_id is not None:
+                    continue  # AI đang suy nghĩ, chưa đến lượt người chơi
+
                 if selected_piece:
                     start = selected_piece
                     end = (row, col)
@@ -72,32 +130,19 @@ def main():
                         # Kiểm tra kết thúc trò chơi
                         if board.is_checkmate(player_color):
                             print(f"Chiếu hết! {player_color.capitalize()} thua!")
+                            engine.cancel()
                             board.reset_game()
                             move_history.clear()
                             break
                         elif board.is_stalemate(player_color):
                             print("Hòa! Ván cờ kết thúc!")
+                            engine.cancel()
                             board.reset_game()
                             move_history.clear()
                             break
 
-                        # Đến lượt AI di chuyển
-                        ai_move = find_best_move(board, 2, ai_color)
-                        if ai_move:
-                            board.move(ai_move[0], ai_move[1])
-                            move_history.append(ai_move)  # Ghi lại lịch sử nước đi của AI
-
-                        # Kiểm tra kết thúc trò chơi với AI
-                        if board.is_checkmate(ai_color):
-                            print("Chiếu hết! Trắng thắng!")
-                            board.reset_game()
-                            move_history.clear()
-                            break
-                        elif board.is_stalemate(ai_color):
-                            print("Hòa! Ván cờ kết thúc!")
-                            board.reset_game()
-                            move_history.clear()
-                            break
+                        # Đến lượt AI di chuyển: tìm kiếm trên luồng nền, kết quả về qua AI_MOVE_EVENT
+                        search_id = engine.opponent_moved(board, (start, end), ai_color)
                     else:
                         print("Nước đi không hợp lệ! Vui lòng thử lại.")
                         selected_piece = None
@@ -109,6 +154,9 @@ def main():
         gui.update()  # Cập nhật giao diện
         clock.tick(60)  # Giới hạn FPS
 
+    engine.cancel()
+    if cache is not None:
+        cache.close()
     pygame.quit()  # Thoát trò chơi
 
 
@@ -1,9 +1,18 @@
+import contextlib
 import math
+import time
 from board import Board
+from move_ordering import ORDER_VALUES
+from tablebase import TABLEBASE_WIN
+from transposition import EXACT, LOWER, UPPER, TranspositionTable
+from zobrist import position_key
 
 
 def evaluate_board(board):
-    """Đánh giá bàn cờ dựa trên giá trị quân cờ và yếu tố chiến lược."""
+    """Đánh giá bàn cờ dựa trên giá trị quân cờ và yếu tố chiến lược.
+
+    Bản duyệt toàn bộ bàn cờ, dùng làm chuẩn đối chiếu cho Board.evaluate (cập nhật dần).
+    """
 
     # Dictionary chứa giá trị các quân cờ
     piece_values = {'p': -1, 'r': -5, 'n': -3, 'b': -3, 'q': -9, 'k': -100,
@@ -35,64 +44,553 @@ def evaluate_board(board):
     return value
 
 
-def minimax(board, depth, is_maximizing, alpha, beta):
+# Biên an toàn cho cắt tỉa delta trong tìm kiếm tĩnh (đơn vị: quân tốt)
+DELTA_MARGIN = 2
+
+# Nửa độ rộng cửa sổ khát vọng quanh điểm của lần lặp trước, và độ sâu tối đa khi tìm kiếm theo thời gian
+ASPIRATION_WINDOW = 0.5
+MAX_SEARCH_DEPTH = 64
+
+# Nước đi rỗng: giảm thêm NULL_MOVE_REDUCTION tầng, chỉ dùng khi độ sâu còn lại đủ lớn
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+# Giảm một tầng cho nước đi yên lặng đứng sau LMR_MIN_INDEX nước đi đầu tiên
+LMR_MIN_DEPTH = 3
+LMR_MIN_INDEX = 3
+# Biên cắt tỉa vô vọng theo độ sâu còn lại (đơn vị: quân tốt)
+FUTILITY_MARGINS = (0, 1.5, 3.5)
+# Điểm lớn hơn ngưỡng này (về trị tuyệt đối) là điểm thắng/thua theo bảng tàn cuộc, phụ thuộc số nửa nước từ gốc
+TABLEBASE_SCORE_BOUND = TABLEBASE_WIN - 256 - MAX_SEARCH_DEPTH
+
+
+class SearchContext:
+    """Các thành phần dùng chung trong một lần tìm kiếm: bảng chuyển vị, bộ sắp xếp nước đi,
+    tìm kiếm tĩnh ở nút lá, và bộ đếm số nút (tìm kiếm chính / tìm kiếm tĩnh)."""
+
+    def __init__(self, tt=None, orderer=None, quiescence=True, null_move=False, late_move_reductions=False,
+                 futility=False, stop=None, stats=None, book=None, tablebases=None, cache=None, shared_bound=None,
+                 shared_maximizing=True):
+        self.tt = tt
+        self.orderer = orderer
+        self.quiescence = quiescence
+        # Tìm kiếm chọn lọc: mỗi kỹ thuật bật/tắt riêng (mặc định tắt để kết quả giống tìm kiếm đầy đủ)
+        self.null_move = null_move
+        self.late_move_reductions = late_move_reductions
+        self.futility = futility
+        self.nodes = 0
+        self.qnodes = 0
+        # Giới hạn của lần tìm kiếm hiện tại (đặt bởi `search`)
+        self.deadline = None
+        self.node_limit = None
+        self.pv_moves = {}  # Khóa thế cờ -> nước đi của biến chính ở lần lặp trước
+        self.stop = stop  # threading.Event: luồng khác đặt cờ này để dừng tìm kiếm ngay
+        self.stats = stats  # SearchStats (tùy chọn): số liệu chi tiết của lần tìm kiếm
+        self.book = book  # OpeningBook (tùy chọn): tra sách khai cuộc trước khi tìm kiếm
+        self.tablebases = tablebases  # Tablebases (tùy chọn): điểm chính xác của tàn cuộc ít quân
+        self.cache = cache  # AnalysisCache (tùy chọn): kết quả đã tìm ở các lần chạy trước, lưu trên đĩa
+        # Tìm kiếm song song ở gốc (parallel.py): multiprocessing.Value chứa cận chung của bên đi ở gốc (alpha nếu
+        # `shared_maximizing`, ngược lại beta). Mọi nút đọc lại cận này để cắt tỉa theo kết quả mới nhất của các tiến
+        # trình khác; `shared_seen` là cận chặt nhất đã dùng, để biết điểm trả về có chính xác không
+        self.shared_bound = shared_bound
+        # Đọc trực tiếp giá trị (không lấy khóa) vì mỗi nút đều đọc; chỉ ghi mới cần khóa
+        self.shared_value = shared_bound.get_obj() if shared_bound is not None else None
+        self.shared_maximizing = shared_maximizing
+        self.shared_seen = -math.inf if shared_maximizing else math.inf
+
+    def cache_config(self):
+        # Các tùy chọn làm thay đổi kết quả tìm kiếm; là một phần khóa của AnalysisCache
+        return (self.quiescence, self.null_move, self.late_move_reductions, self.futility,
+                self.tablebases is not None)
+
+    def shared_window(self, alpha, beta):
+        # Siết cửa sổ (alpha, beta) bằng cận chung hiện tại của tìm kiếm song song
+        bound = self.shared_value.value
+        if self.shared_maximizing:
+            self.shared_seen = max(self.shared_seen, bound)
+            return max(alpha, bound), beta
+        self.shared_seen = min(self.shared_seen, bound)
+        return alpha, min(beta, bound)
+
+    def check_limits(self):
+        # Gọi định kỳ trong lúc tìm kiếm; ném SearchTimeout khi hết thời gian, vượt số nút cho phép hoặc bị dừng
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            raise SearchTimeout()
+        if self.node_limit is not None and self.nodes + self.qnodes >= self.node_limit:
+            raise SearchTimeout()
+
+
+class SearchTimeout(Exception):
+    """Tìm kiếm bị dừng giữa chừng vì hết thời gian hoặc số nút."""
+
+
+def minimax(board, depth, is_maximizing, alpha, beta, context=None, ply=0, null_allowed=True):
     if depth == 0:
-        return evaluate_board(board)  # Nếu độ sâu là 0, đánh giá bàn cờ hiện tại
+        if context is not None and context.quiescence:
+            return quiescence(board, is_maximizing, alpha, beta, context)
+        return board.evaluate()  # Nếu độ sâu là 0, đánh giá bàn cờ hiện tại (điểm cập nhật dần)
+    color = 'white' if is_maximizing else 'black'
+    if context is not None:
+        context.nodes += 1
+        if not context.nodes & 255:
+            context.check_limits()
+    tt = context.tt if context is not None else None
+    orderer = context.orderer if context is not None else None
+    if context is not None and context.shared_bound is not None:
+        alpha, beta = context.shared_window(alpha, beta)
+        if beta <= alpha:
+            return alpha if is_maximizing else beta  # Các tiến trình khác đã tìm được nước đi ở gốc tốt hơn
+
+    # Tàn cuộc có trong bảng: điểm chính xác, không cần tìm kiếm tiếp (gốc do search/find_best_move xử lý)
+    if context is not None and context.tablebases is not None and ply > 0 \
+            and board.piece_count <= context.tablebases.max_pieces:
+        score = context.tablebases.score(board, color, ply)
+        if score is not None:
+            return score
+
+    # Tra bảng chuyển vị: dùng điểm đã lưu nếu đủ sâu, và lấy nước đi tốt nhất để thử trước
+    tt_move = None
+    if context is not None and context.pv_moves:
+        tt_move = context.pv_moves.get(position_key(board, color))  # Đi theo biến chính của lần lặp trước
+    if tt is not None:
+        key = position_key(board, color)
+        alpha_orig, beta_orig = alpha, beta
+        entry = tt.probe(key)
+        if entry is not None:
+            entry_depth, score, bound, entry_move = entry
+            score = _score_from_tt(score, ply)
+            tt_move = tt_move or entry_move
+            if entry_depth >= depth:
+                if bound == EXACT:
+                    return score
+                if bound == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return score
+
+    # Tìm kiếm chọn lọc (không áp dụng ở gốc và khi đang bị chiếu)
+    selective = context is not None and ply > 0 and (context.null_move or context.late_move_reductions
+                                                      or context.futility)
+    in_check = selective and board.is_in_check(color)
+    opponent = 'black' if is_maximizing else 'white'
+
+    # Nước đi rỗng: nhường lượt cho đối thủ mà vẫn vượt beta thì thế cờ đủ tốt để cắt tỉa.
+    # Bỏ qua khi chỉ còn vua và tốt (dễ gặp thế bắt buộc phải đi - zugzwang)
+    if (selective and context.null_move and null_allowed and not in_check and depth >= NULL_MOVE_MIN_DEPTH
+            and _has_non_pawn_material(board, color)):
+        null_depth = depth - 1 - NULL_MOVE_REDUCTION
+        if is_maximizing and not math.isinf(beta):
+            if minimax(board, null_depth, False, math.nextafter(beta, -math.inf), beta, context, ply + 1,
+                       False) >= beta:
+                return beta
+        elif not is_maximizing and not math.isinf(alpha):
+            if minimax(board, null_depth, True, alpha, math.nextafter(alpha, math.inf), context, ply + 1,
+                       False) <= alpha:
+                return alpha
+
+    # Cắt tỉa vô vọng: gần nút lá, nếu điểm tĩnh cộng biên vẫn không vượt được alpha/beta
+    # thì bỏ qua các nước đi yên lặng không chiếu
+    futility_bound = None
+    if selective and context.futility and not in_check and depth < len(FUTILITY_MARGINS):
+        margin = FUTILITY_MARGINS[depth] if is_maximizing else -FUTILITY_MARGINS[depth]
+        bound = board.evaluate() + margin
+        if (is_maximizing and bound <= alpha) or (not is_maximizing and bound >= beta):
+            futility_bound = bound
+    reduce_late = selective and context.late_move_reductions and not in_check and depth >= LMR_MIN_DEPTH
+
     best_eval = -math.inf if is_maximizing else math.inf  # Giá trị tốt nhất ban đầu
-    moves = board.get_all_moves('white' if is_maximizing else 'black')  # Lấy danh sách các nước đi hợp lệ
+    best_move = None
+    moves = _ordered_moves(board, color, ply, tt_move, orderer)  # Lấy danh sách các nước đi hợp lệ
 
     # Duyệt qua tất cả các nước đi hợp lệ
-    for move in moves:
+    for index, move in enumerate(moves):
+        quiet = board.board[move[1][0]][move[1][1]] == '.'
         board.move(move[0], move[1])  # Thực hiện nước đi
-        if board.is_in_check('white' if is_maximizing else 'black'):  # Kiểm tra xem có tạo ra tình huống "check" không
-            board.undo_move()  # Nếu có, hoàn tác nước đi
+        gives_check = quiet and (futility_bound is not None or (reduce_late and index >= LMR_MIN_INDEX)) \
+            and board.is_in_check(opponent)
+
+        if quiet and futility_bound is not None and not gives_check:
+            board.undo_move()
+            # Điểm của nước đi bị bỏ qua không vượt quá điểm tĩnh cộng biên
+            best_eval = max(best_eval, futility_bound) if is_maximizing else min(best_eval, futility_bound)
             continue
 
+        # Nước đi yên lặng đứng muộn: tìm nông hơn một tầng với cửa sổ rỗng, chỉ tìm lại đầy đủ nếu nó vượt alpha/beta
+        eval = None
+        if quiet and reduce_late and index >= LMR_MIN_INDEX and not gives_check:
+            if is_maximizing and not math.isinf(alpha):
+                eval = minimax(board, depth - 2, False, alpha, math.nextafter(alpha, math.inf), context, ply + 1)
+                if eval > alpha:
+                    eval = None
+            elif not is_maximizing and not math.isinf(beta):
+                eval = minimax(board, depth - 2, True, math.nextafter(beta, -math.inf), beta, context, ply + 1)
+                if eval < beta:
+                    eval = None
+
         # Đệ quy gọi minimax cho bước tiếp theo
-        eval = minimax(board, depth - 1, not is_maximizing, alpha, beta)
+        if eval is None:
+            eval = minimax(board, depth - 1, not is_maximizing, alpha, beta, context, ply + 1)
         board.undo_move()  # Hoàn tác nước đi
 
         # Cập nhật giá trị tốt nhất dựa trên người chơi
         if is_maximizing:
-            best_eval = max(best_eval, eval)  # Tối đa hóa giá trị cho người chơi trắng
+            if eval > best_eval or best_move is None:
+                best_eval, best_move = eval, move  # Tối đa hóa giá trị cho người chơi trắng
             alpha = max(alpha, eval)  # Cập nhật alpha
         else:
-            best_eval = min(best_eval, eval)  # Tối thiểu hóa giá trị cho người chơi đen
+            if eval < best_eval or best_move is None:
+                best_eval, best_move = eval, move  # Tối thiểu hóa giá trị cho người chơi đen
             beta = min(beta, eval)  # Cập nhật beta
 
         # Cắt tỉa nếu không cần phải duyệt thêm
         if beta <= alpha:
+            if context is not None and context.stats is not None:
+                context.stats.record_cutoff(index)
+            if orderer is not None:
+                orderer.record_cutoff(board, move, ply, depth, index)
             break
 
+    if best_move is None and math.isinf(best_eval):
+        best_eval = _no_moves_score(board, color, is_maximizing)
+
+    if tt is not None:
+        if best_eval <= alpha_orig:
+            bound = UPPER
+        elif best_eval >= beta_orig:
+            bound = LOWER
+        else:
+            bound = EXACT
+        tt.store(key, depth, _score_to_tt(best_eval, ply), bound, best_move)
     return best_eval
 
 
-def find_best_move(board, depth, color):
-    """Tìm nước đi tốt nhất cho người chơi dựa trên thuật toán Minimax."""
-    best_move, best_eval = None, -math.inf if color == 'white' else math.inf  # Khởi tạo giá trị tốt nhất ban đầu
+def _no_moves_score(board, color, is_maximizing):
+    # Không còn nước đi hợp lệ: bị chiếu hết thì thua (vô cực), hết cờ mà không bị chiếu thì hòa như trong bảng tàn cuộc
+    if board.is_in_check(color):
+        return -math.inf if is_maximizing else math.inf
+    return 0.0
+
+
+def _score_to_tt(score, ply):
+    # Điểm theo bảng tàn cuộc tính khoảng cách từ gốc; bảng chuyển vị lưu khoảng cách từ chính thế cờ đó
+    if score > TABLEBASE_SCORE_BOUND and not math.isinf(score):
+        return score + ply
+    if score < -TABLEBASE_SCORE_BOUND and not math.isinf(score):
+        return score - ply
+    return score
+
+
+def _score_from_tt(score, ply):
+    # Ngược lại với _score_to_tt: đổi về khoảng cách từ gốc của lần tìm kiếm hiện tại
+    if score > TABLEBASE_SCORE_BOUND and not math.isinf(score):
+        return score - ply
+    if score < -TABLEBASE_SCORE_BOUND and not math.isinf(score):
+        return score + ply
+    return score
+
+
+def _has_non_pawn_material(board, color):
+    # Bên `color` còn quân khác ngoài vua và tốt không (điều kiện an toàn cho nước đi rỗng)
+    pieces = "NBRQ" if color == 'white' else "nbrq"
+    return any(piece in pieces for row in board.board for piece in row)
+
+
+def quiescence(board, is_maximizing, alpha, beta, context=None):
+    """Tìm kiếm tĩnh: chỉ xét nước ăn quân cho tới khi thế cờ yên tĩnh, tránh hiệu ứng chân trời.
+
+    Bên đi có thể "đứng yên" với điểm đánh giá hiện tại (stand-pat). Bỏ qua nước ăn quân không thể
+    nâng điểm lên trên alpha/beta (cắt tỉa delta) và nước ăn quân thua theo SEE.
+    Khi đang bị chiếu thì xét mọi nước tránh chiếu.
+    """
+    if context is not None:
+        context.qnodes += 1
+        if not context.qnodes & 255:
+            context.check_limits()
+    color = 'white' if is_maximizing else 'black'
+    in_check = board.is_in_check(color)
+    if in_check:
+        best_eval = -math.inf if is_maximizing else math.inf
+        moves = board.get_legal_moves(color)
+    else:
+        best_eval = stand_pat = board.evaluate()  # Điểm stand-pat
+        if is_maximizing:
+            if best_eval >= beta:
+                return best_eval
+            alpha = max(alpha, best_eval)
+        else:
+            if best_eval <= alpha:
+                return best_eval
+            beta = min(beta, best_eval)
+        rows = board.board
+        moves = sorted(board.get_legal_captures(color),
+                       key=lambda move: 10 * ORDER_VALUES[rows[move[1][0]][move[1][1]]]
+                       - ORDER_VALUES[rows[move[0][0]][move[0][1]]], reverse=True)
+
+    for move in moves:
+        if not in_check:
+            gain = ORDER_VALUES[board.board[move[1][0]][move[1][1]]]
+            if is_maximizing and stand_pat + gain + DELTA_MARGIN <= alpha:
+                continue  # Cắt tỉa delta
+            if not is_maximizing and stand_pat - gain - DELTA_MARGIN >= beta:
+                continue
+            if board.static_exchange(move) < 0:
+                continue  # Nước ăn quân thua theo SEE
+        board.move(move[0], move[1])
+        eval = quiescence(board, not is_maximizing, alpha, beta, context)
+        board.undo_move()
+        if is_maximizing:
+            best_eval = max(best_eval, eval)
+            alpha = max(alpha, eval)
+        else:
+            best_eval = min(best_eval, eval)
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+    return best_eval
+
+
+def _ordered_moves(board, color, ply, tt_move, orderer):
+    # Các nước đi hợp lệ: sinh theo giai đoạn nếu có bộ sắp xếp (trừ gốc, nơi luôn duyệt hết nước đi);
+    # nếu không chỉ đưa nước đi TT lên đầu
+    if orderer is not None:
+        if ply > 0:
+            return orderer.staged(board, color, ply, tt_move)
+        return orderer.order(board, board.get_legal_moves(color), ply, tt_move)
+    moves = board.get_legal_moves(color)
+    if tt_move in moves:
+        moves.remove(tt_move)
+        moves.insert(0, tt_move)
+    return moves
+
+
+def find_best_move(board, depth, color, tt=None, orderer=None, context=None, book=None):
+    """Tìm nước đi tốt nhất cho người chơi dựa trên thuật toán Minimax.
+
+    Nếu truyền bảng chuyển vị `tt`, kết quả được ghi nhớ giữa các độ sâu và giữa các nước đi của ván.
+    `orderer` (MoveOrderer) sắp xếp nước đi để alpha-beta cắt tỉa sớm hơn.
+    Nếu thế cờ có trong sách khai cuộc `book` (OpeningBook), trả về nước đi trong sách mà không tìm kiếm;
+    tương tự với bảng tàn cuộc của `context.tablebases`, và với bộ nhớ đệm `context.cache` nếu kết quả đã lưu
+    đủ sâu (kết quả tìm được cũng được ghi lại vào đó).
+    Có thể truyền sẵn `context` (SearchContext) để đọc số nút sau khi tìm kiếm; khi đó bỏ qua `tt`, `orderer`
+    và `book`.
+    """
+    if context is None:
+        context = SearchContext(tt, orderer, book=book)
+    if context.book is not None:
+        book_move = context.book.choose(board, color)
+        if book_move is not None:
+            return book_move
+    if context.tablebases is not None:
+        tablebase_move = context.tablebases.best_move(board, color)
+        if tablebase_move is not None:
+            return tablebase_move
+    if context.cache is not None:
+        cached = context.cache.probe(board, color, depth, context.cache_config())
+        if cached is not None:
+            return cached[0]
+    if context.tt is not None:
+        context.tt.new_search()
+    start_time = time.perf_counter()
+    with _instrumented(board, context):
+        best_move, best_score = _search_root(board, depth, color, -math.inf, math.inf, context)
+    if context.stats is not None:
+        context.stats.record_iteration(depth, time.perf_counter() - start_time, context.nodes, context.qnodes)
+    if context.cache is not None and best_move is not None:
+        context.cache.store(board, color, best_move, best_score, depth, context.cache_config())
+    return best_move
+
+
+def _instrumented(board, context):
+    # Đo thời gian các phần việc của bàn cờ khi có SearchStats; không làm gì nếu không bật số liệu
+    if context.stats is None:
+        return contextlib.nullcontext()
+    return context.stats.instrument(board)
+
+
+def _search_root(board, depth, color, alpha, beta, context):
+    # Duyệt các nước đi ở gốc với cửa sổ (alpha, beta); trả về (nước đi tốt nhất, điểm)
+    is_maximizing = color == 'white'
+    tt = context.tt
+    key = position_key(board, color)
+    tt_move = context.pv_moves.get(key)
+    if tt_move is None and tt is not None:
+        entry = tt.probe(key)
+        if entry is not None:
+            tt_move = entry[3]  # Thử nước đi tốt nhất đã lưu trước
+    moves = _ordered_moves(board, color, 0, tt_move, context.orderer)
+    alpha_orig, beta_orig = alpha, beta
+    best_move, best_eval = None, -math.inf if is_maximizing else math.inf  # Khởi tạo giá trị tốt nhất ban đầu
 
     # Duyệt qua tất cả các nước đi hợp lệ của người chơi
-    for move in board.get_all_moves(color):
+    for move in moves:
         board.move(move[0], move[1])  # Thực hiện nước đi
-        if board.is_in_check(color):  # Kiểm tra xem có tạo ra tình huống "check" không
-            board.undo_move()  # Nếu có, hoàn tác nước đi
-            continue
 
         # Gọi minimax để đánh giá nước đi
-        eval = minimax(board, depth - 1, color != 'white', -math.inf, math.inf)
+        eval = minimax(board, depth - 1, not is_maximizing, alpha, beta, context, 1)
         board.undo_move()  # Hoàn tác nước đi
 
-        # Cập nhật nước đi tốt nhất dựa trên đánh giá
-        if (color == 'white' and eval > best_eval) or (color == 'black' and eval < best_eval):
-            best_eval, best_move = eval, move
+        # Cập nhật nước đi tốt nhất dựa trên đánh giá; các nước đi sau chỉ cần chứng minh tốt hơn
+        if is_maximizing:
+            if eval > best_eval or best_move is None:
+                best_eval, best_move = eval, move
+            alpha = max(alpha, eval)
+        else:
+            if eval < best_eval or best_move is None:
+                best_eval, best_move = eval, move
+            beta = min(beta, eval)
+        if beta <= alpha:
+            break
+    if best_move is None:
+        best_eval = _no_moves_score(board, color, is_maximizing)
+
+    if tt is not None and best_move is not None:
+        bound = UPPER if best_eval <= alpha_orig else LOWER if best_eval >= beta_orig else EXACT
+        tt.store(key, depth, best_eval, bound, best_move)
+    return best_move, best_eval
 
-    return best_move
 
-def iterative_deepening_search(board, max_depth, color):
-    """Tìm nước đi tốt nhất bằng thuật toán tìm kiếm sâu dần."""
-    best_move = None
+def _aspiration_search(board, depth, color, previous_score, context, window):
+    # Tìm kiếm ở gốc với cửa sổ hẹp quanh điểm của lần lặp trước, nới rộng và tìm lại nếu điểm rơi ra ngoài
+    if previous_score is None or window is None or math.isinf(previous_score):
+        return _search_root(board, depth, color, -math.inf, math.inf, context)
+    delta = window
+    alpha, beta = previous_score - delta, previous_score + delta
+    while True:
+        move, score = _search_root(board, depth, color, alpha, beta, context)
+        if score <= alpha and not math.isinf(alpha):
+            delta *= 2
+            alpha = -math.inf if delta > 8 * window else score - delta
+        elif score >= beta and not math.isinf(beta):
+            delta *= 2
+            beta = math.inf if delta > 8 * window else score + delta
+        else:
+            return move, score
 
-    # Duyệt qua các độ sâu từ 1 đến max_depth
-    for depth in range(1, max_depth + 1):
-        best_move = find_best_move(board, depth, color)  # Tìm nước đi tốt nhất cho từng độ sâu
-    return best_move
+
+def principal_variation(board, color, max_length, tt):
+    """Dò biến chính (chuỗi nước đi tốt nhất của hai bên) từ bảng chuyển vị."""
+    pv = []
+    for _ in range(max_length):
+        entry = tt.probe(position_key(board, color)) if tt is not None else None
+        if entry is None or entry[3] is None or entry[3] not in board.get_legal_moves(color):
+            break
+        pv.append(entry[3])
+        board.move(*entry[3])
+        color = 'black' if color == 'white' else 'white'
+    for _ in pv:
+        board.undo_move()
+    return pv
+
+
+def search(board, color, max_depth=MAX_SEARCH_DEPTH, time_limit=None, node_limit=None, context=None,
+           aspiration_window=ASPIRATION_WINDOW, on_iteration=None):
+    """Tìm kiếm sâu dần có giới hạn thời gian (giây) và/hoặc số nút.
+
+    Mỗi lần lặp được mồi bằng biến chính của lần lặp trước và dùng cửa sổ khát vọng quanh điểm trước đó.
+    Khi hết giới hạn, trả về kết quả của lần lặp hoàn chỉnh cuối cùng dưới dạng dict
+    {move, score, depth, pv, nodes, qnodes, time}; `on_iteration(result)` được gọi sau mỗi lần lặp.
+    Nếu `context.cache` đã có kết quả của thế cờ (với cùng cấu hình tìm kiếm), trả về ngay khi kết quả đã lưu đủ
+    sâu hoặc khi có giới hạn thời gian/số nút; nếu không thì tìm kiếm tiếp từ độ sâu sau độ sâu đã lưu.
+    Kết quả mới sâu hơn được ghi lại vào bộ nhớ đệm.
+    """
+    if context is None:
+        context = SearchContext(TranspositionTable())
+    if context.orderer is not None:
+        context.orderer.new_search()
+    if context.tt is not None:
+        context.tt.new_search()
+    start_time = time.perf_counter()
+    root_ply = board.ply
+    context.pv_moves = {}
+    result = {"move": None, "score": None, "depth": 0, "pv": [], "nodes": 0, "qnodes": 0, "time": 0.0}
+    moves = board.get_legal_moves(color)
+    if not moves:
+        return result
+    result["move"] = moves[0]  # Phòng khi chưa hoàn thành lần lặp nào
+    if context.book is not None:
+        book_move = context.book.choose(board, color)
+        if book_move is not None:
+            result.update(move=book_move, pv=[book_move], time=time.perf_counter() - start_time)
+            return result
+    if context.tablebases is not None:
+        tablebase_move = context.tablebases.best_move(board, color)
+        if tablebase_move is not None:
+            result.update(move=tablebase_move, score=context.tablebases.score(board, color), pv=[tablebase_move],
+                          time=time.perf_counter() - start_time)
+            return result
+    first_depth = 1
+    if context.cache is not None:
+        cached = context.cache.probe(board, color, config=context.cache_config())
+        if cached is not None:
+            cached_move, cached_score, cached_depth = cached
+            result.update(move=cached_move, score=cached_score, depth=cached_depth, pv=[cached_move])
+            # Có giới hạn thời gian/số nút thì kết quả đã lưu thay cho lần tìm kiếm đó; nếu không thì cần đủ sâu
+            budgeted = time_limit is not None or node_limit is not None
+            if budgeted or cached_depth >= max_depth or math.isinf(cached_score):
+                result["time"] = time.perf_counter() - start_time
+                return result
+            context.pv_moves = {position_key(board, color): cached_move}
+            first_depth = cached_depth + 1
+
+    with _instrumented(board, context):
+        for depth in range(first_depth, max_depth + 1):
+            # Lần lặp đầu tiên luôn được chạy hết để chắc chắn có nước đi (trừ khi đã có kết quả từ bộ nhớ đệm)
+            has_result = result["depth"] > 0
+            context.deadline = start_time + time_limit if time_limit is not None and has_result else None
+            context.node_limit = context.nodes + context.qnodes + node_limit \
+                if node_limit is not None and has_result else None
+            iteration_start = time.perf_counter()
+            try:
+                move, score = _aspiration_search(board, depth, color, result["score"], context, aspiration_window)
+            except SearchTimeout:
+                while board.ply > root_ply:
+                    board.undo_move()
+                break
+            finally:
+                context.deadline = context.node_limit = None
+
+            pv = principal_variation(board, color, depth, context.tt) if context.tt is not None else []
+            if not pv or pv[0] != move:
+                pv = [move]
+            context.pv_moves = _pv_table(board, color, pv)
+            elapsed = time.perf_counter() - start_time
+            result = {"move": move, "score": score, "depth": depth, "pv": pv, "nodes": context.nodes,
+                      "qnodes": context.qnodes, "time": elapsed}
+            if context.stats is not None:
+                context.stats.record_iteration(depth, time.perf_counter() - iteration_start, context.nodes,
+                                               context.qnodes)
+            if on_iteration is not None:
+                on_iteration(result)
+            if move is None or math.isinf(score):
+                break  # Hết cờ ở gốc, hoặc đã tìm thấy chiếu hết
+            if time_limit is not None and elapsed > time_limit / 2:
+                break  # Lần lặp sau gần như chắc chắn không kịp hoàn thành
+    if context.cache is not None and result["depth"] >= first_depth:
+        context.cache.store(board, color, result["move"], result["score"], result["depth"], context.cache_config())
+    return result
+
+
+def _pv_table(board, color, pv):
+    # Khóa thế cờ -> nước đi theo biến chính, dùng để thử trước ở lần lặp sau
+    table = {}
+    for move in pv:
+        table[position_key(board, color)] = move
+        board.move(*move)
+        color = 'black' if color == 'white' else 'white'
+    for _ in pv:
+        board.undo_move()
+    return table
+
+
+def iterative_deepening_search(board, max_depth, color, tt=None, orderer=None, context=None, time_limit=None):
+    """Tìm nước đi tốt nhất bằng thuật toán tìm kiếm sâu dần.
+
+    Bảng chuyển vị được dùng chung giữa các độ sâu; truyền `tt` để giữ lại giữa các nước đi.
+    Với `time_limit` (giây), trả về nước đi của lần lặp hoàn chỉnh cuối cùng khi hết thời gian.
+    """
+    if context is None:
+        context = SearchContext(tt if tt is not None else TranspositionTable(), orderer)
+    return search(board, color, max_depth, time_limit, context=context)["move"]
@@ -0,0 +1,104 @@
+"""Sắp xếp nước đi cho alpha-beta: nước đi TT, ăn quân MVV-LVA, killer và bảng lịch sử."""
+from evaluation import PIECE_VALUES
+
+# Giá trị tuyệt đối của quân, dùng cho MVV-LVA (quân bị ăn giá trị nhất, quân ăn rẻ nhất)
+ORDER_VALUES = {piece: abs(value) for piece, value in PIECE_VALUES.items()}
+
+MAX_PLY = 128
+
+
+class MoveOrderer:
+    """Sắp xếp nước đi theo thứ tự: nước đi TT/PV, ăn quân (MVV-LVA), 2 killer mỗi tầng, nước yên lặng theo lịch sử.
+
+    Các bộ đếm cho biết tỉ lệ cắt tỉa ngay ở nước đi đầu tiên (càng gần 100% thì sắp xếp càng tốt).
+    """
+
+    def __init__(self, use_tt_move=True, use_killers=True, use_history=True):
+        self.use_tt_move = use_tt_move
+        self.use_killers = use_killers
+        self.use_history = use_history
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [0] * (64 * 64)  # Bảng "butterfly": chỉ số ô đi * 64 + ô đến
+        self.reset_counters()
+
+    def reset_counters(self):
+        self.ordered_nodes = self.quiet_stages = self.cutoffs = self.first_move_cutoffs = 0
+
+    def new_search(self):
+        # Bắt đầu lần tìm kiếm mới: xóa killer, giảm một nửa điểm lịch sử, đặt lại bộ đếm
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        self.history = [score // 2 for score in self.history]
+        self.reset_counters()
+
+    def order(self, board, moves, ply, tt_move=None):
+        """Trả về danh sách nước đi đã sắp xếp (nước đi tốt nhất được thử trước)."""
+        self.ordered_nodes += 1
+        rows = board.board
+        killers = self.killers[ply] if self.use_killers and ply < MAX_PLY else (None, None)
+        history = self.history
+
+        def score(move):
+            if move == tt_move and self.use_tt_move:
+                return (4, 0)
+            (start_row, start_col), (end_row, end_col) = move
+            victim = rows[end_row][end_col]
+            if victim != '.':
+                return (3, 10 * ORDER_VALUES[victim] - ORDER_VALUES[rows[start_row][start_col]])
+            if move == killers[0]:
+                return (2, 1)
+            if move == killers[1]:
+                return (2, 0)
+            if self.use_history:
+                return (1, history[(start_row * 8 + start_col) * 64 + end_row * 8 + end_col])
+            return (1, 0)
+
+        return sorted(moves, key=score, reverse=True)
+
+    def staged(self, board, color, ply, tt_move=None):
+        """Trả về bộ sinh nước đi theo giai đoạn của Board (nước đi TT, ăn quân, killer, yên lặng).
+
+        Nước đi yên lặng chỉ được sinh và sắp xếp theo lịch sử khi tìm kiếm đi tới giai đoạn đó.
+        """
+        self.ordered_nodes += 1
+        killers = self.killers[ply] if self.use_killers and ply < MAX_PLY else ()
+        rows = board.board
+
+        def order_captures(captures):
+            return sorted(captures, key=lambda move: 10 * ORDER_VALUES[rows[move[1][0]][move[1][1]]]
+                          - ORDER_VALUES[rows[move[0][0]][move[0][1]]], reverse=True)
+
+        return board.staged_moves(color, tt_move if self.use_tt_move else None, tuple(killers),
+                                  order_captures, self._order_quiets)
+
+    def _order_quiets(self, quiets):
+        self.quiet_stages += 1
+        if not self.use_history:
+            return quiets
+        history = self.history
+        return sorted(quiets, key=lambda move: history[(move[0][0] * 8 + move[0][1]) * 64
+                                                       + move[1][0] * 8 + move[1][1]], reverse=True)
+
+    def record_cutoff(self, board, move, ply, depth, move_index):
+        """Ghi nhận nước đi gây cắt tỉa beta (gọi sau khi đã hoàn tác nước đi)."""
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+        (start_row, start_col), (end_row, end_col) = move
+        if board.board[end_row][end_col] != '.':
+            return  # Killer và lịch sử chỉ dành cho nước đi yên lặng
+        if self.use_killers and ply < MAX_PLY:
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1], killers[0] = killers[0], move
+        if self.use_history:
+            self.history[(start_row * 8 + start_col) * 64 + end_row * 8 + end_col] += depth * depth
+
+    def stats(self):
+        return {
+            "ordered_nodes": self.ordered_nodes,
+            "quiet_stages": self.quiet_stages,
+            "quiet_stage_rate": self.quiet_stages / self.ordered_nodes if self.ordered_nodes else 0.0,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+        }
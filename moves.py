@@ -0,0 +1,85 @@
+"""Mã hóa nước đi thành số nguyên 16 bit và bảng nước đi dựng sẵn.
+
+Bố cục bit của mã nước đi (ô có chỉ số row * 8 + col, hàng 0 là hàng 8 của bàn cờ như Board.board):
+- bit 0-5: ô đến, bit 6-11: ô đi
+- bit 12-13: quân phong cấp (PROMOTION_PIECES), bit 14-15: cờ nước đi đặc biệt (NORMAL, PROMOTION, ...)
+Luật của engine chưa có phong cấp, nhập thành và bắt tốt qua đường nên hai trường sau hiện luôn bằng 0,
+nhưng đã có chỗ để thêm mà không đổi định dạng.
+
+Các bộ sinh nước đi trả về nước đi dạng ((hàng, cột), (hàng, cột)) lấy từ MOVE_TABLE, nên mỗi nước đi là một tuple
+dùng chung thay vì một tuple mới mỗi lần sinh; so sánh, làm khóa dict và mọi mã dùng dạng tuple vẫn như cũ.
+Bản ghi hoàn tác (UndoRecord) lưu nước đi dưới dạng mã 16 bit trong một mảng cấp sẵn theo ply.
+"""
+SQUARES = [(square // 8, square % 8) for square in range(64)]
+# MOVE_TABLE[ô đi * 64 + ô đến] là tuple nước đi dùng chung
+MOVE_TABLE = [(SQUARES[start], SQUARES[end]) for start in range(64) for end in range(64)]
+# MOVES_FROM[ô đi][ô đến]: cùng các tuple đó, tách theo ô đi để bộ sinh nước đi chỉ tra một lần mỗi quân
+MOVES_FROM = [MOVE_TABLE[start * 64:(start + 1) * 64] for start in range(64)]
+
+# Số bản ghi hoàn tác cấp sẵn cho mỗi bàn cờ; ván dài hơn thì mảng được nới thêm khi cần
+UNDO_STACK_SIZE = 256
+
+NORMAL, PROMOTION, EN_PASSANT, CASTLING = 0, 1, 2, 3
+PROMOTION_PIECES = "nbrq"
+
+
+def encode_move(move, promotion=None, flag=NORMAL):
+    """Mã 16 bit của nước đi ((hàng, cột), (hàng, cột)); `promotion` là một chữ trong PROMOTION_PIECES."""
+    (start_row, start_col), (end_row, end_col) = move
+    code = (start_row * 8 + start_col) << 6 | end_row * 8 + end_col
+    if promotion is not None:
+        code |= PROMOTION_PIECES.index(promotion.lower()) << 12
+        flag = PROMOTION
+    return code | flag << 14
+
+
+def decode_move(code):
+    """Nước đi dạng tuple (dùng chung, không cấp phát) của mã `code`; bỏ qua các bit phong cấp và cờ."""
+    return MOVE_TABLE[code & 0xFFF]
+
+
+def move_flag(code):
+    return code >> 14
+
+
+def move_promotion(code):
+    # Chữ của quân phong cấp, hoặc None nếu không phải nước phong cấp
+    return PROMOTION_PIECES[code >> 12 & 3] if code >> 14 == PROMOTION else None
+
+
+def square_name(square):
+    return f"{chr(square % 8 + ord('a'))}{8 - square // 8}"
+
+
+def move_to_text(code):
+    """Mã nước đi -> chuỗi dạng utils.parse_move, ví dụ "e2 e4"."""
+    return f"{square_name(code >> 6 & 63)} {square_name(code & 63)}"
+
+
+def text_to_move(text):
+    """Chuỗi "e2 e4" (định dạng của utils.parse_move) -> mã nước đi; ném ValueError nếu sai định dạng."""
+    try:
+        start, end = text.split()
+        squares = []
+        for name in (start, end):
+            if len(name) != 2:
+                raise ValueError
+            col, row = ord(name[0]) - ord('a'), 8 - int(name[1])
+            if not (0 <= col < 8 and 0 <= row < 8):
+                raise ValueError
+            squares.append(row * 8 + col)
+    except ValueError:
+        raise ValueError(f"Nước đi không đúng định dạng: {text!r}") from None
+    return squares[0] << 6 | squares[1]
+
+
+class UndoRecord:
+    """Bản ghi hoàn tác của một nửa nước: mã nước đi 16 bit, quân di chuyển và quân bị ăn (hoặc '.').
+
+    Board cấp sẵn một mảng các bản ghi và ghi đè bản ghi của từng ply, nên Board.move không cấp phát đối tượng mới.
+    """
+    __slots__ = ("move", "piece", "captured")
+
+    def __init__(self):
+        self.move = 0
+        self.piece = self.captured = '.'
@@ -0,0 +1,133 @@
+"""Tìm kiếm song song ở gốc: chia các nước đi ở gốc cho nhiều tiến trình.
+
+Thế cờ được gửi đi dưới dạng chuỗi 64 ký tự (Board.serialize). Các tiến trình dùng chung một cận (alpha với bên
+trắng, beta với bên đen) trong bộ nhớ chia sẻ; mọi nút của minimax đọc lại cận này (SearchContext.shared_bound),
+nên cả nước đi đang được tìm cũng bị cắt tỉa ngay khi tiến trình khác tìm được nước đi tốt hơn ở gốc.
+Nước đi ở gốc được sắp xếp như find_best_move với một MoveOrderer mới, và nước đi đầu tiên được tìm xong trước
+(như YBWC) để có cận tốt cho các nước đi còn lại. Mỗi tiến trình giữ MoveOrderer và (mặc định) bảng chuyển vị riêng
+qua các lần tìm kiếm.
+
+Với `tt=False`, kết quả trùng với find_best_move(board, depth, color, orderer=MoveOrderer()) chạy tuần tự. Có bảng
+chuyển vị thì, như find_best_move có `tt`, một mục sâu hơn có thể thay cho tìm kiếm đúng độ sâu, nên hai bên có thể
+chọn khác nhau giữa các nước đi gần bằng điểm. Tìm kiếm song song chỉ nhanh hơn khi có nhiều nhân CPU thật;
+đo bằng `python benchmark.py parallel`.
+"""
+import math
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from board import create_board
+from minimax import SearchContext, minimax
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+_shared_bound = None  # multiprocessing.Value dùng chung, được gán trong từng tiến trình con
+_worker_orderer = None
+_worker_tt = None  # Bảng chuyển vị của từng tiến trình con, giữ qua các lần tìm kiếm
+_worker_search_id = None
+
+
+def _init_worker(shared_bound):
+    global _shared_bound, _worker_orderer, _worker_tt
+    _shared_bound = shared_bound
+    _worker_orderer = MoveOrderer()
+    _worker_tt = TranspositionTable()
+
+
+def _search_root_move(state, backend, move, depth, color, use_shared_bound, use_tt, search_id):
+    # Chạy trong tiến trình con: đánh giá một nước đi ở gốc, trả về (điểm, cận chặt nhất đã dùng)
+    global _worker_search_id
+    if search_id != _worker_search_id:
+        _worker_search_id = search_id
+        _worker_orderer.new_search()
+        _worker_tt.new_search()
+    board = create_board(backend)
+    board.deserialize(state)
+    is_maximizing = color == 'white'
+    context = SearchContext(_worker_tt if use_tt else None, _worker_orderer,
+                            shared_bound=_shared_bound if use_shared_bound else None,
+                            shared_maximizing=is_maximizing)
+    alpha, beta = -math.inf, math.inf
+    if use_shared_bound:
+        alpha, beta = context.shared_window(alpha, beta)
+    board.move(*move)
+    score = minimax(board, depth - 1, not is_maximizing, alpha, beta, context, 1)
+    with _shared_bound.get_lock():
+        if (is_maximizing and score > _shared_bound.value) or (not is_maximizing and score < _shared_bound.value):
+            _shared_bound.value = score
+    return score, context.shared_seen
+
+
+class ParallelSearcher:
+    """Giữ một nhóm tiến trình để tìm nước đi tốt nhất song song; dùng được với `with`."""
+
+    def __init__(self, workers=None, backend="mailbox", tt=True):
+        self.workers = workers or os.cpu_count() or 1
+        self.backend = backend
+        self.tt = tt  # Mỗi tiến trình con dùng bảng chuyển vị riêng (giữ qua các lần tìm kiếm)
+        self.search_id = 0
+        self.shared_bound = multiprocessing.Value('d', 0.0)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.shared_bound,))
+
+    def find_best_move(self, board, depth, color):
+        """Như minimax.find_best_move với MoveOrderer (và bảng chuyển vị nếu `tt`), nhưng chia nước đi ở gốc
+        cho các tiến trình."""
+        moves = board.get_legal_moves(color)
+        if not moves:
+            return None
+        moves = MoveOrderer().order(board, moves, 0)  # Cùng thứ tự ở gốc với find_best_move(orderer=MoveOrderer())
+        is_maximizing = color == 'white'
+        state = board.serialize()
+        self.search_id += 1
+        self.shared_bound.value = -math.inf if is_maximizing else math.inf
+
+        def submit(move, use_shared_bound):
+            return self.executor.submit(_search_root_move, state, self.backend, move, depth, color,
+                                        use_shared_bound, self.tt, self.search_id)
+
+        # Tìm nước đi đầu tiên trước để có cận tốt cho các nước đi còn lại
+        scores = {0: submit(moves[0], False).result()}
+        futures = {submit(move, True): index for index, move in enumerate(moves) if index > 0}
+        for future in as_completed(futures):
+            scores[futures[future]] = future.result()
+
+        best_index = self._choose(scores, is_maximizing)
+        # Nước đi đứng trước có điểm cận bằng đúng điểm tốt nhất có thể hòa điểm: tìm lại với cửa sổ đầy đủ
+        # để chọn giống hệt tìm kiếm tuần tự (nước đi đầu tiên đạt điểm tốt nhất)
+        best_score = scores[best_index][0]
+        retry = [index for index in range(best_index) if scores[index][0] == best_score]
+        futures = {submit(moves[index], False): index for index in retry}
+        for future in as_completed(futures):
+            scores[futures[future]] = future.result()
+        return moves[self._choose(scores, is_maximizing)]
+
+    @staticmethod
+    def _choose(scores, is_maximizing):
+        # Chọn nước đi có điểm chính xác tốt nhất (điểm vượt qua cận đã dùng), ưu tiên nước đi đứng trước
+        best_index = None
+        for index in sorted(scores):
+            score, bound = scores[index]
+            exact = score > bound if is_maximizing else score < bound
+            if not exact:
+                continue
+            if best_index is None or (score > scores[best_index][0] if is_maximizing
+                                      else score < scores[best_index][0]):
+                best_index = index
+        return best_index if best_index is not None else 0
+
+    def close(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parallel_find_best_move(board, depth, color, workers=None, backend="mailbox", tt=True):
+    """Tìm nước đi tốt nhất bằng một nhóm tiến trình tạm thời."""
+    with ParallelSearcher(workers, backend, tt) as searcher:
+        return searcher.find_best_move(board, depth, color)
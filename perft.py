@@ -0,0 +1,193 @@
+"""Perft: đếm số nút của cây nước đi hợp lệ để kiểm tra và đo tốc độ bộ sinh nước đi.
+
+Chạy: python perft.py [--depth N] [--backend list|mailbox|bitboard] [--position tên] [--divide]
+                      [--compare-backends] [--check-validator]
+"""
+import argparse
+import contextlib
+import io
+import time
+
+from board import create_board
+from utils import parse_placement, validate_user_move
+
+# Các thế cờ kiểm tra: (tên, vị trí quân theo FEN, bên đi trước)
+TEST_POSITIONS = [
+    ("startpos", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR", "white"),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R", "white"),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8", "white"),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1", "white"),
+    ("black-to-move", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R", "black"),
+]
+
+
+# Số nút theo độ sâu 1, 2, 3, 4 lấy từ bảng perft chuẩn. Luật của engine không có nhập thành, bắt tốt qua đường
+# và phong cấp, nên chỉ "startpos" (chưa tới được các luật đó trong 4 nửa nước) dùng được bảng chuẩn.
+KNOWN_COUNTS = {
+    "startpos": [20, 400, 8902, 197281],
+}
+
+# Mốc hồi quy: số nút do chính bộ sinh nước đi của engine tạo ra (đã đối chiếu giữa ba cách biểu diễn bàn cờ và
+# giữa sinh nước đi hợp lệ / giả hợp lệ). Chúng không phải giá trị đã biết là đúng: một lỗi chung của cả ba cách
+# biểu diễn sẽ nằm sẵn trong các số này. Chỉ dùng để phát hiện thay đổi so với trước.
+REGRESSION_COUNTS = {
+    "kiwipete": [46, 1865, 86585, 3488552],
+    "endgame": [14, 191, 2810, 43087],
+    "middlegame": [46, 2079, 89890, 3894594],
+    "black-to-move": [34, 1244, 42746, 1610212],
+}
+
+
+def opponent(color):
+    return 'black' if color == 'white' else 'white'
+
+
+def perft(board, depth, color, legal=True):
+    """Đếm số nút lá ở độ sâu `depth`.
+
+    Mặc định dùng get_legal_moves; với `legal=False` thì sinh nước đi giả hợp lệ rồi
+    thử từng nước và loại những nước để vua mình bị chiếu (cách kiểm tra cũ).
+    """
+    if depth == 0:
+        return 1
+    if legal:
+        moves = board.get_legal_moves(color)
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for start, end in moves:
+            board.move(start, end)
+            nodes += perft(board, depth - 1, opponent(color))
+            board.undo_move()
+        return nodes
+    nodes = 0
+    for start, end in board.get_all_moves(color):
+        board.move(start, end)
+        if not board.is_in_check(color):
+            nodes += perft(board, depth - 1, opponent(color), legal=False)
+        board.undo_move()
+    return nodes
+
+
+def divide(board, depth, color):
+    """Số nút perft tách theo từng nước đi ở gốc (dùng để khoanh vùng nước đi bị sinh sai)."""
+    counts = {}
+    for start, end in board.get_legal_moves(color):
+        board.move(start, end)
+        counts[(start, end)] = perft(board, depth - 1, opponent(color))
+        board.undo_move()
+    return counts
+
+
+def format_move(move):
+    (start_row, start_col), (end_row, end_col) = move
+    return f"{chr(start_col + ord('a'))}{8 - start_row} {chr(end_col + ord('a'))}{8 - end_row}"
+
+
+def run_suite(depth, backend="list", positions=TEST_POSITIONS, show_divide=False):
+    """Chạy perft từ độ sâu 1 tới `depth` cho từng thế cờ, in số nút, số nút/giây và so với KNOWN_COUNTS
+    (hoặc REGRESSION_COUNTS với các thế cờ không có số liệu chuẩn).
+
+    Trả về danh sách (tên, độ sâu, số nút, số nút mong đợi) của các kết quả không khớp.
+    """
+    failures = []
+    for name, placement, color in positions:
+        board = create_board(backend)
+        board.set_position(parse_placement(placement))
+        for current_depth in range(1, depth + 1):
+            start_time = time.perf_counter()
+            nodes = perft(board, current_depth, color)
+            elapsed = time.perf_counter() - start_time
+            regression = name not in KNOWN_COUNTS
+            known = REGRESSION_COUNTS.get(name, []) if regression else KNOWN_COUNTS[name]
+            expected = known[current_depth - 1] if current_depth <= len(known) else None
+            if expected is None:
+                verdict = "?"
+            elif regression:
+                verdict = "OK (mốc hồi quy)" if nodes == expected else f"KHÁC mốc hồi quy {expected}"
+            else:
+                verdict = "OK" if nodes == expected else f"SAI (đúng là {expected})"
+            if expected is not None and nodes != expected:
+                failures.append((name, current_depth, nodes, expected))
+            print(f"{name:14} depth={current_depth} nodes={nodes:10d} time={elapsed:8.3f}s "
+                  f"nps={nodes / elapsed if elapsed else 0:10.0f} {verdict}")
+        if show_divide:
+            for move, nodes in sorted(divide(board, depth, color).items(), key=lambda item: format_move(item[0])):
+                print(f"  {format_move(move)}: {nodes}")
+    return failures
+
+
+def check_validator(board, color, depth=1):
+    """So sánh utils.validate_user_move với nước đi giả hợp lệ của Board trên mọi cặp ô (ô đi, ô đến).
+
+    validate_user_move không xét vua có bị chiếu hay không, nên chuẩn so sánh là get_all_moves.
+    Duyệt cây nước đi tới độ sâu `depth`; trả về danh sách (vị trí, màu, nước đi, Board sinh, validate chấp nhận)
+    của các trường hợp khác nhau.
+    """
+    mismatches = []
+    generated = set(board.get_all_moves(color))
+    squares = [(row, col) for row in range(8) for col in range(8)]
+    with contextlib.redirect_stdout(io.StringIO()):  # validate_user_move in thông báo cho từng nước đi
+        for start in squares:
+            for end in squares:
+                if start == end:
+                    continue
+                accepted = validate_user_move(board.board, format_move((start, end)), color)
+                if accepted != ((start, end) in generated):
+                    mismatches.append((board.serialize(), color, (start, end), not accepted, accepted))
+    if depth > 1:
+        for start, end in board.get_legal_moves(color):
+            board.move(start, end)
+            mismatches.extend(check_validator(board, opponent(color), depth - 1))
+            board.undo_move()
+    return mismatches
+
+
+def compare_backends(depth, backends=("list", "mailbox", "bitboard"), positions=TEST_POSITIONS):
+    """Chạy perft trên từng cách biểu diễn bàn cờ (cả sinh nước đi hợp lệ lẫn giả hợp lệ);
+    trả về danh sách thế cờ cho kết quả khác nhau."""
+    mismatches = []
+    for name, placement, color in positions:
+        counts = {}
+        for backend in backends:
+            board = create_board(backend)
+            board.set_position(parse_placement(placement))
+            counts[backend] = perft(board, depth, color)
+            counts[f"{backend}/pseudo"] = perft(board, depth, color, legal=False)
+        print(name, counts)
+        if len(set(counts.values())) > 1:
+            mismatches.append((name, counts))
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perft: kiểm tra và đo tốc độ bộ sinh nước đi")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--backend", choices=("list", "mailbox", "bitboard"), default="list")
+    parser.add_argument("--position", choices=[name for name, _, _ in TEST_POSITIONS],
+                        help="chỉ chạy một thế cờ (mặc định: tất cả)")
+    parser.add_argument("--divide", action="store_true", help="in số nút theo từng nước đi ở gốc")
+    parser.add_argument("--compare-backends", action="store_true", help="đối chiếu perft giữa các cách biểu diễn")
+    parser.add_argument("--check-validator", action="store_true",
+                        help="đối chiếu utils.validate_user_move với nước đi do Board sinh (duyệt tới --depth)")
+    args = parser.parse_args()
+    positions = [entry for entry in TEST_POSITIONS if args.position in (None, entry[0])]
+
+    if args.compare_backends:
+        mismatches = compare_backends(args.depth, positions=positions)
+        print("OK" if not mismatches else f"Sai khác: {mismatches}")
+    elif args.check_validator:
+        for name, placement, color in positions:
+            board = create_board(args.backend)
+            board.set_position(parse_placement(placement))
+            mismatches = check_validator(board, color, args.depth)
+            print(f"{name:14} {'OK' if not mismatches else f'{len(mismatches)} nước đi khác nhau'}")
+            for state, side, move, generated, accepted in mismatches[:10]:
+                print(f"  {state} {side} {format_move(move)}: Board sinh={generated} validate={accepted}")
+    else:
+        failures = run_suite(args.depth, args.backend, positions, args.divide)
+        print("OK" if not failures else f"Sai: {failures}")
+
+
+if __name__ == "__main__":
+    main()
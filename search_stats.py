@@ -0,0 +1,135 @@
+"""Số liệu của một lần tìm kiếm: số nút, cắt tỉa, hệ số phân nhánh, thời gian từng lần lặp và từng phần việc."""
+import contextlib
+import math
+import time
+
+# Các hàm của Board được đo thời gian, theo nhóm
+TIMED_METHODS = {
+    "get_legal_moves": "movegen",
+    "get_legal_captures": "movegen",
+    "is_in_check": "check",
+    "evaluate": "evaluate",
+}
+
+
+class SearchStats:
+    """Số liệu tìm kiếm, gắn vào SearchContext(stats=...). Khi không gắn, tìm kiếm không tốn thêm chi phí nào.
+
+    Đọc kết quả bằng `as_dict()` hoặc `log_line()`; `callback(dict)` (nếu có) được gọi sau mỗi lần lặp.
+    Thời gian sinh nước đi / kiểm tra chiếu / đánh giá được đo bằng cách bọc các hàm của đối tượng bàn cờ
+    trong lúc tìm kiếm (`instrument`), nên mã của Board không phải thay đổi.
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.reset()
+
+    def reset(self):
+        self.nodes = self.qnodes = self.evaluate_calls = 0
+        self.cutoffs = self.first_move_cutoffs = 0
+        self.iterations = []  # (độ sâu, thời gian, số nút của riêng lần lặp đó)
+        self.times = {"movegen": 0.0, "check": 0.0, "evaluate": 0.0}
+
+    def record_cutoff(self, move_index):
+        self.cutoffs += 1
+        if move_index == 0:
+            self.first_move_cutoffs += 1
+
+    def record_iteration(self, depth, elapsed, nodes, qnodes):
+        # Gọi khi một lần lặp hoàn thành; `nodes`/`qnodes` là tổng tích lũy của SearchContext
+        self.iterations.append((depth, elapsed, nodes + qnodes - self.nodes - self.qnodes))
+        self.nodes, self.qnodes = nodes, qnodes
+        if self.callback is not None:
+            self.callback(self.as_dict())
+
+    def effective_branching_factor(self):
+        # Tỉ lệ số nút giữa hai lần lặp cuối; nếu chỉ có một lần lặp thì lấy căn bậc `độ sâu` của số nút
+        if len(self.iterations) >= 2 and self.iterations[-2][2]:
+            return self.iterations[-1][2] / self.iterations[-2][2]
+        if self.iterations and self.iterations[-1][2]:
+            depth, _, nodes = self.iterations[-1]
+            return math.pow(nodes, 1 / depth)
+        return 0.0
+
+    @contextlib.contextmanager
+    def instrument(self, board):
+        """Bọc các hàm sinh nước đi, kiểm tra chiếu và đánh giá của `board` để đo thời gian trong khối `with`."""
+        saved = {}
+        for name, group in TIMED_METHODS.items():
+            saved[name] = board.__dict__.get(name)
+            setattr(board, name, self._timed(getattr(board, name), group))
+        saved["staged_moves"] = board.__dict__.get("staged_moves")
+        board.staged_moves = self._timed_generator(board.staged_moves)
+        try:
+            yield self
+        finally:
+            for name, original in saved.items():
+                if original is None:
+                    del board.__dict__[name]
+                else:
+                    setattr(board, name, original)
+
+    def _timed(self, function, group):
+        times = self.times
+        perf_counter = time.perf_counter
+        counts_evaluate = group == "evaluate"
+
+        def timed(*args):
+            start = perf_counter()
+            result = function(*args)
+            times[group] += perf_counter() - start
+            if counts_evaluate:
+                # Mọi lần gọi evaluate (nút lá, stand-pat của tìm kiếm tĩnh, cắt tỉa vô vọng), không chỉ nút lá
+                self.evaluate_calls += 1
+            return result
+
+        return timed
+
+    def _timed_generator(self, function):
+        # Nước đi theo giai đoạn được sinh dần: cộng thời gian của từng lần lấy nước đi tiếp theo
+        times = self.times
+        perf_counter = time.perf_counter
+
+        def timed(*args):
+            iterator = function(*args)
+            while True:
+                start = perf_counter()
+                try:
+                    move = next(iterator)
+                except StopIteration:
+                    times["movegen"] += perf_counter() - start
+                    return
+                times["movegen"] += perf_counter() - start
+                yield move
+
+        return timed
+
+    def as_dict(self):
+        elapsed = sum(iteration_time for _, iteration_time, _ in self.iterations)
+        total_nodes = self.nodes + self.qnodes
+        return {
+            "depth": self.iterations[-1][0] if self.iterations else 0,
+            "nodes": self.nodes,
+            "qnodes": self.qnodes,
+            "nps": total_nodes / elapsed if elapsed else 0.0,
+            "evaluate_calls": self.evaluate_calls,
+            "cutoffs": self.cutoffs,
+            "first_move_cutoffs": self.first_move_cutoffs,
+            "later_cutoffs": self.cutoffs - self.first_move_cutoffs,
+            "first_move_cutoff_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0,
+            "branching_factor": self.effective_branching_factor(),
+            "iteration_times": [(depth, iteration_time) for depth, iteration_time, _ in self.iterations],
+            "time": elapsed,
+            "movegen_time": self.times["movegen"],
+            "check_time": self.times["check"],
+            "evaluate_time": self.times["evaluate"],
+        }
+
+    def log_line(self):
+        # Một dòng "khóa=giá trị" dễ lọc bằng grep/awk
+        stats = self.as_dict()
+        return (f"depth={stats['depth']} nodes={stats['nodes']} qnodes={stats['qnodes']} nps={stats['nps']:.0f} "
+                f"evaluate_calls={stats['evaluate_calls']} cutoffs={stats['cutoffs']} "
+                f"first_move_cutoff_rate={stats['first_move_cutoff_rate']:.3f} ebf={stats['branching_factor']:.2f} "
+                f"time={stats['time']:.3f} movegen={stats['movegen_time']:.3f} check={stats['check_time']:.3f} "
+                f"evaluate={stats['evaluate_time']:.3f}")
@@ -0,0 +1,517 @@
+"""Bảng tàn cuộc tạo tại máy bằng phân tích ngược (retrograde analysis), cho tàn cuộc 3-4 quân không có tốt.
+
+Mỗi bảng (ví dụ "KQKR": trắng có vua + hậu, đen có vua + xe) là một tệp trong thư mục `tablebases/`, mỗi thế cờ
+một byte: 0 là hòa, còn lại là (số nửa nước tới khi chiếu hết + 1); số nửa nước lẻ thì bên đi thắng, chẵn thì bên đi
+thua. Thế cờ được chuẩn hóa theo 8 phép đối xứng của bàn cờ (vua trắng luôn ở tam giác a8-d8-d5) nên chỉ số là
+(bên đi, ô vua trắng trong tam giác, ô các quân còn lại) và tra cứu chỉ là đọc một byte từ tệp đã mmap.
+
+Tạo bảng (các bảng con cần cho nước ăn quân được tạo trước, bảng đã có thì dùng lại):
+
+    python tablebase.py generate [KQK KRK KQKR ...] [--workers N]
+    python tablebase.py probe "8/8/8/3k4/8/8/8/KQ6" white
+
+Chỉ bước phân loại ban đầu (chiếu hết, nước ăn quân sang bảng con) chạy song song trên `--workers` tiến trình;
+các lượt duyệt ngược theo từng mức chạy tuần tự trong tiến trình chính.
+Hết cờ mà không bị chiếu được tính là hòa, giống như trong minimax.
+Luật của engine không có phong cấp nên tàn cuộc có tốt không được hỗ trợ.
+"""
+import argparse
+import mmap
+import os
+import time
+from collections import defaultdict
+from multiprocessing import Pool
+
+from board import Board
+from utils import parse_placement
+
+TABLEBASE_DIR = "tablebases"
+DEFAULT_SIGNATURES = ["KQK", "KRK", "KBK", "KNK", "KQKQ", "KQKR", "KQKB", "KQKN", "KRKR", "KRKB", "KRKN",
+                      "KBBK", "KBNK", "KNNK", "KQQK", "KQRK", "KRRK"]
+PIECE_ORDER = "QRBN"  # Thứ tự quân (trừ vua) trong chữ ký bảng, quân mạnh trước
+
+# Điểm (theo quan điểm bên trắng) của thế cờ thắng theo bảng: TABLEBASE_WIN - số nửa nước tới khi chiếu hết
+TABLEBASE_WIN = 1000.0
+
+WHITE, BLACK = 0, 1
+
+
+def _steps(offsets):
+    return [[(row + d_row) * 8 + col + d_col for d_row, d_col in offsets
+             if 0 <= row + d_row < 8 and 0 <= col + d_col < 8]
+            for row in range(8) for col in range(8)]
+
+
+def _lines(directions):
+    table = []
+    for row in range(8):
+        for col in range(8):
+            lines = []
+            for d_row, d_col in directions:
+                line = [(row + d_row * i) * 8 + col + d_col * i for i in range(1, 8)
+                        if 0 <= row + d_row * i < 8 and 0 <= col + d_col * i < 8]
+                if line:
+                    lines.append(line)
+            table.append(lines)
+    return table
+
+
+KING_STEPS = _steps([(1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1)])
+KNIGHT_STEPS = _steps([(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)])
+ROOK_LINES = _lines([(1, 0), (-1, 0), (0, 1), (0, -1)])
+BISHOP_LINES = _lines([(1, 1), (1, -1), (-1, 1), (-1, -1)])
+LINES = {'R': ROOK_LINES, 'B': BISHOP_LINES, 'Q': [ROOK_LINES[i] + BISHOP_LINES[i] for i in range(64)]}
+
+# Quan hệ giữa hai ô: cùng hàng/cột (R), cùng đường chéo (B) hay không; và các ô nằm giữa
+ALIGNMENT = [None] * (64 * 64)
+BETWEEN = [()] * (64 * 64)
+for _kind, _table in (('R', ROOK_LINES), ('B', BISHOP_LINES)):
+    for _start in range(64):
+        for _line in _table[_start]:
+            for _i, _end in enumerate(_line):
+                ALIGNMENT[_start * 64 + _end] = _kind
+                BETWEEN[_start * 64 + _end] = tuple(_line[:_i])
+
+# 8 phép đối xứng của bàn cờ (không có tốt nên mọi phép đều giữ nguyên giá trị thế cờ)
+TRANSFORMS = [[f(square // 8, square % 8)[0] * 8 + f(square // 8, square % 8)[1] for square in range(64)]
+              for f in (lambda r, c: (r, c), lambda r, c: (r, 7 - c), lambda r, c: (7 - r, c),
+                        lambda r, c: (7 - r, 7 - c), lambda r, c: (c, r), lambda r, c: (c, 7 - r),
+                        lambda r, c: (7 - c, r), lambda r, c: (7 - c, 7 - r))]
+KING_SLOTS = [row * 8 + col for row in range(4) for col in range(row, 4)]  # Tam giác a8-d8-d5 (10 ô)
+KING_SLOT_INDEX = {square: slot for slot, square in enumerate(KING_SLOTS)}
+# Các phép đối xứng đưa vua trắng vào tam giác: một phép, hoặc hai phép khi vua nằm trên đường chéo của tam giác
+CANONICAL = [[t for t in TRANSFORMS if t[square] in KING_SLOT_INDEX] for square in range(64)]
+
+
+def split_signature(signature):
+    # "KQKR" -> ("KQ", "KR")
+    second_king = signature.index("K", 1)
+    return signature[:second_king], signature[second_king:]
+
+
+def table_pieces(signature):
+    # Danh sách quân theo thứ tự chỉ số: vua trắng, quân trắng, vua đen, quân đen
+    white, black = split_signature(signature)
+    return list(white) + list(black.lower())
+
+
+def table_size(signature):
+    return 2 * len(KING_SLOTS) * 64 ** (len(signature) - 1)
+
+
+def normalize(pieces, squares, side):
+    """Đưa thế cờ (danh sách quân, ô của từng quân, bên đi) về dạng của bảng: trả về (chữ ký, ô theo thứ tự, bên đi).
+
+    Bên mạnh hơn luôn là bên trắng của bảng; nếu bên đen mạnh hơn thì đổi màu hai bên (không có tốt nên đổi màu
+    không làm thay đổi thế cờ).
+    """
+    white = sorted(((piece, square) for piece, square in zip(pieces, squares) if piece.isupper()),
+                   key=lambda item: _rank(item[0]))
+    black = sorted(((piece.upper(), square) for piece, square in zip(pieces, squares) if piece.islower()),
+                   key=lambda item: _rank(item[0]))
+    if _strength(black) < _strength(white):
+        white, black, side = black, white, 1 - side
+    signature = "".join(piece for piece, _ in white) + "".join(piece for piece, _ in black)
+    return signature, [square for _, square in white] + [square for _, square in black], side
+
+
+def _rank(piece):
+    return -1 if piece == "K" else PIECE_ORDER.index(piece)
+
+
+def _strength(pieces):
+    # Khóa so sánh: nhiều quân hơn rồi quân mạnh hơn thì khóa nhỏ hơn
+    return -len(pieces), [_rank(piece) for piece, _ in pieces]
+
+
+def position_index(signature, squares, side):
+    # Chỉ số của thế cờ sau khi đưa vua trắng vào tam giác bằng phép đối xứng. Khi vua nằm trên đường chéo
+    # có nhiều phép như vậy: chọn phép cho chỉ số nhỏ nhất để mọi thế cờ đối xứng nhau có cùng một chỉ số.
+    best = None
+    for transform in CANONICAL[squares[0]]:
+        index = side * len(KING_SLOTS) + KING_SLOT_INDEX[transform[squares[0]]]
+        for square in squares[1:]:
+            index = index * 64 + transform[square]
+        if best is None or index < best:
+            best = index
+    return best
+
+
+def decode_index(signature, index):
+    squares = []
+    for _ in range(len(signature) - 1):
+        index, square = divmod(index, 64)
+        squares.append(square)
+    side, slot = divmod(index, len(KING_SLOTS))
+    return [KING_SLOTS[slot]] + squares[::-1], side
+
+
+def _attacks(piece, start, target, squares):
+    kind = piece.upper()
+    if kind == 'K':
+        return target in KING_STEPS[start]
+    if kind == 'N':
+        return target in KNIGHT_STEPS[start]
+    alignment = ALIGNMENT[start * 64 + target]
+    if alignment is None or (kind != 'Q' and kind != alignment):
+        return False
+    return not any(square in squares for square in BETWEEN[start * 64 + target])
+
+
+def _is_attacked(target, by_side, pieces, squares, skip=None):
+    # Ô `target` có bị quân của bên `by_side` tấn công không (bỏ qua quân thứ `skip` vừa bị ăn)
+    for i, piece in enumerate(pieces):
+        if i != skip and (piece.islower() == (by_side == BLACK)) and _attacks(piece, squares[i], target, squares):
+            return True
+    return False
+
+
+def _targets(piece, start, squares):
+    kind = piece.upper()
+    if kind == 'K':
+        return KING_STEPS[start]
+    if kind == 'N':
+        return KNIGHT_STEPS[start]
+    targets = []
+    for line in LINES[kind][start]:
+        for square in line:
+            targets.append(square)
+            if square in squares:
+                break
+    return targets
+
+
+def legal_children(pieces, squares, side):
+    """Các nước đi hợp lệ: danh sách (ô mới của các quân, chỉ số quân bị ăn hoặc None)."""
+    king = pieces.index('K' if side == WHITE else 'k')
+    children = []
+    for i, piece in enumerate(pieces):
+        if piece.islower() != (side == BLACK):
+            continue
+        for target in _targets(piece, squares[i], squares):
+            captured = squares.index(target) if target in squares else None
+            if captured is not None and pieces[captured].islower() == (side == BLACK):
+                continue
+            child = list(squares)
+            child[i] = target
+            if not _is_attacked(child[king], 1 - side, pieces, child, captured):
+                children.append((child, captured))
+    return children
+
+
+def _is_legal(pieces, squares, side):
+    # Thế cờ hợp lệ: không có hai quân cùng ô và bên không được đi không bị chiếu
+    if len(set(squares)) != len(squares):
+        return False
+    enemy_king = pieces.index('k' if side == WHITE else 'K')
+    return not _is_attacked(squares[enemy_king], side, pieces, squares)
+
+
+def is_win(value):
+    return value > 0 and (value - 1) % 2 == 1
+
+
+def is_loss(value):
+    return value > 0 and (value - 1) % 2 == 0
+
+
+class Tablebases:
+    """Tra bảng tàn cuộc đã tạo trong `directory`. Các tệp được mmap khi cần tới lần đầu."""
+
+    def __init__(self, directory=TABLEBASE_DIR):
+        self.directory = directory
+        self.tables = {}
+        available = [name[:-3] for name in os.listdir(directory) if name.endswith(".tb")] \
+            if os.path.isdir(directory) else []
+        self.max_pieces = max((len(signature) for signature in available), default=0)
+
+    def _table(self, signature):
+        if signature not in self.tables:
+            path = os.path.join(self.directory, f"{signature}.tb")
+            table = None
+            if os.path.exists(path):
+                with open(path, "rb") as file:
+                    table = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.tables[signature] = table
+        return self.tables[signature]
+
+    def probe_value(self, pieces, squares, side):
+        """Giá trị (byte của bảng) cho bên `side`, hoặc None nếu chưa có bảng cho bộ quân này."""
+        signature, squares, side = normalize(pieces, squares, side)
+        if signature == "KK":
+            return 0
+        table = self._table(signature)
+        if table is None:
+            return None
+        return table[position_index(signature, squares, side)]
+
+    def probe(self, board, color):
+        """Tra thế cờ của `board` với bên đi `color`; trả về giá trị byte của bảng hoặc None."""
+        pieces, squares = [], []
+        for row in range(8):
+            for col in range(8):
+                piece = board.board[row][col]
+                if piece != '.':
+                    if piece in "Pp":
+                        return None
+                    pieces.append(piece)
+                    squares.append(row * 8 + col)
+        if len(pieces) > self.max_pieces:
+            return None
+        return self.probe_value(pieces, squares, WHITE if color == 'white' else BLACK)
+
+    def score(self, board, color, ply=0):
+        """Điểm theo quan điểm bên trắng (thắng nhanh hơn thì điểm cao hơn), hoặc None nếu không tra được.
+
+        `ply` là số nửa nước từ gốc tìm kiếm tới thế cờ, để đường thắng ngắn hơn tính từ gốc được ưu tiên.
+        """
+        value = self.probe(board, color)
+        if value is None:
+            return None
+        if value == 0:
+            return 0.0
+        score = TABLEBASE_WIN - (value - 1) - ply
+        winner_is_white = is_win(value) == (color == 'white')
+        return score if winner_is_white else -score
+
+    def best_move(self, board, color):
+        """Nước đi tốt nhất theo bảng: thắng nhanh nhất, nếu không thì hòa, nếu không thì thua chậm nhất."""
+        if self.probe(board, color) is None:
+            return None
+        opponent = 'black' if color == 'white' else 'white'
+        best_move, best_key = None, None
+        for move in board.get_legal_moves(color):
+            board.move(*move)
+            value = self.probe(board, opponent)
+            board.undo_move()
+            if value is None:
+                return None
+            if is_loss(value):
+                key = (2, -value)  # Đối thủ thua: chọn đường chiếu hết ngắn nhất
+            elif value == 0:
+                key = (1, 0)
+            else:
+                key = (0, value)  # Đối thủ thắng: kéo dài càng lâu càng tốt
+            if best_key is None or key > best_key:
+                best_move, best_key = move, key
+        return best_move
+
+    def close(self):
+        for table in self.tables.values():
+            if table is not None:
+                table.close()
+        self.tables = {}
+
+
+def _classify_range(signature, directory, start, stop):
+    # Chạy trong tiến trình con: tìm thế cờ bị chiếu hết, và kết quả suy ra được ngay từ các nước ăn quân
+    # (sang bảng ít quân hơn). Trả về (danh sách thế cờ bị chiếu hết, danh sách (mức, chỉ số) chờ xử lý).
+    tablebases = Tablebases(directory)
+    pieces = table_pieces(signature)
+    mates, pending = [], []
+    for index in range(start, stop):
+        squares, side = decode_index(signature, index)
+        if not _is_legal(pieces, squares, side) or position_index(signature, squares, side) != index:
+            continue  # Thế cờ không hợp lệ, hoặc là bản đối xứng của một chỉ số khác
+        children = legal_children(pieces, squares, side)
+        if not children:
+            king = pieces.index('K' if side == WHITE else 'k')
+            if _is_attacked(squares[king], 1 - side, pieces, squares):
+                mates.append(index)
+            continue
+        # Mức của thế cờ = số nửa nước tới khi chiếu hết; nước ăn quân dẫn tới thế cờ đối thủ thua sau
+        # (value - 1) nửa nước cho mình thắng sau `value` nửa nước
+        win_level, loss_level, escapes = None, 0, False
+        for child, captured in children:
+            if captured is None:
+                escapes = True  # Nước đi trong bảng: kết quả có được khi duyệt ngược
+                continue
+            value = _capture_value(tablebases, pieces, child, captured, 1 - side)
+            if is_loss(value):
+                win_level = value if win_level is None else min(win_level, value)
+            elif is_win(value):
+                loss_level = max(loss_level, value)
+            else:
+                escapes = True  # Ăn quân dẫn tới hòa
+        if win_level is not None:
+            pending.append((win_level, index))
+        elif not escapes:
+            pending.append((loss_level, index))  # Mọi nước đi đều là ăn quân và đều thua
+    return mates, pending
+
+
+def _capture_value(tablebases, pieces, child, captured, side):
+    value = tablebases.probe_value(pieces[:captured] + pieces[captured + 1:], child[:captured] + child[captured + 1:],
+                                   side)
+    if value is None:
+        raise RuntimeError("Thiếu bảng con; hãy tạo bảng ít quân hơn trước")
+    return value
+
+
+class _Generator:
+    """Tạo một bảng bằng duyệt ngược theo từng mức (số nửa nước tới khi chiếu hết).
+
+    Bước phân loại chia cho `workers` tiến trình; các lượt duyệt ngược cần đọc và ghi chung `values` nên chạy tuần tự.
+    """
+
+    def __init__(self, signature, directory, workers):
+        self.signature = signature
+        self.directory = directory
+        self.workers = workers
+        self.pieces = table_pieces(signature)
+        self.values = bytearray(table_size(signature))
+        self.tablebases = Tablebases(directory)
+
+    def run(self):
+        mates, pending = self._classify()
+        for index in mates:
+            self.values[index] = 1  # Bị chiếu hết: thua sau 0 nửa nước
+        frontier = mates
+        level = 0
+        while frontier or pending:
+            level += 1
+            resolved = []
+            if level % 2 == 1:
+                # Đối thủ có một nước dẫn tới thế cờ thua (cho bên vừa bị chiếu): thắng
+                for index in frontier:
+                    for predecessor in self._predecessors(index):
+                        if not self.values[predecessor]:
+                            self.values[predecessor] = level + 1
+                            resolved.append(predecessor)
+            else:
+                # Thua khi mọi nước đi đều dẫn tới thế cờ thắng cho đối thủ
+                checked = set()
+                for index in frontier:
+                    for predecessor in self._predecessors(index):
+                        if self.values[predecessor] or predecessor in checked:
+                            continue
+                        checked.add(predecessor)
+                        loss_level = self._loss_level(predecessor)
+                        if loss_level == level:
+                            self.values[predecessor] = level + 1
+                            resolved.append(predecessor)
+                        elif loss_level is not None:
+                            pending[loss_level].append(predecessor)
+            for index in pending.pop(level, []):
+                if not self.values[index]:
+                    self.values[index] = level + 1
+                    resolved.append(index)
+            frontier = resolved
+            if level >= 254:
+                break
+        return self.values
+
+    def _classify(self):
+        size = len(self.values)
+        chunks = max(1, self.workers * 4)
+        bounds = [(size * i // chunks, size * (i + 1) // chunks) for i in range(chunks)]
+        tasks = [(self.signature, self.directory, start, stop) for start, stop in bounds]
+        if self.workers > 1:
+            with Pool(self.workers) as pool:
+                results = pool.starmap(_classify_range, tasks)
+        else:
+            results = [_classify_range(*task) for task in tasks]
+        mates, pending = [], defaultdict(list)
+        for chunk_mates, chunk_pending in results:
+            mates.extend(chunk_mates)
+            for level, index in chunk_pending:
+                pending[level].append(index)
+        return mates, pending
+
+    def _predecessors(self, index):
+        # Các thế cờ (đã chuẩn hóa) mà từ đó bên vừa đi có một nước không ăn quân dẫn tới thế cờ `index`
+        pieces = self.pieces
+        squares, side = decode_index(self.signature, index)
+        mover = 1 - side
+        predecessors = []
+        for i, piece in enumerate(pieces):
+            if piece.islower() != (mover == BLACK):
+                continue
+            for origin in _targets(piece, squares[i], squares):
+                if origin in squares:
+                    continue
+                previous = list(squares)
+                previous[i] = origin
+                if _is_legal(pieces, previous, mover):
+                    predecessors.append(position_index(self.signature, previous, mover))
+        return predecessors
+
+    def _loss_level(self, index):
+        # Nếu mọi nước đi đều dẫn tới thế cờ đối thủ thắng: trả về mức thua (nửa nước dài nhất + 1), nếu không None
+        squares, side = decode_index(self.signature, index)
+        worst = 0
+        for child, captured in legal_children(self.pieces, squares, side):
+            if captured is None:
+                value = self.values[position_index(self.signature, child, 1 - side)]
+            else:
+                value = _capture_value(self.tablebases, self.pieces, child, captured, 1 - side)
+            if not is_win(value):
+                return None
+            worst = max(worst, value)
+        return worst
+
+
+def dependencies(signature):
+    # Các bảng con sinh ra khi một quân (không phải vua) bị ăn
+    result = set()
+    pieces = table_pieces(signature)
+    for i, piece in enumerate(pieces):
+        if piece.upper() != 'K':
+            sub_signature, _, _ = normalize(pieces[:i] + pieces[i + 1:], list(range(len(pieces) - 1)), WHITE)
+            if sub_signature != "KK":
+                result.add(sub_signature)
+    return result
+
+
+def generate(signatures, directory=TABLEBASE_DIR, workers=None):
+    """Tạo các bảng còn thiếu (kèm bảng con) trong `directory`; bảng đã có thì bỏ qua. Trả về các bảng vừa tạo."""
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(directory, exist_ok=True)
+    created = []
+    for signature in signatures:
+        signature = normalize(table_pieces(signature), list(range(len(signature))), WHITE)[0]
+        created += generate(sorted(dependencies(signature)), directory, workers)
+        path = os.path.join(directory, f"{signature}.tb")
+        if os.path.exists(path):
+            continue
+        values = _Generator(signature, directory, workers).run()
+        with open(path + ".tmp", "wb") as file:
+            file.write(values)
+        os.replace(path + ".tmp", path)  # Tệp chỉ xuất hiện khi đã ghi xong
+        created.append(signature)
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tạo và tra bảng tàn cuộc")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    generate_parser = subparsers.add_parser("generate", help="tạo bảng tàn cuộc")
+    generate_parser.add_argument("signatures", nargs="*", default=DEFAULT_SIGNATURES)
+    generate_parser.add_argument("--workers", type=int)
+    generate_parser.add_argument("--directory", default=TABLEBASE_DIR)
+    probe_parser = subparsers.add_parser("probe", help="tra một thế cờ (vị trí quân theo FEN)")
+    probe_parser.add_argument("placement")
+    probe_parser.add_argument("color", choices=("white", "black"))
+    probe_parser.add_argument("--directory", default=TABLEBASE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "generate":
+        for signature in args.signatures:
+            start_time = time.perf_counter()
+            created = generate([signature], args.directory, args.workers)
+            print(f"{signature}: {'đã tạo ' + ', '.join(created) if created else 'đã có'} "
+                  f"({time.perf_counter() - start_time:.1f}s)")
+    else:
+        board = Board()
+        board.set_position(parse_placement(args.placement))
+        tablebases = Tablebases(args.directory)
+        value = tablebases.probe(board, args.color)
+        if value is None:
+            print("Không có trong bảng")
+        else:
+            result = "hòa" if value == 0 else f"{'thắng' if is_win(value) else 'thua'} sau {value - 1} nửa nước"
+            print(f"{args.color}: {result}, nước đi tốt nhất {tablebases.best_move(board, args.color)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""Kiểm tra bộ sinh nước đi: perft (số liệu chuẩn, mốc hồi quy, đối chiếu giữa các cách biểu diễn bàn cờ)
+và các giai đoạn ăn quân / yên lặng."""
+import pytest
+
+from board import create_board
+from perft import KNOWN_COUNTS, REGRESSION_COUNTS, TEST_POSITIONS, compare_backends, run_suite
+from utils import parse_placement
+
+
+def test_every_position_has_reference_counts():
+    for name, _, _ in TEST_POSITIONS:
+        assert (name in KNOWN_COUNTS) != (name in REGRESSION_COUNTS)
+
+
+@pytest.mark.parametrize("backend", ["list", "mailbox", "bitboard"])
+def test_suite_matches_counts(backend):
+    assert run_suite(3, backend) == []
+
+
+def test_backends_agree():
+    assert compare_backends(3) == []
+
+
+@pytest.mark.parametrize("backend", ["list", "mailbox", "bitboard"])
+def test_captures_and_quiets_partition_all_moves(backend):
+    for _, placement, color in TEST_POSITIONS:
+        board = create_board(backend)
+        board.set_position(parse_placement(placement))
+        rows = board.board
+        quiets = board.get_quiet_moves(color)
+        assert all(rows[end[0]][end[1]] == '.' for _, end in quiets)
+        assert sorted(quiets + board.get_captures(color)) == sorted(board.get_all_moves(color))
@@ -0,0 +1,39 @@
+"""Kiểm tra tìm kiếm: tìm kiếm chọn lọc (null move, LMR, cắt tỉa vô vọng) không làm mất nước đi chiến thuật."""
+import pytest
+
+from benchmark import TACTICAL_POSITIONS
+from board import create_board
+from minimax import SearchContext, find_best_move
+from move_ordering import MoveOrderer
+from parallel import ParallelSearcher
+from utils import parse_placement
+
+# Null move và LMR chỉ áp dụng từ độ sâu 3 bên dưới gốc, nên cần tìm tới độ sâu 4 để chúng thực sự được dùng
+DEPTH = 4
+SELECTIVE_FLAGS = {
+    "full-width": {},
+    "null-move": {"null_move": True},
+    "lmr": {"late_move_reductions": True},
+    "futility": {"futility": True},
+    "all": {"null_move": True, "late_move_reductions": True, "futility": True},
+}
+
+
+@pytest.mark.parametrize("flags", SELECTIVE_FLAGS.values(), ids=SELECTIVE_FLAGS.keys())
+@pytest.mark.parametrize("name, placement, color, expected", TACTICAL_POSITIONS,
+                         ids=[entry[0] for entry in TACTICAL_POSITIONS])
+def test_selective_search_finds_tactic(name, placement, color, expected, flags):
+    board = create_board("mailbox")
+    board.set_position(parse_placement(placement))
+    context = SearchContext(orderer=MoveOrderer(), **flags)
+    assert find_best_move(board, DEPTH, color, context=context) == expected
+
+
+@pytest.mark.parametrize("name, placement, color, expected", TACTICAL_POSITIONS[:3],
+                         ids=[entry[0] for entry in TACTICAL_POSITIONS[:3]])
+def test_parallel_search_matches_serial(name, placement, color, expected):
+    board = create_board("mailbox")
+    board.set_position(parse_placement(placement))
+    serial_move = find_best_move(board, 3, color, orderer=MoveOrderer())
+    with ParallelSearcher(2, tt=False) as searcher:
+        assert searcher.find_best_move(board, 3, color) == serial_move
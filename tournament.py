@@ -0,0 +1,361 @@
+"""Đấu tự động giữa hai cấu hình engine (không dùng pygame), chạy song song trên nhiều tiến trình.
+
+Mỗi cấu hình là chuỗi "khóa=giá trị" cách nhau bởi dấu phẩy: name, depth, time (giây mỗi nước), nodes, backend,
+và các cờ tìm kiếm quiescence, null_move, late_move_reductions, futility (0/1). Ví dụ:
+
+    python tournament.py --engine "name=base,depth=3" --engine "name=lmr,depth=3,late_move_reductions=1" \\
+                         --games 200 --output games.jsonl --pgn games.pgn [--workers N] [--sprt]
+
+Mỗi khai cuộc (lấy từ openings.txt) được đánh hai ván, hai bên đổi màu. Mỗi ván xong được ghi ngay ra tệp
+(JSONL: nước đi, thời gian và số nút từng nước; PGN nếu có --pgn). Tổng kết in ra điểm, chênh lệch Elo
+và tỉ số log-likelihood của SPRT (elo0/elo1) theo góc nhìn của engine thứ nhất.
+"""
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from board import create_board
+from book import parse_book_move, read_games
+from minimax import MAX_SEARCH_DEPTH, SearchContext, find_best_move, search
+from move_ordering import MoveOrderer
+from transposition import TranspositionTable
+
+OPENINGS_PATH = "openings.txt"
+DEFAULT_OPENING_PLIES = 6
+DEFAULT_DEPTH = 3
+MAX_PLIES = 300  # Ván dài hơn được xử hòa
+FLAGS = ("quiescence", "null_move", "late_move_reductions", "futility")
+PIECE_LETTERS = {'n': "N", 'b': "B", 'r': "R", 'q': "Q", 'k': "K", 'p': ""}
+
+
+def parse_engine(text):
+    """Chuyển chuỗi cấu hình "name=a,depth=3,time=0.1,null_move=1" thành dict.
+
+    Không có `depth` thì tìm tới DEFAULT_DEPTH, hoặc sâu dần không giới hạn nếu có `time` hay `nodes`.
+    """
+    config = {"name": None, "depth": None, "time": None, "nodes": None, "backend": "mailbox"}
+    for item in filter(None, text.split(",")):
+        key, _, value = item.partition("=")
+        key = key.strip()
+        if key in ("name", "backend"):
+            config[key] = value
+        elif key in ("depth", "nodes"):
+            config[key] = int(value)
+        elif key == "time":
+            config[key] = float(value)
+        elif key in FLAGS:
+            config[key] = value not in ("0", "false", "no")
+        else:
+            raise ValueError(f"Không có tùy chọn engine '{key}'")
+    if config["name"] is None:
+        config["name"] = text
+    if config["depth"] is None:
+        config["depth"] = MAX_SEARCH_DEPTH if config["time"] is not None or config["nodes"] is not None \
+            else DEFAULT_DEPTH
+    return config
+
+
+def opponent(color):
+    return 'black' if color == 'white' else 'white'
+
+
+def coordinate(move):
+    (start_row, start_col), (end_row, end_col) = move
+    return f"{chr(start_col + ord('a'))}{8 - start_row}{chr(end_col + ord('a'))}{8 - end_row}"
+
+
+def san(board, color, move):
+    """Ký hiệu đại số rút gọn (SAN) của nước đi `move` trước khi đi, ví dụ "Nf3", "exd5", "Rae1+"."""
+    start, end = move
+    piece = board.board[start[0]][start[1]]
+    letter = PIECE_LETTERS[piece.lower()]
+    capture = board.board[end[0]][end[1]] != '.'
+    square = coordinate(move)[2:]
+    if not letter:
+        text = (coordinate(move)[0] + "x" if capture else "") + square
+    else:
+        # Thêm cột/hàng của ô đi khi có quân cùng loại khác cũng đi được tới ô đích
+        others = [other for other, other_end in board.get_legal_moves(color)
+                  if other_end == end and other != start and board.board[other[0]][other[1]] == piece]
+        hint = ""
+        if others:
+            if all(other[1] != start[1] for other in others):
+                hint = coordinate(move)[0]
+            elif all(other[0] != start[0] for other in others):
+                hint = coordinate(move)[1]
+            else:
+                hint = coordinate(move)[:2]
+        text = letter + hint + ("x" if capture else "") + square
+    board.move(start, end)
+    if board.is_in_check(opponent(color)):
+        text += "#" if not board.get_legal_moves(opponent(color)) else "+"
+    board.undo_move()
+    return text
+
+
+def _insufficient_material(board):
+    # Chỉ còn hai vua, hoặc hai vua và một tượng/mã
+    if board.piece_count > 3:
+        return False
+    return all(piece in "KkBbNn." for row in board.board for piece in row)
+
+
+class _Player:
+    """Một cấu hình engine trong một ván: bảng chuyển vị và bộ sắp xếp nước đi được giữ suốt ván."""
+
+    def __init__(self, config):
+        self.config = config
+        self.tt = TranspositionTable()
+        self.orderer = MoveOrderer()
+
+    def choose(self, board, color):
+        # Trả về (nước đi, số nút); có giới hạn thời gian/số nút thì tìm kiếm sâu dần, nếu không thì tìm đúng độ sâu
+        config = self.config
+        context = SearchContext(self.tt, self.orderer, **{flag: config[flag] for flag in FLAGS if flag in config})
+        if config["time"] is None and config["nodes"] is None:
+            move = find_best_move(board, config["depth"], color, context=context)
+        else:
+            move = search(board, color, config["depth"], config["time"], config["nodes"], context=context)["move"]
+        return move, context.nodes + context.qnodes
+
+
+def play_game(game, white, black, opening, max_plies=MAX_PLIES):
+    """Chạy trong tiến trình con: đánh một ván từ các nước khai cuộc `opening` (danh sách nước đi dạng token).
+
+    Trả về dict gồm kết quả ("1-0", "0-1", "1/2-1/2"), lý do kết thúc, và các nước đi kèm thời gian, số nút.
+    """
+    board = create_board(white["backend"])
+    players = {'white': _Player(white), 'black': _Player(black)}
+    color = 'white'
+    moves, sans = [], []
+    for token in opening:
+        move = parse_book_move(board, color, token)
+        if move is None:
+            break
+        sans.append(san(board, color, move))
+        moves.append({"move": coordinate(move), "book": True})
+        board.move(*move)
+        color = opponent(color)
+    opening_plies = len(moves)
+
+    seen = {}
+    result = reason = None
+    while result is None:
+        key = (board.hash, color)
+        seen[key] = seen.get(key, 0) + 1
+        if not board.get_legal_moves(color):
+            if board.is_in_check(color):
+                result, reason = ("0-1" if color == 'white' else "1-0"), "checkmate"
+            else:
+                result, reason = "1/2-1/2", "stalemate"
+        elif seen[key] >= 3:
+            result, reason = "1/2-1/2", "repetition"
+        elif _insufficient_material(board):
+            result, reason = "1/2-1/2", "insufficient material"
+        elif len(moves) >= max_plies:
+            result, reason = "1/2-1/2", "max plies"
+        else:
+            start_time = time.perf_counter()
+            move, nodes = players[color].choose(board, color)
+            elapsed = time.perf_counter() - start_time
+            sans.append(san(board, color, move))
+            moves.append({"move": coordinate(move), "time": round(elapsed, 4), "nodes": nodes})
+            board.move(*move)
+            color = opponent(color)
+    return {"game": game, "white": white["name"], "black": black["name"], "result": result, "reason": reason,
+            "opening_plies": opening_plies, "moves": moves, "san": sans}
+
+
+def format_pgn(record):
+    # Các nước đi dạng SAN, đánh số theo cặp nước
+    tokens = []
+    for ply, move in enumerate(record["san"]):
+        if ply % 2 == 0:
+            tokens.append(f"{ply // 2 + 1}.")
+        tokens.append(move)
+    tokens.append(record["result"])
+    lines, line = [], ""
+    for token in tokens:
+        if line and len(line) + 1 + len(token) > 80:
+            lines.append(line)
+            line = token
+        else:
+            line = f"{line} {token}" if line else token
+    lines.append(line)
+    header = (f'[Event "tournament"]\n[Round "{record["game"] + 1}"]\n[White "{record["white"]}"]\n'
+              f'[Black "{record["black"]}"]\n[Result "{record["result"]}"]\n[Termination "{record["reason"]}"]\n')
+    return header + "\n" + "\n".join(lines) + "\n\n"
+
+
+def score_of(record, name):
+    # Điểm của engine `name` trong ván: 1 thắng, 0.5 hòa, 0 thua
+    if record["result"] == "1/2-1/2":
+        return 0.5
+    winner = record["white"] if record["result"] == "1-0" else record["black"]
+    return 1.0 if winner == name else 0.0
+
+
+def elo_difference(score):
+    # Chênh lệch Elo ứng với tỉ lệ điểm `score` (0 < score < 1)
+    return -400 * math.log10(1 / score - 1) + 0.0  # + 0.0 để không in ra "-0.0" khi hòa điểm
+
+
+def _expected_score(elo):
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+class Summary:
+    """Thống kê thắng/hòa/thua của engine thứ nhất, Elo với khoảng tin cậy 95% và SPRT.
+
+    SPRT dùng xấp xỉ chuẩn của tỉ số log-likelihood giữa H0 (chênh lệch `elo0`) và H1 (chênh lệch `elo1`);
+    dừng khi LLR vượt khỏi [log(beta / (1 - alpha)), log((1 - beta) / alpha)].
+    """
+
+    def __init__(self, name, elo0=0.0, elo1=10.0, alpha=0.05, beta=0.05):
+        self.name = name
+        self.elo0, self.elo1 = elo0, elo1
+        self.lower = math.log(beta / (1 - alpha))
+        self.upper = math.log((1 - beta) / alpha)
+        self.wins = self.draws = self.losses = 0
+        self.nodes = 0
+        self.search_time = 0.0
+
+    def add(self, record):
+        score = score_of(record, self.name)
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.5:
+            self.draws += 1
+        else:
+            self.losses += 1
+        for move in record["moves"]:
+            self.nodes += move.get("nodes", 0)
+            self.search_time += move.get("time", 0.0)
+
+    @property
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def elo(self):
+        # (chênh lệch Elo, sai số 95%); None khi chưa đủ dữ liệu hoặc toàn thắng/toàn thua
+        games = self.games
+        if not games:
+            return None
+        score = (self.wins + self.draws / 2) / games
+        if score <= 0 or score >= 1:
+            return None
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2
+                    + self.losses * score ** 2) / games
+        margin = 1.96 * math.sqrt(variance / games)
+        low, high = max(score - margin, 1e-6), min(score + margin, 1 - 1e-6)
+        return elo_difference(score), (elo_difference(high) - elo_difference(low)) / 2
+
+    def llr(self):
+        games = self.games
+        if not games:
+            return 0.0
+        score = (self.wins + self.draws / 2) / games
+        variance = (self.wins * (1 - score) ** 2 + self.draws * (0.5 - score) ** 2
+                    + self.losses * score ** 2) / games
+        if variance == 0:
+            return 0.0
+        s0, s1 = _expected_score(self.elo0), _expected_score(self.elo1)
+        return games * (s1 - s0) * (2 * score - s0 - s1) / (2 * variance)
+
+    def sprt_verdict(self):
+        llr = self.llr()
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+    def line(self):
+        elo = self.elo()
+        elo_text = "Elo ?" if elo is None else f"Elo {elo[0]:+.1f} ± {elo[1]:.1f}"
+        nps = self.nodes / self.search_time if self.search_time else 0.0
+        verdict = self.sprt_verdict()
+        return (f"{self.name}: {self.games} ván +{self.wins} ={self.draws} -{self.losses} {elo_text} "
+                f"LLR {self.llr():.2f} [{self.lower:.2f}, {self.upper:.2f}]"
+                f"{' -> ' + verdict if verdict else ''} nps(cả hai) {nps:.0f}")
+
+
+def load_openings(path, plies):
+    # Các khai cuộc (danh sách token nước đi), cắt còn `plies` nửa nước; không có tệp thì đánh từ thế cờ ban đầu
+    if not path or not os.path.exists(path):
+        return [[]]
+    openings = [tokens[:plies] for tokens in read_games(path) if tokens]
+    return openings or [[]]
+
+
+def run_tournament(first, second, games, workers=None, output=None, pgn=None, openings=([],),
+                   report_every=10, summary=None, stop_on_sprt=False):
+    """Đánh `games` ván giữa hai cấu hình trên `workers` tiến trình; trả về Summary theo góc nhìn `first`.
+
+    Ván thứ 2k và 2k+1 dùng cùng khai cuộc với hai bên đổi màu. Kết quả được ghi ra tệp ngay khi mỗi ván xong.
+    """
+    if first["name"] == second["name"]:
+        raise ValueError("Hai engine phải có tên khác nhau")
+    summary = summary or Summary(first["name"])
+    workers = workers or os.cpu_count() or 1
+    output_file = open(output, "a", encoding="utf-8") if output else None
+    pgn_file = open(pgn, "a", encoding="utf-8") if pgn else None
+    try:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = []
+            for game in range(games):
+                white, black = (first, second) if game % 2 == 0 else (second, first)
+                opening = openings[(game // 2) % len(openings)]
+                futures.append(executor.submit(play_game, game, white, black, opening))
+            for future in as_completed(futures):
+                record = future.result()
+                summary.add(record)
+                if output_file is not None:
+                    output_file.write(json.dumps(record) + "\n")
+                    output_file.flush()
+                if pgn_file is not None:
+                    pgn_file.write(format_pgn(record))
+                    pgn_file.flush()
+                if report_every and summary.games % report_every == 0:
+                    print(summary.line(), flush=True)
+                if stop_on_sprt and summary.sprt_verdict() is not None:
+                    for pending in futures:
+                        pending.cancel()  # Các ván chưa bắt đầu bị hủy; ván đang đánh vẫn chạy cho xong
+    finally:
+        if output_file is not None:
+            output_file.close()
+        if pgn_file is not None:
+            pgn_file.close()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Đấu tự động giữa hai cấu hình engine")
+    parser.add_argument("--engine", action="append", required=True,
+                        help='cấu hình engine, ví dụ "name=a,depth=3,null_move=1" (cần đúng hai lần)')
+    parser.add_argument("--games", type=int, default=100)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="tệp JSONL ghi từng ván")
+    parser.add_argument("--pgn", help="tệp PGN ghi từng ván")
+    parser.add_argument("--openings", default=OPENINGS_PATH)
+    parser.add_argument("--opening-plies", type=int, default=DEFAULT_OPENING_PLIES)
+    parser.add_argument("--report-every", type=int, default=10)
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=10.0)
+    parser.add_argument("--sprt", action="store_true", help="dừng sớm khi SPRT có kết luận")
+    args = parser.parse_args()
+    if len(args.engine) != 2:
+        parser.error("cần đúng hai --engine")
+
+    first, second = (parse_engine(text) for text in args.engine)
+    summary = run_tournament(first, second, args.games, args.workers, args.output, args.pgn,
+                             load_openings(args.openings, args.opening_plies), args.report_every,
+                             Summary(first["name"], args.elo0, args.elo1), args.sprt)
+    print(summary.line())
+
+
+if __name__ == "__main__":
+    main()
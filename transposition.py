@@ -0,0 +1,70 @@
+"""Bảng chuyển vị (transposition table) kích thước cố định cho minimax."""
+
+# Loại cận của điểm đã lưu
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Kích thước ước lượng của một mục (tuple 6 phần tử và các số nguyên bên trong) trong CPython
+ENTRY_BYTES = 160
+
+REPLACEMENT_POLICIES = ("always", "depth")
+
+
+class TranspositionTable:
+    """Bảng băm cố định số ô, mỗi ô lưu (khóa, độ sâu, điểm, loại cận, nước đi tốt nhất, thế hệ).
+
+    `size_mb` giới hạn bộ nhớ (ước lượng); `replacement` là chính sách ghi đè:
+    - "always": luôn ghi đè ô cũ
+    - "depth": giữ mục có độ sâu lớn hơn, trừ khi mục cũ thuộc lần tìm kiếm trước
+    """
+
+    def __init__(self, size_mb=16, replacement="depth"):
+        if replacement not in REPLACEMENT_POLICIES:
+            raise ValueError(f"Chính sách ghi đè không hợp lệ: {replacement}")
+        self.size = max(1, int(size_mb * 1024 * 1024) // ENTRY_BYTES)
+        self.replacement = replacement
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.probes = self.hits = self.stores = self.overwrites = self.rejected = 0
+
+    def new_search(self):
+        # Đánh dấu lần tìm kiếm mới để các mục cũ được ưu tiên ghi đè
+        self.generation += 1
+
+    def probe(self, key):
+        """Trả về (độ sâu, điểm, loại cận, nước đi) nếu có mục đúng khóa, ngược lại None."""
+        self.probes += 1
+        entry = self.entries[key % self.size]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry[1:5]
+        return None
+
+    def store(self, key, depth, score, bound, move):
+        index = key % self.size
+        entry = self.entries[index]
+        if entry is not None and entry[0] != key:
+            if self.replacement == "depth" and entry[5] == self.generation and entry[1] > depth:
+                self.rejected += 1
+                return
+            self.overwrites += 1
+        self.entries[index] = (key, depth, score, bound, move, self.generation)
+        self.stores += 1
+
+    def clear(self):
+        self.entries = [None] * self.size
+        self.probes = self.hits = self.stores = self.overwrites = self.rejected = 0
+
+    def stats(self):
+        """Thống kê để chọn kích thước bảng: tỉ lệ trúng, tỉ lệ ghi đè và độ đầy."""
+        filled = sum(entry is not None for entry in self.entries)
+        return {
+            "size": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "overwrite_rate": self.overwrites / self.stores if self.stores else 0.0,
+            "rejected": self.rejected,
+            "fill": filled / self.size,
+        }
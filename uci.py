@@ -0,0 +1,208 @@
+"""Giao tiếp theo giao thức UCI qua stdin/stdout (không dùng pygame), để dùng engine với GUI cờ vua và công cụ đấu.
+
+Chạy: python uci.py [--backend list|mailbox|bitboard] [--book book.bin] [--tablebases tablebases]
+
+Hỗ trợ: uci, isready, ucinewgame, position startpos|fen ... [moves ...], go [depth N] [movetime MS] [nodes N]
+[wtime MS btime MS winc MS binc MS movestogo N] [infinite], stop, quit. Tìm kiếm chạy trên luồng riêng nên
+`stop` và `isready` được trả lời ngay; mỗi lần lặp sâu dần xong in một dòng `info depth ... score ... pv ...`.
+"""
+import argparse
+import math
+import os
+import sys
+import threading
+
+from board import create_board
+from book import OpeningBook, parse_book_move
+from minimax import MAX_SEARCH_DEPTH, SearchContext, search
+from move_ordering import MoveOrderer
+from tablebase import TABLEBASE_DIR, TABLEBASE_WIN, Tablebases
+from transposition import TranspositionTable
+
+ENGINE_NAME = "Python Chess"
+DEFAULT_MOVES_TO_GO = 30  # Số nước giả định còn lại khi GUI không gửi movestogo
+MOVE_OVERHEAD = 0.05  # Thời gian (giây) để lại cho việc truyền nước đi
+
+
+def uci_move(move):
+    (start_row, start_col), (end_row, end_col) = move
+    return f"{chr(start_col + ord('a'))}{8 - start_row}{chr(end_col + ord('a'))}{8 - end_row}"
+
+
+def format_score(score, color, pv):
+    # Điểm của minimax theo quan điểm bên trắng (đơn vị tốt) -> "cp N" hoặc "mate N" theo quan điểm bên đi
+    sign = 1 if color == 'white' else -1
+    if math.isinf(score):
+        moves = (len(pv) + 1) // 2
+        return f"mate {moves if score * sign > 0 else -moves}"
+    if abs(score) > TABLEBASE_WIN / 2:
+        plies = TABLEBASE_WIN - abs(score)  # Điểm của bảng tàn cuộc: số nửa nước tới khi chiếu hết
+        moves = int(plies + 1) // 2
+        return f"mate {moves if score * sign > 0 else -moves}"
+    return f"cp {round(score * 100 * sign)}"
+
+
+def allocate_time(color, options):
+    """Thời gian (giây) cho nước đi này theo lệnh go; None nếu không giới hạn thời gian."""
+    if "movetime" in options:
+        return max(0.0, options["movetime"] / 1000 - MOVE_OVERHEAD)
+    remaining = options.get("wtime" if color == 'white' else "btime")
+    if remaining is None:
+        return None
+    increment = options.get("winc" if color == 'white' else "binc", 0)
+    moves_to_go = options.get("movestogo", DEFAULT_MOVES_TO_GO)
+    budget = remaining / moves_to_go + increment * 0.8
+    return max(0.0, min(budget, remaining / 2) / 1000 - MOVE_OVERHEAD)
+
+
+class UCIEngine:
+    """Trạng thái của engine UCI: thế cờ hiện tại và luồng tìm kiếm đang chạy (nếu có)."""
+
+    def __init__(self, output=sys.stdout, backend="mailbox", book=None, tablebases=None):
+        self.output = output
+        self.backend = backend
+        self.book = book
+        self.tablebases = tablebases
+        self.output_lock = threading.Lock()
+        self.tt = TranspositionTable()
+        self.orderer = MoveOrderer()
+        self.board = create_board(backend)
+        self.color = 'white'
+        self.thread = None
+        self.stop = None
+        self.infinite_done = None  # Với "go infinite": bestmove chỉ được in sau lệnh stop
+
+    def send(self, line):
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def handle(self, line):
+        """Xử lý một dòng lệnh; trả về False khi gặp lệnh quit."""
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, args = tokens[0], tokens[1:]
+        if command == "uci":
+            self.send(f"id name {ENGINE_NAME}")
+            self.send("id author python-chess-ai")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop_search()
+            self.tt.clear()
+            self.orderer = MoveOrderer()
+        elif command == "position":
+            self.stop_search()
+            self.set_position(args)
+        elif command == "go":
+            self.stop_search()
+            self.go(args)
+        elif command == "stop":
+            self.stop_search()
+        elif command == "quit":
+            self.stop_search()
+            return False
+        return True
+
+    def set_position(self, args):
+        board = create_board(self.backend)
+        color = 'white'
+        if args and args[0] == "fen":
+            end = args.index("moves") if "moves" in args else len(args)
+            try:
+                color = board.set_fen(" ".join(args[1:end]))
+            except ValueError as error:
+                self.send(f"info string {error}")
+                return
+            args = args[end:]
+        elif args and args[0] == "startpos":
+            args = args[1:]
+        if args and args[0] == "moves":
+            for token in args[1:]:
+                move = parse_book_move(board, color, token)
+                if move is None:
+                    self.send(f"info string nước đi không hợp lệ: {token}")
+                    break
+                board.move(*move)
+                color = 'black' if color == 'white' else 'white'
+        self.board, self.color = board, color
+
+    def go(self, args):
+        options, infinite = {}, False
+        index = 0
+        while index < len(args):
+            name = args[index]
+            if name == "infinite":
+                infinite = True
+            elif name in ("depth", "movetime", "nodes", "wtime", "btime", "winc", "binc", "movestogo"):
+                # Tham số thiếu hoặc không phải số nguyên: bỏ qua tham số đó, đọc tiếp các token sau
+                try:
+                    options[name] = int(args[index + 1])
+                    index += 1
+                except (IndexError, ValueError):
+                    self.send(f"info string thiếu giá trị số nguyên cho {name}")
+            index += 1
+        time_limit = None if infinite else allocate_time(self.color, options)
+        max_depth = options.get("depth", MAX_SEARCH_DEPTH)
+
+        # Bàn cờ riêng cho luồng tìm kiếm, để lệnh position tiếp theo không ảnh hưởng lần tìm kiếm đang chạy
+        board = create_board(self.backend)
+        board.deserialize(self.board.serialize())
+        self.stop = threading.Event()
+        self.infinite_done = threading.Event() if infinite else None
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       args=(board, self.color, max_depth, time_limit, options.get("nodes"),
+                                             self.stop, self.infinite_done))
+        self.thread.start()
+
+    def stop_search(self):
+        # Dừng lần tìm kiếm đang chạy và chờ nó in bestmove
+        if self.thread is None:
+            return
+        self.stop.set()
+        if self.infinite_done is not None:
+            self.infinite_done.set()
+        self.thread.join()
+        self.thread = None
+
+    def _run(self, board, color, max_depth, time_limit, node_limit, stop, infinite_done):
+        context = SearchContext(self.tt, self.orderer, stop=stop, null_move=True, late_move_reductions=True,
+                                futility=True, book=self.book, tablebases=self.tablebases)
+
+        def report(result):
+            elapsed = max(result["time"], 1e-6)
+            nodes = result["nodes"] + result["qnodes"]
+            self.send(f"info depth {result['depth']} score {format_score(result['score'], color, result['pv'])} "
+                      f"nodes {nodes} nps {int(nodes / elapsed)} time {int(elapsed * 1000)} "
+                      f"pv {' '.join(uci_move(move) for move in result['pv'])}")
+
+        result = search(board, color, max_depth, time_limit, node_limit, context=context, on_iteration=report)
+        if infinite_done is not None:
+            infinite_done.wait()  # "go infinite": không được trả lời trước lệnh stop
+        if result["move"] is None:
+            self.send("bestmove 0000")  # Không còn nước đi hợp lệ
+            return
+        ponder = f" ponder {uci_move(result['pv'][1])}" if len(result["pv"]) > 1 else ""
+        self.send(f"bestmove {uci_move(result['move'])}{ponder}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Engine cờ vua theo giao thức UCI")
+    parser.add_argument("--backend", choices=("list", "mailbox", "bitboard"), default="mailbox")
+    parser.add_argument("--book", help="sách khai cuộc (tạo bằng book.py)")
+    parser.add_argument("--tablebases", default=TABLEBASE_DIR, help="thư mục bảng tàn cuộc")
+    args = parser.parse_args()
+
+    book = OpeningBook(args.book) if args.book else None
+    tablebases = Tablebases(args.tablebases) if os.path.isdir(args.tablebases) else None
+    engine = UCIEngine(sys.stdout, args.backend, book, tablebases)
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+    engine.stop_search()
+
+
+if __name__ == "__main__":
+    main()
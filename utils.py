@@ -9,6 +9,22 @@ def parse_move(move):
         print("Lỗi: Nước đi không đúng định dạng!")
         return None, None
 
+FEN_PLACEMENT_CHARS = frozenset("PNBRQKpnbrqk12345678")
+
+def parse_placement(placement):
+    """Chuyển phần vị trí quân của chuỗi FEN (ví dụ: 'rnbqkbnr/pppppppp/8/...') thành 8 hàng của bàn cờ."""
+    rows = []
+    for fen_row in placement.split("/"):
+        row = []
+        for char in fen_row:
+            if char not in FEN_PLACEMENT_CHARS:
+                raise ValueError(f"Ký tự không hợp lệ '{char}' trong vị trí quân: {placement}")
+            row.extend("." * int(char) if char.isdigit() else char)
+        rows.append(row)
+    if len(rows) != 8 or any(len(row) != 8 for row in rows):
+        raise ValueError(f"Vị trí quân không hợp lệ: {placement}")
+    return rows
+
 def is_within_bounds(position):
     """Kiểm tra xem vị trí có nằm trong bàn cờ không."""
     x, y = position
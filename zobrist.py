@@ -0,0 +1,23 @@
+import random
+
+# Khóa Zobrist cố định (seed cố định) để giá trị băm giống nhau giữa các lần chạy
+_random = random.Random(0x5EED_C4E55)
+PIECE_KEYS = {piece: [_random.getrandbits(64) for _ in range(64)] for piece in "PNBRQKpnbrqk"}
+BLACK_TO_MOVE = _random.getrandbits(64)
+PIECE_KEYS['.'] = [0] * 64  # Ô trống không đóng góp vào giá trị băm
+
+
+def compute_hash(rows):
+    """Tính giá trị băm Zobrist của vị trí quân (không gồm bên đi) bằng cách duyệt toàn bộ bàn cờ."""
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            piece = rows[row][col]
+            if piece != '.':
+                value ^= PIECE_KEYS[piece][row * 8 + col]
+    return value
+
+
+def position_key(board, color):
+    """Khóa của thế cờ gồm cả bên đi (`color` là bên sắp đi)."""
+    return board.hash ^ BLACK_TO_MOVE if color == 'black' else board.hash